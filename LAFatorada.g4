@@ -0,0 +1,59 @@
+parser grammar LAFatorada;
+
+// Gramática fatorada à esquerda, com a mesma linguagem do LA.g4 (e os mesmos tokens, do LA.tokens).
+// No LA.g4 o cmdAtribuicao e o cmdChamada, e as duas primeiras alternativas da parcela_unario,
+// começam pelo mesmo IDENT, e cada operando de uma expressão desce por uma dezena de regras
+// (expressao, termo_logico, fator_logico, parcela_logica, exp_relacional, exp_aritmetica, termo,
+// fator, parcela, parcela_unario, identificador, dimensao). Aqui o IDENT é consumido uma vez só e
+// os níveis de precedência são laços planos; arvore.compactar remonta a árvore do LA.g4, que é a
+// usada pelas fases seguintes. As regras sem mudança têm o mesmo nome e a mesma forma do LA.g4.
+
+options { tokenVocab=LA; }
+
+programa: declaracoes 'algoritmo' corpo 'fim_algoritmo' EOF;
+declaracoes: decl_local_global*;
+decl_local_global: declaracao_local | declaracao_global;
+declaracao_local: 'declare' variavel | 'constante' IDENT ':' tipo_basico '=' valor_constante | 'tipo' IDENT ':' tipo;
+variavel: identificador (',' identificador)* ':' tipo;
+identificador: IDENT ('.' IDENT)* dimensao;
+dimensao: ('[' exp_aritmetica ']')*;
+tipo: registro | tipo_estendido;
+tipo_basico: 'literal' | 'inteiro' | 'real' | 'logico';
+tipo_basico_ident: tipo_basico | IDENT;
+tipo_estendido: '^'? tipo_basico_ident;
+valor_constante: CADEIA | NUM_INT | NUM_REAL | 'verdadeiro' | 'falso';
+registro: 'registro' variavel* 'fim_registro';
+declaracao_global: 'procedimento' IDENT '(' parametros? ')' declaracao_local* cmd* 'fim_procedimento'
+                    | 'funcao' IDENT '(' parametros? ')' ':' tipo_estendido declaracao_local* cmd* 'fim_funcao';
+parametro: 'var'? identificador (',' identificador)* ':' tipo_estendido;
+parametros: parametro (',' parametro)*;
+corpo: declaracao_local* cmd*;
+cmd: cmdLeia | cmdEscreva | cmdSe | cmdCaso | cmdPara | cmdEnquanto | cmdFaca | cmdAtribuicao | cmdIdent | cmdRetorne;
+cmdLeia: 'leia' '(' '^'? identificador (',' '^'? identificador)* ')';
+cmdEscreva: 'escreva' '(' expressao (',' expressao)* ')';
+cmdSe: 'se' expressao 'entao' (cmd1+=cmd)* ('senao' cmd2+=cmd*)? 'fim_se';
+cmdCaso: 'caso' exp_aritmetica 'seja' selecao ('senao' cmd*)? 'fim_caso';
+cmdPara: 'para' IDENT '<-' exp_aritmetica1=exp_aritmetica 'ate' exp_aritmetica2=exp_aritmetica 'faca' cmd* 'fim_para';
+cmdEnquanto: 'enquanto' expressao 'faca' cmd* 'fim_enquanto';
+cmdFaca: 'faca' cmd* 'ate' expressao;
+// Só a atribuição por ponteiro; a que começa por IDENT é do cmdIdent
+cmdAtribuicao: '^' identificador '<-' expressao;
+// cmdChamada ou cmdAtribuicao (identificador inline, com a dimensao)
+cmdIdent: IDENT ('(' expressao (',' expressao)* ')' | ('.' IDENT)* ('[' exp_aritmetica ']')* '<-' expressao);
+cmdRetorne: 'retorne' expressao;
+selecao: item_selecao*;
+item_selecao: constantes ':' cmd*;
+constantes: numero_intervalo (',' numero_intervalo)*;
+numero_intervalo: (op_unario1=op_unario)? NUM_INT ('..' (op_unario2=op_unario)? NUM_INT)?;
+op_unario: '-';
+// termo, fator e os operadores op1, op2 e op3 do LA.g4, num laço só
+exp_aritmetica: parcela (('+' | '-' | '*' | '/' | '%') parcela)*;
+// parcela_unario e parcela_nao_unario
+parcela: '-'? parcela_unario | '&' identificador | CADEIA;
+parcela_unario: '^' identificador
+              | IDENT ('(' expressao (',' expressao)* ')' | ('.' IDENT)* ('[' exp_aritmetica ']')*)
+              | NUM_INT | NUM_REAL | '(' expressao ')';
+// termo_logico e os operadores op_logico_1 e op_logico_2
+expressao: fator_logico (('ou' | 'e') fator_logico)*;
+// parcela_logica, exp_relacional e op_relacional
+fator_logico: 'nao'? ('verdadeiro' | 'falso' | exp_aritmetica (('=' | '<>' | '>=' | '<=' | '>' | '<') exp_aritmetica)?);
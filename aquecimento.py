@@ -0,0 +1,322 @@
+import os
+import sys
+import stat
+import pickle
+import contextlib
+from Parser.LAParser import LAParser
+from arvore import LAFatorada
+from antlr4.atn.ATN import ATN
+from antlr4.atn.ATNState import ATNState
+from antlr4.PredictionContext import PredictionContext
+from antlr4.atn.SemanticContext import SemanticContext
+
+# Importado pelo compilador.py: aqui só entra o necessário para carregar o DFA; o resto é importado onde é usado
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+# O mesmo de cache.DIRETORIO_PADRAO, sem importar o cache.py (json, shutil, hashlib) a cada partida
+DIRETORIO_PADRAO = os.environ.get("LA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "la-compilador"))
+
+# LA_DFA=0 desliga o carregamento (para medir a partida a frio)
+ATIVO = os.environ.get("LA_DFA", "1") not in ("", "0")
+
+_carregado = False
+
+# Cópia dos DFAs feita antes de um pedido, a marca deles nela e os parsers do pedido (ver preservar)
+_copia = None
+_marca = None
+_observados = None
+
+# Parsers cujos DFAs são gravados: o da gramática de referência e, se gerado, o da fatorada
+PARSERS = (LAParser,) if LAFatorada is None else (LAParser, LAFatorada)
+ATNS = [parser.atn for parser in PARSERS]
+
+# Únicas classes que o dfa.pickle pode instanciar: as do DFA de predição do runtime do ANTLR
+CLASSES_DFA = {
+    "antlr4.dfa.DFA": ("DFA",),
+    "antlr4.dfa.DFAState": ("DFAState", "PredPrediction"),
+    "antlr4.PredictionContext": ("PredictionContext", "SingletonPredictionContext", "ArrayPredictionContext",
+                                 "EmptyPredictionContext"),
+    "antlr4.atn.SemanticContext": ("SemanticContext", "EmptySemanticContext", "Predicate", "PrecedencePredicate",
+                                   "AND", "OR"),
+    "antlr4.atn.ATNConfig": ("ATNConfig",),
+    "antlr4.atn.ATNConfigSet": ("ATNConfigSet",),
+    "builtins": ("set", "frozenset"),
+}
+
+
+def arquivoDFA(diretorio=DIRETORIO_PADRAO):
+    """Caminho do DFA salvo em `diretorio` (padrão: o do cache de compilação)."""
+    return os.path.join(diretorio, "dfa.pickle")
+
+
+def chave():
+    """
+    Identifica os ATNs dos PARSERS, o runtime do ANTLR e o Python: um DFA
+    gravado por uma gramática ou um runtime diferentes nunca é carregado.
+    """
+    from antlr4.atn import ParserATNSimulator
+    simulador = ParserATNSimulator.__file__
+    atns = [sys.modules[parser.__module__].serializedATN() for parser in PARSERS]
+    return atns, simulador, os.path.getmtime(simulador), sys.version
+
+
+class _Gravador(pickle.Pickler):
+    """
+    Grava os DFAs sem o ATN: os estados do ATN e os singletons que o runtime
+    compara por identidade (contexto vazio, predicado NONE) viram referências,
+    resolvidas na leitura para os objetos dos PARSERS já carregados.
+    """
+    def persistent_id(self, objeto):
+        if isinstance(objeto, ATNState):
+            return ("estado", ATNS.index(objeto.atn), objeto.stateNumber)
+        if isinstance(objeto, ATN):
+            return ("atn", ATNS.index(objeto))
+        if objeto is PredictionContext.EMPTY:
+            return ("vazio",)
+        if objeto is SemanticContext.NONE:
+            return ("nenhum",)
+        return None
+
+
+class _Leitor(pickle.Unpickler):
+    """
+    Lê o que o _Gravador gravou. Só as CLASSES_DFA podem ser instanciadas:
+    qualquer outra referência (os.system, builtins.eval, ...) é recusada,
+    para que um dfa.pickle adulterado não execute código no compilador.
+    """
+    def find_class(self, modulo, nome):
+        if nome not in CLASSES_DFA.get(modulo, ()):
+            raise pickle.UnpicklingError("classe nao permitida no DFA: %s.%s" % (modulo, nome))
+        return super().find_class(modulo, nome)
+
+    def persistent_load(self, referencia):
+        if referencia[0] == "estado":
+            return ATNS[referencia[1]].states[referencia[2]]
+        if referencia[0] == "atn":
+            return ATNS[referencia[1]]
+        if referencia[0] == "vazio":
+            return PredictionContext.EMPTY
+        return SemanticContext.NONE
+
+
+def salvar(caminho):
+    """Grava os DFAs de predição dos PARSERS (compartilhados por todas as instâncias do processo)."""
+    import tempfile
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix=".tmp")
+    limite = sys.getrecursionlimit()
+    # Cadeias longas de estados e contextos são gravadas recursivamente
+    sys.setrecursionlimit(max(limite, 100000))
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            gravador = _Gravador(arquivo, pickle.HIGHEST_PROTOCOL)
+            gravador.dump(chave())
+            gravador.dump([parser.decisionsToDFA for parser in PARSERS])
+        os.replace(temporario, caminho)
+    finally:
+        sys.setrecursionlimit(limite)
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def confiavel(arquivo, caminho):
+    """
+    Se o arquivo aberto e o seu diretório são do usuário e ninguém mais pode
+    escrever neles (a mesma exigência do servidor.prepararSocket para o
+    diretório do socket). Sem getuid (Windows), não há o que conferir.
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    for informacoes in (os.fstat(arquivo.fileno()), os.stat(os.path.dirname(os.path.abspath(caminho)))):
+        if informacoes.st_uid != os.getuid() or stat.S_IMODE(informacoes.st_mode) & 0o022:
+            return False
+    return True
+
+
+def carregar(caminho):
+    """
+    Substitui os DFAs dos PARSERS pelos gravados em `caminho`. Retorna False
+    (sem alterar nada) se o arquivo não existir, não puder ser lido, for de
+    outra gramática ou runtime, ou se outro usuário puder tê-lo escrito.
+    """
+    try:
+        with open(caminho, "rb") as arquivo:
+            if not confiavel(arquivo, caminho):
+                return False
+            leitor = _Leitor(arquivo)
+            if leitor.load() != chave():
+                return False
+            dfas = leitor.load()
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, IndexError):
+        return False
+    if [len(lista) for lista in dfas] != [len(parser.decisionsToDFA) for parser in PARSERS]:
+        return False
+    # A lista é a mesma que os parsers já criados receberam
+    for parser, lista in zip(PARSERS, dfas):
+        parser.decisionsToDFA[:] = lista
+    return True
+
+
+def instalar(diretorio=DIRETORIO_PADRAO):
+    """Carrega o DFA aquecido, uma vez por processo, antes da primeira análise. Retorna se ele está em uso."""
+    global _carregado
+    if not _carregado and ATIVO:
+        _carregado = carregar(arquivoDFA(diretorio))
+    return _carregado
+
+
+def estados():
+    """Número de estados nos DFAs de predição dos PARSERS."""
+    return sum(len(dfa.states) for parser in PARSERS for dfa in parser.decisionsToDFA)
+
+
+def marca():
+    """
+    Número de estados e de transições nos DFAs dos PARSERS. O ANTLR só
+    acrescenta estados e transições, então a marca muda sempre que um DFA muda.
+    """
+    total = 0
+    for parser in PARSERS:
+        for dfa in parser.decisionsToDFA:
+            estados = list(dfa.states)
+            if dfa.s0 is not None:
+                estados.append(dfa.s0)
+            total += len(estados)
+            for estado in estados:
+                if estado.edges:
+                    total += len(estado.edges) - estado.edges.count(None)
+    return total
+
+
+def copiarDFAs():
+    """Os DFAs dos PARSERS gravados em memória, para restaurarDFAs."""
+    import io
+    memoria = io.BytesIO()
+    limite = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limite, 100000))
+    try:
+        _Gravador(memoria, pickle.HIGHEST_PROTOCOL).dump([parser.decisionsToDFA for parser in PARSERS])
+    finally:
+        sys.setrecursionlimit(limite)
+    return memoria.getvalue()
+
+
+def restaurarDFAs(copia):
+    """Volta os DFAs dos PARSERS ao que eram em copiarDFAs."""
+    import io
+    for parser, lista in zip(PARSERS, _Leitor(io.BytesIO(copia)).load()):
+        parser.decisionsToDFA[:] = lista
+
+
+def observar(parser):
+    """Registra o parser de uma análise feita dentro de preservar (o compilador chama ao criá-lo)."""
+    if _observados is not None:
+        _observados.append(parser)
+
+
+@contextlib.contextmanager
+def preservar():
+    """
+    Isola um pedido num processo que compila vários programas (servidor.py,
+    processos do lote.py), para que a saída e as mensagens do ANTLR sejam as
+    de um main.py novo. Um pedido com erros sintáticos deixa dois rastros:
+
+    - a recuperação de erros do runtime (DefaultErrorStrategy.sync) soma o
+      conjunto de recuperação ao conjunto de tokens seguintes que o ATN guarda
+      em cada estado (nextTokenWithinRule), e os "expecting {...}" seguintes
+      passam a listar tokens a mais; esses conjuntos são apagados;
+    - os estados que ela acrescenta aos DFAs (ver aquecer); os DFAs voltam à
+      cópia feita antes do pedido, refeita só quando um pedido sem erros os
+      fez crescer.
+    """
+    global _copia, _marca, _observados
+    instalar()
+    atual = marca()
+    if atual != _marca:
+        _copia, _marca = copiarDFAs(), atual
+    _observados = []
+    try:
+        yield
+    finally:
+        observados, _observados = _observados, None
+        if any(parser.getNumberOfSyntaxErrors() for parser in observados):
+            for atn in ATNS:
+                for estado in atn.states:
+                    if estado is not None:
+                        estado.nextTokenWithinRule = None
+            if marca() != _marca:
+                restaurarDFAs(_copia)
+
+
+def corpus(raiz=os.path.join(RAIZ, "casos-de-teste")):
+    """Programas LA das etapas T3 a T5, usados para aquecer o DFA (os da T1 e da T2 têm erros léxicos e sintáticos)."""
+    arquivos = []
+    for etapa in ("3.casos_teste_t3/entrada", "4.casos_teste_t4/entrada", "5.casos_teste_t5/1.entrada"):
+        diretorio = os.path.join(raiz, etapa)
+        arquivos.extend(os.path.join(diretorio, nome) for nome in os.listdir(diretorio))
+    return sorted(arquivos)
+
+
+def medirPartida(comando, repeticoes, ambiente):
+    """Menor tempo de parede de `comando` em processos novos (o menos afetado pelo ruído da máquina)."""
+    import time
+    import subprocess
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run(comando, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def benchmark(arquivos, repeticoes):
+    """Partida a frio do main.py (sem DFA salvo) contra a partida com o DFA aquecido, para cada arquivo."""
+    import tempfile
+    with tempfile.TemporaryDirectory() as diretorio:
+        ambiente = dict(os.environ, LA_CACHE_DIR=diretorio)
+        aquecer(corpus())
+        salvar(arquivoDFA(diretorio))
+        vazio = medirPartida([sys.executable, "-c", "pass"], repeticoes, ambiente)
+        sys.stdout.write("interpretador sem nada: %.1fms\n" % (vazio * 1000))
+        sys.stdout.write("%-45s %10s %10s\n" % ("programa", "frio", "aquecido"))
+        for arquivo in arquivos:
+            comando = [sys.executable, os.path.join(RAIZ, "main.py"), "--sem-cache", arquivo, "-"]
+            frio = medirPartida(comando, repeticoes, dict(ambiente, LA_DFA="0"))
+            aquecido = medirPartida(comando, repeticoes, ambiente)
+            sys.stdout.write("%-45s %8.1fms %8.1fms  %.2fx\n" % (
+                os.path.basename(arquivo), frio * 1000, aquecido * 1000, frio / aquecido))
+
+
+def main():
+    import time
+    import argparse
+    argumentos = argparse.ArgumentParser(
+        description="Aquece o DFA de predicao do parser com os casos de teste e o grava para as proximas execucoes")
+    argumentos.add_argument("arquivos", nargs="*", help="programas LA usados no aquecimento (padrao: casos-de-teste)")
+    argumentos.add_argument("--diretorio", default=DIRETORIO_PADRAO, help="onde gravar (padrao: $LA_CACHE_DIR)")
+    argumentos.add_argument("--benchmark", action="store_true",
+                            help="compara a partida do main.py a frio e com o DFA aquecido")
+    argumentos.add_argument("-n", "--repeticoes", type=int, default=11)
+    args = argumentos.parse_args()
+
+    if args.benchmark:
+        benchmark(args.arquivos or [os.path.join(RAIZ, "casos-de-teste", "5.casos_teste_t5", "1.entrada",
+                                                 "18.procedimento_impressao.alg")], args.repeticoes)
+        return 0
+    caminho = arquivoDFA(args.diretorio)
+    carregar(caminho)
+    antes = estados()
+    arquivos = args.arquivos or corpus()
+    inicio = time.perf_counter()
+    comErros = aquecer(arquivos)
+    if comErros:
+        sys.stderr.write("DFA nao gravado; programas com erros sintaticos:\n" + "".join(
+            "  " + arquivo + "\n" for arquivo in comErros))
+        return 1
+    salvar(caminho)
+    sys.stdout.write("%d programas, %d -> %d estados de DFA em %.2fs: %s (%d bytes)\n" % (
+        len(arquivos), antes, estados(), time.perf_counter() - inicio, caminho, os.path.getsize(caminho)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
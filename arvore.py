@@ -0,0 +1,434 @@
+from antlr4.tree.Tree import ErrorNode, TerminalNodeImpl
+from Parser.LAParser import LAParser
+
+try:
+    from Parser.LAFatorada import LAFatorada
+except ImportError:
+    # Gerado a partir do LAFatorada.g4 (ver README); sem ele, só a gramática de referência é usada
+    LAFatorada = None
+
+# Árvore compacta, para a qual a árvore do LAParser é convertida logo depois da análise sintática.
+# Os contextos do ANTLR guardam o parser (e por ele o fluxo de tokens e o texto inteiro), o pai, o
+# estado de invocação e a exceção, e cada folha é um TerminalNode mais um CommonToken; aqui cada
+# nó tem só filhos, tokens de início e fim, rótulos e o texto (calculado uma vez), em __slots__.
+# Os nós oferecem a mesma interface que as fases seguintes usam dos contextos (ctx.identificador(),
+# ctx.IDENT(0), ctx.cmd1, ctx.start.line, getText(), accept...), então Visitor, Generator,
+# Rebaixador, CompiladorBytecode e o lsp.py percorrem qualquer uma das duas árvores.
+# A árvore do LAFatorada (gramática fatorada à esquerda, LAFatorada.g4) é convertida na mesma
+# árvore compacta, com os nós que a gramática fatorada não tem remontados (ver Remontagem).
+
+
+class Folha:
+    """
+    Token da árvore compacta: é ao mesmo tempo a folha (como o TerminalNode)
+    e o token (como o CommonToken, em `symbol`, `start` e `stop` dos nós),
+    com só o tipo, o texto e a linha.
+    """
+    __slots__ = ("type", "text", "line")
+
+    def __init__(self, tipo, texto, linha):
+        self.type = tipo
+        self.text = texto
+        self.line = linha
+
+    @property
+    def symbol(self):
+        return self
+
+    def getSymbol(self):
+        return self
+
+    def getText(self):
+        return self.text
+
+    def getChildCount(self):
+        return 0
+
+    def accept(self, visitor):
+        return visitor.visitTerminal(self)
+
+    def __str__(self):
+        return self.text
+
+
+class FolhaErro(Folha):
+    """Token consumido ou inventado pela recuperação de erros do parser (o ErrorNode do ANTLR)."""
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitErrorNode(self)
+
+
+class No:
+    """
+    Nó de uma regra. As subclasses (uma por regra, em CLASSES) acrescentam
+    os rótulos da gramática e os métodos de acesso aos filhos.
+    """
+    __slots__ = ("children", "start", "stop", "texto")
+    regra = -1
+
+    def getRuleIndex(self):
+        return self.regra
+
+    def getChildCount(self):
+        return len(self.children)
+
+    def getChild(self, i):
+        return self.children[i] if 0 <= i < len(self.children) else None
+
+    def getToken(self, tipo, i):
+        for filho in self.children:
+            if isinstance(filho, Folha) and filho.type == tipo:
+                if i == 0:
+                    return filho
+                i -= 1
+        return None
+
+    def getTokens(self, tipo):
+        return [filho for filho in self.children if isinstance(filho, Folha) and filho.type == tipo]
+
+    def getText(self):
+        """Texto do nó sem espaços, como o do ANTLR; montado sem recursão na primeira chamada e guardado."""
+        if self.texto is None:
+            partes = []
+            pendentes = [self]
+            while pendentes:
+                no = pendentes.pop()
+                if isinstance(no, Folha):
+                    partes.append(no.text)
+                elif no.texto is not None:
+                    partes.append(no.texto)
+                else:
+                    pendentes.extend(reversed(no.children))
+            self.texto = "".join(partes)
+        return self.texto
+
+    def accept(self, visitor):
+        return visitor.visitChildren(self)
+
+
+def acessoRegra(classe, lista):
+    """Método de acesso aos filhos de uma regra, como o gerado pelo ANTLR (um só ou a lista, quando há vários)."""
+    if not lista:
+        def acesso(self):
+            for filho in self.children:
+                if filho.__class__ is classe:
+                    return filho
+            return None
+        return acesso
+
+    def acessoLista(self, i=None):
+        filhos = [filho for filho in self.children if filho.__class__ is classe]
+        if i is None:
+            return filhos
+        return filhos[i] if 0 <= i < len(filhos) else None
+    return acessoLista
+
+
+def acessoToken(tipo, lista):
+    """Método de acesso às folhas de um tipo de token, como o gerado pelo ANTLR."""
+    if not lista:
+        def acesso(self):
+            return self.getToken(tipo, 0)
+        return acesso
+
+    def acessoLista(self, i=None):
+        if i is None:
+            return self.getTokens(tipo)
+        return self.getToken(tipo, i)
+    return acessoLista
+
+
+def visita(nome):
+    def accept(self, visitor):
+        metodo = getattr(visitor, nome, None)
+        if metodo is None:
+            return visitor.visitChildren(self)
+        return metodo(self)
+    return accept
+
+
+def construirClasses():
+    """
+    Uma subclasse de No por regra do LAParser, com os mesmos métodos de
+    acesso, rótulos e método visit do contexto gerado. Retorna o dicionário
+    {classe do contexto: classe compacta}.
+    """
+    contextos = {}
+    for indice, regra in enumerate(LAParser.ruleNames):
+        contexto = getattr(LAParser, regra[0].upper() + regra[1:] + "Context")
+        # Rótulos (cmd1, exp_aritmetica1, op_unario1...); os começados por "_" são temporários do parser
+        rotulos = tuple(nome for nome in vars(contexto(None)) if not nome.startswith("_"))
+        atributos = {"__slots__": rotulos, "regra": indice, "rotulos": rotulos,
+                     "accept": visita("visit" + regra[0].upper() + regra[1:])}
+        contextos[contexto] = atributos
+    classes = {contexto: type(contexto.__name__[:-len("Context")], (No,), atributos)
+               for contexto, atributos in contextos.items()}
+    porRegra = {classe.regra: classe for classe in classes.values()}
+    for contexto, classe in classes.items():
+        for nome, metodo in vars(contexto).items():
+            if nome.startswith("_") or not hasattr(metodo, "__code__") or nome in vars(No) or nome in (
+                    "enterRule", "exitRule", "copyFrom"):
+                continue
+            # Os de lista recebem o índice opcional i além do self
+            lista = metodo.__code__.co_argcount > 1
+            if nome in LAParser.ruleNames:
+                setattr(classe, nome, acessoRegra(porRegra[LAParser.ruleNames.index(nome)], lista))
+            else:
+                setattr(classe, nome, acessoToken(getattr(LAParser, nome), lista))
+    return classes
+
+
+CLASSES = construirClasses()
+# Classes compactas pelo nome da regra
+POR_REGRA = {LAParser.ruleNames[classe.regra]: classe for classe in CLASSES.values()}
+
+
+def copiarRotulos(ctx, no, filhos, folha):
+    """
+    Copia para `no` os rótulos do contexto `ctx`, que apontam para filhos do
+    próprio contexto (um contexto ou um token, ou uma lista deles), trocados
+    pelos convertidos em `filhos`, e os apaga do contexto.
+    """
+    convertidos = {id(filho): convertido for filho, convertido in zip(ctx.children or (), filhos)}
+    for rotulo in no.rotulos:
+        valor = getattr(ctx, rotulo)
+        if isinstance(valor, list):
+            valor = [convertidos[id(item)] for item in valor]
+        elif valor is not None:
+            valor = convertidos[id(valor)] if id(valor) in convertidos else folha(valor)
+        setattr(no, rotulo, valor)
+    for rotulo in vars(ctx):
+        setattr(ctx, rotulo, None)
+
+
+def compactar(arvore):
+    """
+    Converte a árvore do LAParser na árvore compacta, sem recursão. Os
+    tokens de início e fim dos nós são as próprias folhas (o mesmo objeto
+    para o mesmo token, de modo que `ctx.start is ctx.stop` continua valendo).
+
+    A árvore do ANTLR é consumida: cada contexto já convertido perde os
+    filhos, o pai e os rótulos, e é liberado na hora pela contagem de
+    referências, sem esperar o coletor de ciclos (pai e filhos se apontam).
+    Assim as duas árvores nunca ocupam a memória inteiras ao mesmo tempo.
+
+    A árvore do LAFatorada é remontada na mesma árvore compacta (Remontagem).
+    """
+    classes = CLASSES
+    if type(arvore) not in classes:
+        return Remontagem().converter(arvore)
+    folhas = {}
+
+    def folha(token):
+        convertida = folhas.get(token)
+        if convertida is None and token is not None:
+            convertida = folhas[token] = Folha(token.type, token.text, token.line)
+        return convertida
+
+    raiz = classes[type(arvore)].__new__(classes[type(arvore)])
+    pendentes = [(arvore, raiz)]
+    while pendentes:
+        ctx, no = pendentes.pop()
+        no.start = folha(ctx.start)
+        no.stop = folha(ctx.stop)
+        no.texto = None
+        filhos = []
+        for filho in ctx.children or ():
+            classe = classes.get(type(filho))
+            if classe is None:
+                convertido = folha(filho.symbol)
+                if isinstance(filho, ErrorNode):
+                    convertido.__class__ = FolhaErro
+            else:
+                convertido = classe.__new__(classe)
+                pendentes.append((filho, convertido))
+            filhos.append(convertido)
+        no.children = tuple(filhos)
+        if no.rotulos:
+            copiarRotulos(ctx, no, filhos, folha)
+        # Sem os ciclos pai <-> filho, o contexto é liberado assim que sai da pilha
+        ctx.children = None
+        ctx.parentCtx = None
+    return raiz
+
+
+def tipoLiteral(literal):
+    return LAParser.literalNames.index("'" + literal + "'")
+
+
+ABRE_PARENTESES = tipoLiteral("(")
+ABRE_COLCHETES = tipoLiteral("[")
+ATRIBUICAO = tipoLiteral("<-")
+NAO = tipoLiteral("nao")
+MENOS = tipoLiteral("-")
+# Operadores de cada nível de precedência, com a regra do nível e a do operador no LA.g4
+NIVEIS_ARITMETICOS = (("exp_aritmetica", {tipoLiteral("+"), tipoLiteral("-")}, "op1"),
+                      ("termo", {tipoLiteral("*"), tipoLiteral("/")}, "op2"),
+                      ("fator", {tipoLiteral("%")}, "op3"))
+NIVEIS_LOGICOS = (("expressao", {tipoLiteral("ou")}, "op_logico_1"),
+                  ("termo_logico", {tipoLiteral("e")}, "op_logico_2"))
+
+
+class Remontagem:
+    """
+    Converte a árvore do LAFatorada (sem erros: ela só é usada quando a
+    análise sintática termina sem nenhum) na árvore compacta do LA.g4.
+
+    As regras iguais às do LA.g4 são copiadas como em compactar. As
+    fatoradas são remontadas a partir dos filhos já convertidos (a conversão
+    é em pós-ordem, com pilha explícita): o cmdIdent vira cmdChamada ou
+    cmdAtribuicao, o identificador inline ganha o nó identificador e o
+    dimensao, e os laços planos de operadores são reagrupados por nível de
+    precedência, com os nós dos operadores e os de uma só parcela que o
+    LA.g4 cria (termo, fator, parcela_logica, exp_relacional...). Os tokens
+    de início e fim de cada nó remontado são os que o ANTLR daria à regra.
+    """
+    def __init__(self):
+        self.folhas = {}
+        self.fluxo = None
+        remontadas = {"cmdIdent": self.cmdIdent, "exp_aritmetica": self.expAritmetica, "parcela": self.parcela,
+                      "parcela_unario": self.parcelaUnario, "expressao": self.expressao,
+                      "fator_logico": self.fatorLogico}
+        self.montadores = [remontadas.get(regra) or self.copia(POR_REGRA[regra]) for regra in LAFatorada.ruleNames]
+
+    def folha(self, token):
+        convertida = self.folhas.get(token)
+        if convertida is None and token is not None:
+            convertida = self.folhas[token] = Folha(token.type, token.text, token.line)
+        return convertida
+
+    def converter(self, arvore):
+        """Converte a árvore inteira, consumindo-a como compactar."""
+        self.fluxo = arvore.parser.getTokenStream()
+        folha = self.folha
+        montadores = self.montadores
+        # Sem recuperação de erros não há ErrorNode: toda folha é um TerminalNodeImpl
+        terminal = TerminalNodeImpl
+        valores = []
+        pendentes = [(arvore, None)]
+        while pendentes:
+            ctx, regras = pendentes.pop()
+            filhos = ctx.children or ()
+            if regras is None:
+                subregras = [filho for filho in filhos if filho.__class__ is not terminal]
+                pendentes.append((ctx, len(subregras)))
+                pendentes.extend((filho, None) for filho in reversed(subregras))
+                continue
+            if regras:
+                # Os filhos de regra já convertidos estão no topo de `valores`, na ordem
+                convertidos = iter(valores[-regras:])
+                del valores[-regras:]
+                lista = [folha(filho.symbol) if filho.__class__ is terminal else next(convertidos) for filho in filhos]
+            else:
+                lista = [folha(filho.symbol) for filho in filhos]
+            valores.append(montadores[ctx.getRuleIndex()](ctx, lista))
+            ctx.children = None
+            ctx.parentCtx = None
+        return valores[0]
+
+    def copia(self, classe):
+        """Montador de uma regra igual à do LA.g4."""
+        def montar(ctx, filhos):
+            no = classe.__new__(classe)
+            no.children = tuple(filhos)
+            no.start = self.folha(ctx.start)
+            no.stop = self.folha(ctx.stop)
+            no.texto = None
+            if no.rotulos:
+                copiarRotulos(ctx, no, filhos, self.folha)
+            return no
+        return montar
+
+    def no(self, regra, filhos, inicio=None, fim=None):
+        """Nó remontado; o início e o fim são os do primeiro e do último filho, se não forem dados."""
+        classe = POR_REGRA[regra]
+        no = classe.__new__(classe)
+        no.children = tuple(filhos)
+        no.start = inicio or (filhos[0] if filhos[0].__class__ is Folha else filhos[0].start)
+        no.stop = fim or (filhos[-1] if filhos[-1].__class__ is Folha else filhos[-1].stop)
+        no.texto = None
+        return no
+
+    def envolver(self, regra, filho):
+        """Nó remontado com um só filho, que é um nó."""
+        classe = POR_REGRA[regra]
+        no = classe.__new__(classe)
+        no.children = (filho,)
+        no.start = filho.start
+        no.stop = filho.stop
+        no.texto = None
+        return no
+
+    def identificador(self, ctx, partes):
+        """
+        identificador e dimensao a partir de IDENT ('.' IDENT)* ('[' exp_aritmetica ']')*,
+        os primeiros filhos de `ctx`. Vazio, o dimensao começa no token seguinte e
+        termina no anterior, como uma regra do ANTLR que não consome nada.
+        """
+        nomes = 0
+        while nomes < len(partes) and partes[nomes].__class__ is Folha and partes[nomes].type != ABRE_COLCHETES:
+            nomes += 1
+        if nomes < len(partes):
+            dimensao = self.no("dimensao", partes[nomes:])
+        else:
+            seguinte = self.folha(self.fluxo.get(ctx.children[nomes - 1].symbol.tokenIndex + 1))
+            dimensao = self.no("dimensao", (), seguinte, partes[nomes - 1])
+        return self.no("identificador", partes[:nomes] + [dimensao])
+
+    def cmdIdent(self, ctx, filhos):
+        if filhos[1].type == ABRE_PARENTESES:
+            return self.no("cmdChamada", filhos)
+        atribuicao = next(i for i, filho in enumerate(filhos) if filho.__class__ is Folha and filho.type == ATRIBUICAO)
+        return self.no("cmdAtribuicao", [self.identificador(ctx, filhos[:atribuicao])] + filhos[atribuicao:])
+
+    def parcelaUnario(self, ctx, filhos):
+        if filhos[0].type == LAParser.IDENT and (len(filhos) == 1 or filhos[1].type != ABRE_PARENTESES):
+            return self.no("parcela_unario", [self.identificador(ctx, filhos)])
+        return self.no("parcela_unario", filhos)
+
+    def parcela(self, ctx, filhos):
+        if filhos[0].__class__ is not Folha:
+            return self.no("parcela", filhos)
+        if filhos[0].type == MENOS:
+            return self.no("parcela", [self.no("op_unario", filhos[:1]), filhos[1]])
+        return self.no("parcela", [self.no("parcela_nao_unario", filhos)])
+
+    def agrupar(self, itens, niveis):
+        """Reagrupa operandos e operadores alternados nos níveis de precedência `niveis`."""
+        if len(itens) == 1:
+            # Um operando só (o caso comum): um nó por nível, do mais interno ao mais externo
+            no = itens[0]
+            for regra, _, _ in reversed(niveis):
+                no = self.envolver(regra, no)
+            return no
+        regra, operadores, regraOperador = niveis[0]
+        grupos = [[]]
+        separadores = []
+        for item in itens:
+            if item.__class__ is Folha and item.type in operadores:
+                separadores.append(item)
+                grupos.append([])
+            else:
+                grupos[-1].append(item)
+        filhos = []
+        for i, grupo in enumerate(grupos):
+            if i:
+                filhos.append(self.no(regraOperador, [separadores[i - 1]]))
+            filhos.append(self.agrupar(grupo, niveis[1:]) if len(niveis) > 1 else grupo[0])
+        return self.no(regra, filhos)
+
+    def expAritmetica(self, ctx, filhos):
+        return self.agrupar(filhos, NIVEIS_ARITMETICOS)
+
+    def expressao(self, ctx, filhos):
+        return self.agrupar(filhos, NIVEIS_LOGICOS)
+
+    def fatorLogico(self, ctx, filhos):
+        nao = filhos[:1] if filhos[0].__class__ is Folha and filhos[0].type == NAO else []
+        resto = filhos[len(nao):]
+        if resto[0].__class__ is not Folha and len(resto) == 3:
+            resto = [self.no("exp_relacional", [resto[0], self.no("op_relacional", resto[1:2]), resto[2]])]
+        elif resto[0].__class__ is not Folha:
+            resto = [self.envolver("exp_relacional", resto[0])]
+        return self.no("fator_logico", nao + [self.no("parcela_logica", resto)])
@@ -0,0 +1,197 @@
+import sys
+import json
+import time
+import platform
+import statistics
+import argparse
+from antlr4 import InputStream, CommonTokenStream
+from Parser.LAParser import LAParser
+from arvore import compactar
+from compilador import Visitor, Generator, analisar, compilarTexto, LEXERS, GRAMATICAS, ETAPAS
+from emissor import Emissor
+from gerador import gerarPrograma
+
+# "arvore" é a conversão para a árvore compacta (arvore.py); a análise semântica é feita no mesmo
+# percurso da geração de código (fase "generator")
+FASES = ("lexer", "parser", "arvore", "generator")
+
+# Casos da suíte: cada um aumenta uma dimensão do programa em relação ao "base"
+SUITE = [
+    ("base", {}),
+    ("comandos", {"comandos": 2000}),
+    ("subrotinas", {"funcoes": 150, "procedimentos": 150}),
+    ("aninhamento", {"comandos": 400, "profundidade": 10}),
+    ("expressoes", {"comandos": 300, "tamanhoExpressao": 40}),
+    ("vetores", {"tamanhoVetor": 100000}),
+    ("registros", {"campos": 300}),
+]
+PARAMETROS_BASE = {"comandos": 200, "funcoes": 4, "procedimentos": 4, "profundidade": 3,
+                   "tamanhoExpressao": 4, "tamanhoVetor": 100, "campos": 4}
+
+
+def medirFases(programa, lexer="rapido", gramatica="fatorada"):
+    """
+    Compila `programa` (texto LA) medindo separadamente cada fase do pipeline.
+    Retorna (tempos por fase em segundos, número de tokens).
+    """
+    tempos = {}
+    inicio = time.perf_counter()
+    tokens = CommonTokenStream(LEXERS[lexer](InputStream(programa)))
+    tokens.fill()
+    tempos["lexer"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    parser = LAParser(tokens)
+    arvore, _ = analisar(parser, gramatica=gramatica)
+    tempos["parser"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    arvore = compactar(arvore)
+    tempos["arvore"] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    visitor = Visitor(Emissor())
+    Generator(visitor, Emissor()).handle(arvore)
+    tempos["generator"] = time.perf_counter() - inicio
+    if not visitor.outfile.vazio():
+        raise ValueError("programa gerado com erros semanticos: " + visitor.outfile.valor().splitlines()[0])
+    return tempos, len(tokens.tokens)
+
+
+def executarCaso(nome, parametros, repeticoes, aquecer=True, lexer="rapido", gramatica="fatorada"):
+    programa = gerarPrograma(**parametros)
+    if aquecer:
+        # Primeira execução só preenche os DFAs do ANTLR, compartilhados entre execuções
+        medirFases(programa, lexer, gramatica)
+    medidas = {fase: [] for fase in FASES}
+    for _ in range(repeticoes):
+        tempos, quantidadeTokens = medirFases(programa, lexer, gramatica)
+        for fase in FASES:
+            medidas[fase].append(tempos[fase])
+    fases = {fase: {"minimo": min(valores), "mediana": statistics.median(valores)} for fase, valores in medidas.items()}
+    return {
+        "nome": nome,
+        "parametros": parametros,
+        "linhas": programa.count("\n"),
+        "bytes": len(programa.encode("utf-8")),
+        "tokens": quantidadeTokens,
+        "fases": fases,
+        "total": sum(fase["minimo"] for fase in fases.values()),
+    }
+
+
+def medirEtapas(nome, parametros, repeticoes, lexer="rapido", gramatica="fatorada"):
+    """
+    Tempo mínimo da compilação de ponta a ponta (compilarTexto) parando em
+    cada uma das ETAPAS, depois de uma execução de aquecimento de cada.
+    """
+    programa = gerarPrograma(**parametros)
+    etapas = {}
+    for etapa in ETAPAS:
+        compilarTexto(programa, lexer=lexer, gramatica=gramatica, etapa=etapa)
+        melhor = None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            compilarTexto(programa, lexer=lexer, gramatica=gramatica, etapa=etapa)
+            tempo = time.perf_counter() - inicio
+            melhor = tempo if melhor is None else min(melhor, tempo)
+        etapas[etapa] = melhor
+    return {"nome": nome, "parametros": parametros, "linhas": programa.count("\n"), "etapas": etapas}
+
+
+def executarSuite(escala=1.0, repeticoes=3, aquecer=True, filtro=None, lexer="rapido", gramatica="fatorada"):
+    resultados = []
+    for nome, ajustes in SUITE:
+        if filtro and nome not in filtro:
+            continue
+        parametros = dict(PARAMETROS_BASE, **ajustes)
+        parametros["comandos"] = max(1, int(parametros["comandos"] * escala))
+        resultados.append(executarCaso(nome, parametros, repeticoes, aquecer, lexer, gramatica))
+    return {
+        "python": platform.python_version(),
+        "maquina": platform.machine(),
+        "escala": escala,
+        "repeticoes": repeticoes,
+        "lexer": lexer,
+        "gramatica": gramatica,
+        "casos": resultados,
+    }
+
+
+def comparar(atual, base, tolerancia=0.10, piso=0.001):
+    """
+    Compara o tempo mínimo de cada fase com o da linha de base. Uma fase
+    regrediu se ficou mais de `tolerancia` (fração) e mais de `piso` segundos
+    mais lenta. Retorna a lista de (caso, fase, base, atual).
+    """
+    anteriores = {caso["nome"]: caso for caso in base["casos"]}
+    regressoes = []
+    for caso in atual["casos"]:
+        anterior = anteriores.get(caso["nome"])
+        if anterior is None or anterior["parametros"] != caso["parametros"]:
+            continue
+        for fase in FASES:
+            if fase not in anterior["fases"]:
+                continue
+            antes = anterior["fases"][fase]["minimo"]
+            agora = caso["fases"][fase]["minimo"]
+            if agora > antes * (1 + tolerancia) and agora - antes > piso:
+                regressoes.append((caso["nome"], fase, antes, agora))
+    return regressoes
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Mede o tempo de cada fase do compilador em programas LA sinteticos")
+    argumentos.add_argument("--escala", type=float, default=1.0, help="multiplica o numero de comandos de cada caso")
+    argumentos.add_argument("-n", "--repeticoes", type=int, default=3)
+    argumentos.add_argument("--casos", nargs="+", choices=[nome for nome, _ in SUITE], help="executa so estes casos")
+    argumentos.add_argument("--sem-aquecimento", action="store_true",
+                            help="mede tambem a primeira execucao, com os DFAs do ANTLR ainda vazios")
+    argumentos.add_argument("--lexer", choices=sorted(LEXERS), default="rapido", help="motor da analise lexica")
+    argumentos.add_argument("--gramatica", choices=GRAMATICAS, default="fatorada",
+                            help="gramatica do parser (ver gramatica.py para o perfil das decisoes de cada uma)")
+    argumentos.add_argument("--etapas", action="store_true",
+                            help="mede a compilacao completa parando em cada etapa (main.py --etapa) em vez das fases")
+    argumentos.add_argument("-o", "--saida", help="grava os resultados em JSON neste arquivo")
+    argumentos.add_argument("--base", help="JSON de uma execucao anterior para detectar regressoes")
+    argumentos.add_argument("--tolerancia", type=float, default=0.10, help="fracao de piora aceita (padrao: 0.10)")
+    args = argumentos.parse_args()
+
+    if args.etapas:
+        sys.stdout.write("%-12s %7s" % ("caso", "linhas") + "".join(" %10s" % etapa for etapa in ETAPAS) + "\n")
+        for nome, ajustes in SUITE:
+            if args.casos and nome not in args.casos:
+                continue
+            parametros = dict(PARAMETROS_BASE, **ajustes)
+            parametros["comandos"] = max(1, int(parametros["comandos"] * args.escala))
+            caso = medirEtapas(nome, parametros, args.repeticoes, args.lexer, args.gramatica)
+            sys.stdout.write("%-12s %7d" % (nome, caso["linhas"])
+                             + "".join(" %9.1fms" % (caso["etapas"][etapa] * 1000) for etapa in ETAPAS) + "\n")
+        return 0
+
+    resultado = executarSuite(args.escala, args.repeticoes, not args.sem_aquecimento, args.casos, args.lexer,
+                              args.gramatica)
+    sys.stdout.write("%-12s %7s %7s" % ("caso", "linhas", "tokens") + "".join(" %10s" % fase for fase in FASES) + " %10s\n" % "total")
+    for caso in resultado["casos"]:
+        sys.stdout.write("%-12s %7d %7d" % (caso["nome"], caso["linhas"], caso["tokens"])
+                         + "".join(" %9.1fms" % (caso["fases"][fase]["minimo"] * 1000) for fase in FASES)
+                         + " %9.1fms\n" % (caso["total"] * 1000))
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+
+    if args.base:
+        with open(args.base) as arquivo:
+            base = json.load(arquivo)
+        regressoes = comparar(resultado, base, args.tolerancia)
+        for nome, fase, antes, agora in regressoes:
+            sys.stdout.write("REGRESSAO %s/%s: %.1fms -> %.1fms (%+.0f%%)\n"
+                             % (nome, fase, antes * 1000, agora * 1000, (agora / antes - 1) * 100))
+        if regressoes:
+            return 1
+        sys.stdout.write("sem regressoes em relacao a %s\n" % args.base)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
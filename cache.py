@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    # Sem fcntl (Windows), as estatísticas são atualizadas sem trava
+    fcntl = None
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_PADRAO = os.environ.get("LA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "la-compilador"))
+TAMANHO_MAXIMO_PADRAO = int(os.environ.get("LA_CACHE_MAX", 64 * 1024 * 1024))
+ARQUIVO_ESTATISTICAS = "estatisticas.json"
+ARQUIVO_TAMANHO = "tamanho"
+ARQUIVO_TRAVA = "estatisticas.lock"
+
+_versao = None
+
+
+def versaoCompilador():
+    """
+    Hash das gramáticas (LA.g4, LAFatorada.g4), dos módulos Python do
+    compilador e dos parsers gerados em Parser/ (que trazem os ATN
+    serializados). Qualquer alteração no compilador, inclusive regerar o
+    parser com outra versão do ANTLR, muda a versão e invalida as entradas antigas.
+    """
+    global _versao
+    if _versao is None:
+        resumo = hashlib.sha256()
+        arquivos = [nome for nome in sorted(os.listdir(RAIZ)) if nome.endswith((".g4", ".py"))]
+        parser = os.path.join(RAIZ, "Parser")
+        if os.path.isdir(parser):
+            arquivos += [os.path.join("Parser", nome) for nome in sorted(os.listdir(parser)) if nome.endswith(".py")]
+        for nome in arquivos:
+            resumo.update(nome.encode("utf-8"))
+            with open(os.path.join(RAIZ, nome), "rb") as arquivo:
+                resumo.update(arquivo.read())
+        _versao = resumo.hexdigest()
+    return _versao
+
+
+class Cache:
+    """
+    Cache em disco das saídas do compilador, endereçado pelo conteúdo do
+    programa LA e pela versão do compilador. Guarda a saída final (código C
+    ou os diagnósticos) e descarta as entradas usadas há mais tempo quando o
+    total passa de `tamanhoMaximo` bytes.
+    """
+    def __init__(self, diretorio=DIRETORIO_PADRAO, tamanhoMaximo=TAMANHO_MAXIMO_PADRAO):
+        self.diretorio = diretorio
+        self.tamanhoMaximo = tamanhoMaximo
+        self.acertos = 0
+        self.falhas = 0
+        self.tamanho = None
+        os.makedirs(diretorio, exist_ok=True)
+
+    def chave(self, caminhoFonte, opcoes=""):
+        """Chave de um programa: hash do código fonte, da versão do compilador e das opções que afetam a saída."""
+        resumo = hashlib.sha256(versaoCompilador().encode("utf-8"))
+        resumo.update(opcoes.encode("utf-8") + b"\0")
+        with open(caminhoFonte, "rb") as arquivo:
+            resumo.update(arquivo.read())
+        return resumo.hexdigest()
+
+    def caminho(self, chave):
+        return os.path.join(self.diretorio, chave + ".out")
+
+    def buscar(self, chave, destino):
+        """
+        Copia a saída guardada para `destino` e devolve as mensagens que a
+        compilação escreveu na saída de erro; None se a chave não estiver no cache.
+        """
+        entrada = self.caminho(chave)
+        try:
+            with open(entrada, "rb") as arquivo:
+                tamanhoErros = int(arquivo.readline())
+                mensagens = arquivo.read(tamanhoErros).decode("utf-8")
+                with open(destino, "wb") as saida:
+                    shutil.copyfileobj(arquivo, saida)
+            # A data de modificação marca o último uso, usada no descarte LRU
+            os.utime(entrada)
+        except (FileNotFoundError, ValueError):
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return mensagens
+
+    def guardar(self, chave, origem, mensagens=""):
+        """
+        Guarda a saída gerada em `origem` junto com as mensagens da saída de
+        erro, escrevendo num temporário e renomeando.
+        """
+        mensagens = mensagens.encode("utf-8")
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        with os.fdopen(descritor, "wb") as arquivo, open(origem, "rb") as saida:
+            arquivo.write(b"%d\n" % len(mensagens))
+            arquivo.write(mensagens)
+            shutil.copyfileobj(saida, arquivo)
+            novo = arquivo.tell()
+        with self.travaEstatisticas():
+            self.tamanho = self.tamanhoRegistrado() + novo
+            try:
+                self.tamanho -= os.path.getsize(self.caminho(chave))
+            except FileNotFoundError:
+                pass
+            os.replace(temporario, self.caminho(chave))
+            self.registrarTamanho()
+        if self.tamanho > self.tamanhoMaximo:
+            self.despejar()
+
+    def tamanhoRegistrado(self):
+        """
+        Total de bytes das entradas, mantido num arquivo do diretório do cache
+        para que cada guardar não precise listar o diretório inteiro (num lote,
+        cada arquivo cria o seu Cache). Sem o arquivo, soma as entradas.
+        Chamado sob travaEstatisticas.
+        """
+        try:
+            with open(os.path.join(self.diretorio, ARQUIVO_TAMANHO)) as arquivo:
+                return int(arquivo.read())
+        except (FileNotFoundError, ValueError):
+            return sum(tamanho for _, tamanho, _ in self.entradas())
+
+    def registrarTamanho(self):
+        """Grava `tamanho` como o total registrado; chamado sob travaEstatisticas."""
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        with os.fdopen(descritor, "w") as arquivo:
+            arquivo.write(str(self.tamanho))
+        os.replace(temporario, os.path.join(self.diretorio, ARQUIVO_TAMANHO))
+
+    def entradas(self):
+        """Lista (data do último uso, tamanho, caminho) de cada entrada do cache."""
+        entradas = []
+        with os.scandir(self.diretorio) as arquivos:
+            for arquivo in arquivos:
+                if arquivo.name.endswith(".out"):
+                    informacoes = arquivo.stat()
+                    entradas.append((informacoes.st_mtime, informacoes.st_size, arquivo.path))
+        return entradas
+
+    def despejar(self):
+        """
+        Remove as entradas usadas há mais tempo até o cache caber no tamanho
+        máximo. Recalcula o total a partir do diretório e o registra.
+        """
+        with self.travaEstatisticas():
+            entradas = sorted(self.entradas())
+            self.tamanho = sum(tamanho for _, tamanho, _ in entradas)
+            for _, tamanho, caminho in entradas:
+                if self.tamanho <= self.tamanhoMaximo:
+                    break
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+                self.tamanho -= tamanho
+            self.registrarTamanho()
+
+    def limpar(self):
+        with self.travaEstatisticas():
+            for _, _, caminho in self.entradas():
+                os.remove(caminho)
+            for nome in (ARQUIVO_ESTATISTICAS, ARQUIVO_TAMANHO):
+                if os.path.exists(os.path.join(self.diretorio, nome)):
+                    os.remove(os.path.join(self.diretorio, nome))
+        self.tamanho = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    @contextlib.contextmanager
+    def travaEstatisticas(self):
+        """Trava exclusiva (flock) entre processos sobre os arquivos de estatísticas e de tamanho."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.diretorio, ARQUIVO_TRAVA), "a") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+    def registrarEstatisticas(self, acertos=None, falhas=None):
+        """
+        Soma os acertos e falhas desta execução aos totais acumulados no
+        diretório do cache. A leitura e a troca do arquivo ficam sob a trava,
+        para que processos concorrentes (lote.py, várias instâncias do
+        main.py) não percam contagens uns dos outros.
+        """
+        with self.travaEstatisticas():
+            totais = self.estatisticas()
+            totais["acertos"] += self.acertos if acertos is None else acertos
+            totais["falhas"] += self.falhas if falhas is None else falhas
+            descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+            with os.fdopen(descritor, "w") as arquivo:
+                json.dump({"acertos": totais["acertos"], "falhas": totais["falhas"]}, arquivo)
+            os.replace(temporario, os.path.join(self.diretorio, ARQUIVO_ESTATISTICAS))
+
+    def estatisticas(self):
+        """Totais acumulados de acertos e falhas, número de entradas e bytes ocupados."""
+        totais = {"acertos": 0, "falhas": 0}
+        try:
+            with open(os.path.join(self.diretorio, ARQUIVO_ESTATISTICAS)) as arquivo:
+                totais.update(json.load(arquivo))
+        except (FileNotFoundError, ValueError):
+            pass
+        entradas = self.entradas()
+        totais["entradas"] = len(entradas)
+        totais["bytes"] = sum(tamanho for _, tamanho, _ in entradas)
+        totais["tamanho_maximo"] = self.tamanhoMaximo
+        return totais
+
+
+class _Duplicador:
+    """Repassa o que é escrito na saída de erro e guarda uma cópia."""
+    def __init__(self, destino):
+        self.destino = destino
+        self.copia = []
+
+    def write(self, texto):
+        self.copia.append(texto)
+        return self.destino.write(texto)
+
+    def flush(self):
+        self.destino.flush()
+
+
+def compilarComCache(compilar, cache, entrada, saida, *args, opcoes=""):
+    """
+    Executa `compilar(entrada, saida, *args)` só quando o programa não está no
+    cache. Retorna "cache" num acerto ou o resultado de `compilar`. As
+    mensagens que o ANTLR escreve na saída de erro também são guardadas e
+    repetidas num acerto. Uma compilação que lança exceção não é guardada.
+    `opcoes` descreve os argumentos que mudam a saída (entra na chave).
+    """
+    chave = cache.chave(entrada, opcoes)
+    mensagens = cache.buscar(chave, saida)
+    if mensagens is not None:
+        sys.stderr.write(mensagens)
+        return "cache"
+    duplicador = _Duplicador(sys.stderr)
+    with contextlib.redirect_stderr(duplicador):
+        resultado = compilar(entrada, saida, *args)
+    cache.guardar(chave, saida, "".join(duplicador.copia))
+    return resultado
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Gerencia o cache de compilacao do compilador LA")
+    argumentos.add_argument("--diretorio", default=DIRETORIO_PADRAO, help="diretorio do cache (padrao: $LA_CACHE_DIR)")
+    argumentos.add_argument("--limpar", action="store_true", help="remove todas as entradas e zera as estatisticas")
+    argumentos.add_argument("--tamanho-maximo", type=int, default=TAMANHO_MAXIMO_PADRAO,
+                            help="limite em bytes; entradas usadas ha mais tempo sao descartadas (padrao: $LA_CACHE_MAX)")
+    args = argumentos.parse_args()
+
+    cache = Cache(args.diretorio, args.tamanho_maximo)
+    if args.limpar:
+        cache.limpar()
+    else:
+        cache.despejar()
+    json.dump(cache.estatisticas(), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import socket
+import logging
+from servidor import SOCKET_PADRAO
+
+
+def enviar(entrada, saida, caminho_socket=SOCKET_PADRAO):
+    """
+    Envia um pedido de compilação ao servidor iniciado com
+    "main.py --servidor --socket" e devolve a resposta ("ok" ou "erro ...").
+    Lança OSError quando não há servidor escutando no socket.
+    """
+    pedido = os.path.abspath(entrada) + "\t" + os.path.abspath(saida) + "\n"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexao:
+        conexao.connect(caminho_socket)
+        conexao.sendall(pedido.encode("utf-8"))
+        conexao.shutdown(socket.SHUT_WR)
+        resposta = conexao.makefile("r", encoding="utf-8").readline()
+    return resposta.rstrip("\n")
+
+
+def main():
+    # Mesmo contrato de main.py: dois argumentos, entrada e saída
+    input_file = sys.argv[1]
+    output_file = sys.argv[2]
+    try:
+        resposta = enviar(input_file, output_file)
+    except OSError:
+        # Sem servidor ativo: compila no próprio processo
+        import compilador
+        compilador.compilar(input_file, output_file)
+        return
+    if resposta != "ok":
+        logging.error(resposta[len("erro "):])
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as error:
+        logging.error(error)
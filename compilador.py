@@ -0,0 +1,1200 @@
+import sys
+import argparse
+import itertools
+import contextlib
+from antlr4 import InputStream, FileStream, CommonTokenStream, PredictionMode, BailErrorStrategy
+from antlr4.Token import Token
+from lexico import LexerRapido
+from Parser.LAParser import LAParser
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from Parser.LAVisitor import LAVisitor
+from simbolos import *
+from emissor import Emissor, emissorPadrao
+from expressoes import Rebaixador, Constante, Referencia, formato
+from otimizador import Otimizador, valorDe, invariante
+import instrumentacao
+import aquecimento
+import preludio
+from arvore import compactar, LAFatorada
+from instrumentacao import SEM_MEDIDAS
+
+
+def lexerAntlr(input, output=sys.stdout):
+    """LALexer gerado pelo ANTLR, importado só quando escolhido: desserializar o seu ATN pesa na partida."""
+    from Parser.LALexer import LALexer
+    return LALexer(input, output)
+
+
+# Motores de análise léxica; ambos produzem os mesmos tokens e erros (ver lexico.py)
+LEXERS = {"rapido": LexerRapido, "antlr": lexerAntlr}
+
+# Limite de recursão durante a compilação. As expressões são percorridas com pilha explícita
+# (expressoes.py), mas o LAParser gerado é descendente recursivo (uns dez quadros por nível de
+# parênteses) e os comandos aninhados são visitados recursivamente; os quadros do Python ficam
+# no heap, então o limite padrão (1000) é o que barraria programas profundos, não a memória.
+LIMITE_RECURSAO = 1000000
+
+# Tipo do token 'senao': o de um `se` é filho direto do cmdSe (sem olhar o texto dos comandos aninhados)
+SENAO = LAParser.literalNames.index("'senao'")
+
+# Tamanho das variáveis literal em C (char[80]), também o limite das linhas lidas com o prelúdio de E/S
+TAMANHO_LITERAL = 80
+
+# Intervalos de caso com até este número de valores viram rótulos "case" individuais;
+# os mais largos viram uma faixa do GCC ("case a ... b:"), de tamanho constante
+LIMITE_CASOS_DENSOS = 8
+
+# Gramáticas do parser: a fatorada à esquerda (LAFatorada.g4, mais rápida) e a de referência (LA.g4)
+GRAMATICAS = ("fatorada", "referencia")
+
+# Etapas em que a compilação pode parar: a lista dos tokens (saída da T1), os erros léxicos e
+# sintáticos (T2), também os semânticos (T3 e T4) ou o pipeline completo, com o código C (T5)
+ETAPAS = ("lexico", "sintatico", "semantico", "codigo")
+
+# Nome de cada tipo de token na lista da etapa léxica: o literal ('algoritmo', '<-') ou o nome simbólico (IDENT)
+NOMES_TOKENS = [literal if literal.startswith("'") else simbolico
+                for literal, simbolico in itertools.zip_longest(LAParser.literalNames, LAParser.symbolicNames,
+                                                                fillvalue="")]
+
+
+def sobrepostos(intervalos):
+    """Indica se algum par de intervalos (comeco, fim) se sobrepõe, sem expandir seus valores."""
+    ordenados = sorted(intervalos)
+    for (_, fimAnterior), (comeco, _) in zip(ordenados, ordenados[1:]):
+        if comeco <= fimAnterior:
+            return True
+    return False
+
+
+def intervalosDe(ctx: LAParser.ConstantesContext):
+    """Intervalos (comeco, fim) de uma seleção, descartando os vazios."""
+    intervalos = []
+    for intervalo in ctx.numero_intervalo():
+        comeco = int(intervalo.NUM_INT(0).getText())
+        if intervalo.op_unario1:
+            comeco = -comeco
+        if intervalo.op_unario2:
+            fim = -int(intervalo.NUM_INT(1).getText())
+        elif intervalo.NUM_INT(1):
+            fim = int(intervalo.NUM_INT(1).getText())
+        else:
+            fim = comeco
+        if comeco <= fim:
+            intervalos.append((comeco, fim))
+    return intervalos
+
+
+class FluxoSobDemanda(CommonTokenStream):
+    """
+    CommonTokenStream cujo getText entre dois tokens já lidos não lê o resto
+    da entrada. O do runtime chama fill(), e a mensagem de "no viable
+    alternative" usa o getText: com os tokens lidos sob demanda (etapas
+    "sintatico" e "semantico"), um erro léxico mais adiante seria relatado
+    no lugar do erro sintático.
+    """
+    def getText(self, start=None, stop=None):
+        if not (isinstance(start, Token) and isinstance(stop, Token)):
+            return super().getText(start, stop)
+        return "".join(token.text for token in self.tokens[start.tokenIndex:stop.tokenIndex + 1]
+                       if token.type != Token.EOF)
+
+
+class AnaliseInterrompida(Exception):
+    """Lançada pelos ouvintes de erro depois de escrever o diagnóstico, para parar a análise no primeiro erro."""
+
+
+class LexerErrorListener(ErrorListener):
+    """
+    Classe personalizada que trata erros léxicos durante a análise.
+    Herda da classe ErrorListener do ANTLR.
+
+    Com `fim` False a mensagem não é seguida de "Fim da compilacao", como na
+    lista de tokens da etapa léxica.
+    """
+    def __init__(self, outfile, fim=True):
+        super().__init__()
+        self.outfile = outfile
+        self.fim = fim
+    
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        """
+        Método chamado quando ocorre um erro léxico.
+        
+        Parâmetros:
+            - recognizer: O reconhecedor do lexer.
+            - offendingSymbol: O símbolo que causou o erro.
+            - line: O número da linha onde o erro ocorreu.
+            - column: A coluna onde o erro ocorreu.
+            - msg: A mensagem de erro.
+            - e: A exceção relacionada ao erro.
+        """
+        errText = recognizer._input.getText(recognizer._tokenStartCharIndex, recognizer._input.index)
+        errText = recognizer.getErrorDisplay(errText)
+        if(len(errText) <= 1):
+            self.outfile.write("Linha " + str(line) + ": " + errText + " - simbolo nao identificado\n")
+        elif('{' in errText or '}' in errText):
+            self.outfile.write("Linha " + str(line) + ": comentario nao fechado\n")
+        elif('"' in errText):
+            self.outfile.write("Linha " + str(line) + ": cadeia literal nao fechada\n")
+        if self.fim:
+            self.outfile.write("Fim da compilacao\n")
+        raise AnaliseInterrompida()
+    
+    
+class ParserErrorListener(ErrorListener):
+    def __init__(self, outfile):
+        super().__init__()
+        self.outfile = outfile
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        ttext = offendingSymbol.text
+        if ttext == "<EOF>":
+            ttext = "EOF"
+        self.outfile.write("Linha " + str(line) + ": erro sintatico proximo a " + ttext + '\n')
+        self.outfile.write("Fim da compilacao\n")
+        raise AnaliseInterrompida()
+    
+class Visitor(LAVisitor):
+    """
+    Análise semântica. As declarações são percorridas pelo próprio Visitor;
+    os comandos são percorridos pelo Generator, que chama as verificações de
+    cada comando e rebaixa as expressões com um RebaixadorVerificado, de modo
+    que a árvore inteira é visitada uma única vez.
+    """
+    def __init__(self, outfile):
+        super().__init__()
+        self.tabela = TabelaDeSimbolos()
+        self.outfile = outfile
+        self.identificadorparcela = None
+        self.tipoparcela = None
+        self.formaparcela = None
+        self.rebaixador = RebaixadorVerificado(self)
+
+    def abrirSubrotina(self, ctx:LAParser.Declaracao_globalContext):
+        """
+        Declara a função ou o procedimento e abre o escopo dos seus
+        parâmetros, onde ficam também as declarações locais até
+        `fecharSubrotina`. Retorna o símbolo da subrotina.
+        """
+        if ctx.tipo_estendido():
+            funcao = Simbolo(ctx.IDENT().getText(), FUNCAO, self.resolveTipoEstendido(ctx.tipo_estendido()))
+        else:
+            funcao = Simbolo(ctx.IDENT().getText(), PROCEDIMENTO)
+            self.verificarRetornes(ctx.cmd())
+        self.tabela.declarar(funcao)
+        # Parâmetros e declarações locais ficam num escopo próprio, guardado no símbolo da função
+        self.tabela.abrirEscopo()
+        self.visitParametros(ctx.parametros(), funcao)
+        return funcao
+
+    def fecharSubrotina(self, funcao):
+        funcao.escopo = self.tabela.fecharEscopo()
+
+    def visitParametros(self, ctx:LAParser.ParametrosContext, funcao = None):
+        if funcao:
+            funcao.parametros = []
+            if ctx is None:
+                return
+            for parametro in ctx.parametro():
+                tipo = self.resolveTipoEstendido(parametro.tipo_estendido())
+                for identificador in parametro.identificador():
+                    funcao.parametros.append(self.tabela.declarar(Simbolo(identificador.IDENT(0).getText(), PARAMETRO, tipo)))
+        return self.visitChildren(ctx)
+
+    def verificarRetornes(self, comandos):
+        """Acusa os `retorne` com valor entre os comandos de um bloco que não é de função."""
+        for comando in comandos:
+            if comando.cmdRetorne():
+                if comando.cmdRetorne().expressao():
+                    self.outfile.write("Linha " + str(comando.start.line) + ": comando retorne nao permitido nesse escopo\n")
+
+    def declarar(self, identificador, simbolo):
+        """
+        Declara o símbolo no escopo atual, acusando identificador já declarado
+        anteriormente no mesmo escopo.
+        """
+        if self.tabela.declaradoNoEscopo(simbolo.nome):
+            self.outfile.write("Linha " + str(identificador.start.line) + ": identificador " + identificador.getText() +" ja declarado anteriormente\n")
+            return False
+        self.tabela.declarar(simbolo)
+        return True
+
+    def visitVariavel(self, ctx:LAParser.VariavelContext):
+        tipo = self.resolveTipo(ctx.tipo())
+        for identificador in ctx.identificador():
+            tipoVariavel = tipo
+            if identificador.dimensao().exp_aritmetica():
+                tipoVariavel = vetor(tipo, self.resolveDimensoes(identificador.dimensao()))
+            self.declarar(identificador, Simbolo(identificador.IDENT(0).getText(), VARIAVEL, tipoVariavel))
+        return self.visitChildren(ctx)
+
+    def resolveTipo(self, ctx:LAParser.TipoContext, nome = None):
+        """
+        Tipo canônico de uma declaração `tipo`. Registros viram um Registro com
+        os tipos de cada campo; `nome` é o nome do `tipo` que o declara, se houver.
+        """
+        if ctx.tipo_estendido() is None and ctx.registro() is None:
+            # Declaração incompleta (erro sintático já recuperado pelo parser)
+            return basico(ctx.getText())
+        if ctx.registro():
+            campos = {}
+            for variavel in ctx.registro().variavel():
+                tipoCampo = self.resolveTipo(variavel.tipo())
+                for identificador in variavel.identificador():
+                    if identificador.dimensao().exp_aritmetica():
+                        campos[identificador.IDENT(0).getText()] = vetor(tipoCampo, self.resolveDimensoes(identificador.dimensao()))
+                    else:
+                        campos[identificador.IDENT(0).getText()] = tipoCampo
+            return registro(campos, nome)
+        return self.resolveTipoEstendido(ctx.tipo_estendido())
+
+    def resolveTipoEstendido(self, ctx:LAParser.Tipo_estendidoContext):
+        nome = ctx.tipo_basico_ident().getText()
+        tipo = self.tabela.tipoNomeado(nome) or basico(nome)
+        if ctx.POINTER():
+            tipo = ponteiro(tipo)
+        return tipo
+
+    def resolveDimensoes(self, ctx:LAParser.DimensaoContext):
+        """
+        Resolve os limites de cada dimensão de um vetor: números e constantes
+        numéricas viram int; qualquer outra expressão fica como texto.
+        """
+        dimensoes = []
+        for expressao in ctx.exp_aritmetica():
+            limite = expressao.getText()
+            constante = self.tabela.buscar(limite)
+            if constante is not None and constante.categoria == CONSTANTE and constante.valor.isnumeric():
+                limite = constante.valor
+            dimensoes.append(int(limite) if limite.isnumeric() else limite)
+        return tuple(dimensoes)
+
+    def resolveReferencia(self, ctx:LAParser.IdentificadorContext):
+        """
+        Tipo denotado por um identificador, descendo pelos campos de registro e
+        pelo índice de vetor. Retorna None se ele não estiver declarado; campos
+        e índices só se aplicam a variáveis, não a constantes.
+        """
+        nomes = ctx.IDENT()
+        simbolo = self.tabela.buscar(nomes[0].getText())
+        if simbolo is None:
+            return None
+        indexado = bool(ctx.dimensao().exp_aritmetica())
+        if simbolo.categoria == CONSTANTE and len(nomes) == 1 and not indexado:
+            return simbolo.tipo
+        if simbolo.categoria not in (VARIAVEL, PARAMETRO):
+            return None
+        tipo = simbolo.tipo
+        for campo in nomes[1:]:
+            if not isinstance(tipo, Registro) or campo.getText() not in tipo.campos:
+                return None
+            tipo = tipo.campos[campo.getText()]
+        if indexado and isinstance(tipo, Vetor):
+            return tipo.elemento
+        return tipo
+
+    def visitRegistro(self, ctx:LAParser.RegistroContext):
+        # Os campos já fazem parte do tipo; aqui só são verificados os seus tipos e dimensões
+        for variavel in ctx.variavel():
+            self.visitChildren(variavel)
+
+    def visitTipo_estendido(self, ctx:LAParser.Tipo_estendidoContext):
+        if self.tabela.tipoNomeado(ctx.tipo_basico_ident().getText()) is None:
+            self.outfile.write("Linha " + str(ctx.tipo_basico_ident().start.line) + ": tipo " + ctx.tipo_basico_ident().getText() +" nao declarado\n")
+        return self.visitChildren(ctx)
+    
+    def visitDeclaracao_local(self, ctx:LAParser.Declaracao_localContext):
+        if ctx.tipo() and ctx.tipo().registro():
+            nome = ctx.IDENT().getText()
+            self.declarar(ctx, Simbolo(nome, TIPO, self.resolveTipo(ctx.tipo(), nome)))
+            return self.visitRegistro(ctx.tipo().registro())
+        if ctx.valor_constante():
+            self.declarar(ctx, Simbolo(ctx.IDENT().getText(), CONSTANTE, BASICOS[ctx.tipo_basico().getText()], ctx.valor_constante().getText()))
+        elif ctx.tipo():
+            self.declarar(ctx, Simbolo(ctx.IDENT().getText(), TIPO, self.resolveTipo(ctx.tipo())))
+        return self.visitChildren(ctx)
+
+    def findIdentificador(self, identificador, ctx):
+        if self.resolveReferencia(identificador) is None:
+            self.outfile.write("Linha " + str(ctx.start.line) + ": identificador " + identificador.getText() +" nao declarado\n")
+            return False
+        return True
+    
+    def visitExp_aritmetica(self, ctx:LAParser.Exp_aritmeticaContext):
+        # Nas declarações, expressões só aparecem nas dimensões: são verificadas pelo mesmo rebaixamento dos comandos
+        self.rebaixador.rebaixar(ctx)
+
+    def verificarLeia(self, ctx:LAParser.CmdLeiaContext):
+        for identificador in ctx.identificador():
+            self.findIdentificador(identificador, ctx)
+        for identificador in ctx.identificador():
+            self.rebaixador.referencia(identificador)
+
+    def atribuicaoIncompativel(self, ctx):
+        self.outfile.write("Linha " + str(ctx.start.line) + ": atribuicao nao compativel para " + self.identificadorparcela + "\n")
+
+    def verificarParcelaUnario(self, ctx:LAParser.Parcela_unarioContext):
+        if self.identificadorparcela is not None:
+            alvo = self.tipoparcela
+            if self.formaparcela == "campo":
+                if ctx.NUM_INT() is not None and alvo not in (INTEIRO, REAL):
+                    self.atribuicaoIncompativel(ctx)
+                elif ctx.NUM_REAL() is not None and alvo not in (REAL, INTEIRO):
+                    self.atribuicaoIncompativel(ctx)
+            elif self.formaparcela == "vetor":
+                if ctx.NUM_INT() is not None and alvo not in (INTEIRO, REAL):
+                    self.atribuicaoIncompativel(ctx)
+            elif ctx.identificador() and ctx.identificador().dimensao().exp_aritmetica():
+                tipoVetor = self.resolveReferencia(ctx.identificador())
+                if tipoVetor is not None and alvo not in (tipoVetor, LOGICO):
+                    if tipoVetor in (INTEIRO, REAL) and alvo.semPonteiro() not in (INTEIRO, REAL):
+                        self.atribuicaoIncompativel(ctx)
+            else:
+                if ctx.NUM_INT() is not None and alvo not in (INTEIRO, REAL, ponteiro(INTEIRO), ponteiro(REAL)):
+                    self.atribuicaoIncompativel(ctx)
+                elif ctx.NUM_REAL() is not None and alvo not in (REAL, INTEIRO):
+                    self.atribuicaoIncompativel(ctx)
+                elif ctx.identificador() is not None:
+                    origem = self.resolveReferencia(ctx.identificador())
+                    if origem is not None and alvo not in (origem, LOGICO):
+                        if origem in (INTEIRO, REAL) and alvo.semPonteiro() not in (INTEIRO, REAL):
+                            self.atribuicaoIncompativel(ctx)
+        if ctx.identificador():
+            self.findIdentificador(ctx.identificador(), ctx)
+        
+        if ctx.IDENT():
+            funcao = self.tabela.buscar(ctx.IDENT().getText())
+            if funcao is not None and funcao.parametros is not None:
+                if len(funcao.parametros) != len(ctx.expressao()):
+                    self.outfile.write("Linha " + str(ctx.start.line) + ": incompatibilidade de parametros na chamada de " + str(ctx.IDENT()) + "\n")
+                else:
+                    for parametro, ex in zip(funcao.parametros, ctx.expressao()):
+                        # Só um argumento de um único token pode ser o nome de uma variável
+                        argumento = self.tabela.variavel(ex.start.text) if ex.start is ex.stop else None
+                        if argumento is not None and argumento.tipo is not parametro.tipo:
+                            self.outfile.write("Linha " + str(ctx.start.line) + ": incompatibilidade de parametros na chamada de " + str(ctx.IDENT()) + "\n")
+
+    def verificarParcelaNaoUnario(self, ctx:LAParser.Parcela_nao_unarioContext):
+        if self.identificadorparcela is not None:
+            alvo = self.tipoparcela
+            if self.formaparcela in ("campo", "vetor"):
+                if ctx.CADEIA() is not None and alvo is not LITERAL:
+                    self.atribuicaoIncompativel(ctx)
+            else:
+                if ctx.CADEIA() is not None and alvo is not LITERAL:
+                    self.atribuicaoIncompativel(ctx)
+                elif ctx.identificador() is not None:
+                    origem = self.resolveReferencia(ctx.identificador())
+                    if origem is not None and alvo.semPonteiro() not in (origem, LOGICO):
+                        self.atribuicaoIncompativel(ctx)
+        if ctx.identificador():
+            self.findIdentificador(ctx.identificador(), ctx)
+
+    def verificarParcelaLogica(self, ctx:LAParser.Parcela_logicaContext):
+        if ctx.exp_relacional() is None and self.identificadorparcela is not None:
+            self.atribuicaoIncompativel(ctx)
+
+    def abrirAtribuicao(self, ctx:LAParser.CmdAtribuicaoContext):
+        """
+        Verifica o alvo da atribuição e o fixa como referência para as parcelas
+        do valor, até `fecharAtribuicao`. Retorna False (e o valor não deve ser
+        verificado) se o alvo não estiver declarado.
+        """
+        if ctx.identificador():
+            if not self.findIdentificador(ctx.identificador(), ctx):
+                return False
+        identificador = ctx.identificador()
+        self.identificadorparcela = identificador.getText()
+        if ctx.POINTER():
+            self.identificadorparcela = "^" + identificador.getText()
+        # Campos e elementos de vetor são comparados pelo tipo do campo/elemento;
+        # nomes simples, pelo tipo declarado (ponteiros inclusos)
+        if len(identificador.IDENT()) > 1:
+            self.formaparcela = "campo"
+            self.tipoparcela = self.resolveReferencia(identificador)
+        elif identificador.dimensao().exp_aritmetica():
+            self.formaparcela = "vetor"
+            self.tipoparcela = self.resolveReferencia(identificador)
+        else:
+            self.formaparcela = None
+            self.tipoparcela = self.tabela.buscar(identificador.IDENT(0).getText()).tipo
+        return True
+
+    def fecharAtribuicao(self):
+        self.identificadorparcela = None
+
+
+class RebaixadorVerificado(Rebaixador):
+    """
+    Rebaixador que faz as verificações semânticas de cada parcela no mesmo
+    percurso em que monta a representação intermediária, na mesma ordem em
+    que o Visitor as faria visitando a expressão.
+    """
+    def __init__(self, visitor):
+        super().__init__(visitor.resolveReferencia, visitor.tabela.buscar)
+        self.visitor = visitor
+
+    def parcelaLogica(self, ctx:LAParser.Parcela_logicaContext, pendentes, valores):
+        self.visitor.verificarParcelaLogica(ctx)
+        return super().parcelaLogica(ctx, pendentes, valores)
+
+    def parcelaUnario(self, ctx:LAParser.Parcela_unarioContext, pendentes, valores):
+        visitor = self.visitor
+        visitor.verificarParcelaUnario(ctx)
+        if ctx.IDENT():
+            # Os argumentos da chamada não são o valor atribuído: não são comparados com o alvo.
+            # O alvo volta depois da montagem da chamada, que fica abaixo na pilha
+            pendentes.append((self.restaurarAlvo, visitor.identificadorparcela))
+            visitor.identificadorparcela = None
+        return super().parcelaUnario(ctx, pendentes, valores)
+
+    def restaurarAlvo(self, identificadorparcela, pendentes, valores):
+        self.visitor.identificadorparcela = identificadorparcela
+
+    def parcelaNaoUnario(self, ctx:LAParser.Parcela_nao_unarioContext, pendentes, valores):
+        self.visitor.verificarParcelaNaoUnario(ctx)
+        return super().parcelaNaoUnario(ctx, pendentes, valores)
+
+
+class Generator(LAVisitor):
+    """
+    Percorre a árvore uma única vez, fazendo a análise semântica (pelo
+    Visitor) e gerando o código C ao mesmo tempo. O código só é aproveitado
+    se a análise não produzir nenhum diagnóstico; a partir do primeiro, as
+    declarações deixam de ser traduzidas, e uma falha ao traduzi-las só é
+    relançada no fim, se a análise terminar sem diagnósticos.
+
+    Com `otimizacao` 1, as expressões passam pelo Otimizador antes de serem
+    emitidas, os limites invariantes dos `para` são calculados uma só vez e os
+    comandos que nunca executam não são emitidos (mas continuam verificados).
+
+    Com `esRapida`, o programa traz o prelúdio de E/S (preludio.py): `leia`
+    usa as suas funções em vez de scanf e gets, e um `escreva` só de texto
+    vira um fputs.
+
+    Com `gerarCodigo` False só a análise semântica importa (etapa
+    "semantico"): as declarações e as subrotinas, cujos comandos não são
+    verificados, não são traduzidas, e as expressões do corpo são rebaixadas
+    (o que as verifica) mas não convertidas em C; o que os comandos ainda
+    escrevem no emissor é descartado.
+    """
+    def __init__(self, visitor: Visitor, emissor, otimizacao=0, esRapida=False, gerarCodigo=True):
+        self.visitor = visitor
+        self.gerarCodigo = gerarCodigo
+        self.emissor = emissor
+        # Os comandos das subrotinas são só traduzidos, sem verificação
+        self.verificando = True
+        self.rebaixador = visitor.rebaixador
+        self.rebaixadorSimples = Rebaixador(visitor.resolveReferencia, visitor.tabela.buscar)
+        self.casos = 0
+        self.limites = 0
+        self.falha = None
+        self.otimizador = Otimizador(visitor.tabela.buscar) if otimizacao else None
+        self.esRapida = esRapida
+
+    @property
+    def gerando(self):
+        return self.gerarCodigo and self.falha is None and self.visitor.outfile.vazio()
+
+    def emitir(self, traducao, *args):
+        """Executa `traducao(*args)` se ainda vale a pena gerar código, guardando a falha em vez de interromper a análise."""
+        if not self.gerando:
+            return
+        try:
+            traducao(*args)
+        except Exception as erro:
+            self.falha = erro
+
+    def handle(self, tree, medidas=SEM_MEDIDAS):
+        """
+        Analisa e traduz a árvore. O código C fica retido no emissor até o fim
+        do percurso: se houve diagnósticos, ele é descartado e só eles são
+        emitidos; se a tradução falhar, nada é emitido.
+        """
+        nivel = self.emissor.nivel
+        with self.emissor.retido():
+            try:
+                with medidas.fase("generator"):
+                    self.visit(tree)
+            except BaseException:
+                self.emissor.descartar()
+                raise
+            if not self.visitor.outfile.vazio():
+                self.emissor.descartar()
+                # Uma tradução interrompida pode ter deixado o recuo pela metade
+                self.emissor.nivel = nivel
+                self.emissor.write(self.visitor.outfile.valor())
+                self.emissor.write("Fim da compilacao\n")
+            elif self.falha is not None:
+                self.emissor.descartar()
+                raise self.falha
+    
+    def visitPrograma(self, ctx: LAParser.ProgramaContext):
+        self.emissor.linha("#include <stdio.h>")
+        self.emissor.linha("#include <stdlib.h>")
+        if self.esRapida:
+            for cabecalho in preludio.INCLUDES:
+                self.emissor.linha("#include <" + cabecalho + ">")
+            self.emissor.linha()
+            preludio.emitir(self.emissor)
+        self.emissor.linha()
+        self.emissor.linha()
+        if ctx.declaracoes():
+            self.visitDeclaracoes(ctx.declaracoes())
+            self.emissor.linha()
+            self.emissor.linha()
+        self.emissor.linha("int main() {")
+        self.emissor.indentar()
+        if self.esRapida:
+            self.emissor.linha("_la_iniciar();")
+        self.visitCorpo(ctx.corpo())
+        self.emissor.linha("return 0;")
+        self.emissor.desindentar()
+        self.emissor.linha("}")
+    
+    def visitCorpo(self, ctx:LAParser.CorpoContext):
+        self.visitor.verificarRetornes(ctx.cmd())
+        return self.visitChildren(ctx)
+
+    def visitDeclaracao_local(self, ctx:LAParser.Declaracao_localContext):
+        self.visitor.visitDeclaracao_local(ctx)
+        self.emitir(self.traduzDeclaracao, ctx)
+
+    def traduzDeclaracao(self, ctx:LAParser.Declaracao_localContext):
+        if ctx.tipo() and ctx.tipo().registro():
+            return self.visitRegistro(ctx.tipo().registro(), ctx.IDENT().getText(), True)
+        if ctx.valor_constante():
+            self.emissor.linha("#define " + ctx.IDENT().getText() + " " + ctx.valor_constante().getText())
+        elif ctx.variavel():
+            self.visitVariavel(ctx.variavel())
+
+    def visitDeclaracao_global(self, ctx:LAParser.Declaracao_globalContext):
+        funcao = self.visitor.abrirSubrotina(ctx)
+        self.emitir(self.traduzCabecalho, ctx, funcao)
+        self.emissor.indentar()
+        for declaration in ctx.declaracao_local():
+                self.visitDeclaracao_local(declaration)
+        self.emitir(self.traduzComandos, ctx.cmd())
+        self.visitor.fecharSubrotina(funcao)
+        self.emissor.desindentar()
+        self.emissor.linha("}")
+
+    def traduzComandos(self, comandos):
+        # Os comandos das subrotinas não passam pela análise semântica: só são traduzidos
+        self.verificando, self.rebaixador = False, self.rebaixadorSimples
+        try:
+            for comando in comandos:
+                self.visitCmd(comando)
+        finally:
+            self.verificando, self.rebaixador = True, self.visitor.rebaixador
+
+    def traduzCabecalho(self, ctx:LAParser.Declaracao_globalContext, funcao):
+        if ctx.start.text == "procedimento":
+            self.emissor.write(f"void {ctx.IDENT().getText()} (")
+        elif ctx.start.text == "funcao":
+            tipo = self.converteTipo(funcao.tipo)
+            self.emissor.write(f"{tipo} {ctx.IDENT().getText()} (")
+
+        for i, param in enumerate(funcao.parametros):
+            if i > 0:
+                self.emissor.write(" , ")
+            if param.tipo is LITERAL:
+                self.emissor.write(f"{self.converteTipo(param.tipo)}* {param.nome}")
+            else:
+                self.emissor.write(f"{self.converteTipo(param.tipo)} {param.nome}")
+        self.emissor.linha(") {")
+
+    def visitVariavel(self, ctx:LAParser.VariavelContext):
+        for identificador in ctx.identificador():
+            if ctx.tipo().getText() == "literal":
+                self.emissor.linha(self.converteTipo(LITERAL) + " " + identificador.getText() + "[" + str(TAMANHO_LITERAL) + "];")
+            elif ctx.tipo().registro():
+                self.emissor.linha("struct {")
+                self.visitRegistro(ctx.tipo().registro(), identificador.getText())
+            else:
+                self.emissor.linha(self.converteTipo(self.visitor.resolveTipo(ctx.tipo())) + " " + identificador.getText() + ";")
+    
+    def visitRegistro(self, ctx:LAParser.RegistroContext, identificador = None, tipo = False):
+        if identificador and not tipo:
+            self.emissor.indentar()
+            for variavel in ctx.variavel():
+                self.visitVariavel(variavel)
+            self.emissor.desindentar()
+            self.emissor.linha("} " + identificador + ";")
+        if tipo:
+            self.emissor.linha("typedef struct {")
+            self.emissor.indentar()
+            for variavel in ctx.variavel():
+                self.visitVariavel(variavel)
+            self.emissor.desindentar()
+            self.emissor.linha("} " + identificador + ";")
+
+    def visitCmd(self, ctx:LAParser.CmdContext):
+        # Um cmd tem um só filho, o comando: ele é visitado direto, sem o visitChildren no meio
+        if ctx.getChildCount() == 1:
+            return ctx.getChild(0).accept(self)
+        return self.visitChildren(ctx)
+        
+    def visitCmdRetorne(self, ctx:LAParser.CmdRetorneContext):
+        self.emissor.linha("return " + self.convertExpressao(ctx.expressao()) + ";")
+        
+    def visitCmdChamada(self, ctx:LAParser.CmdChamadaContext):
+        argumentos = [self.convertExpressao(expressao) for expressao in ctx.expressao()]
+        self.emissor.linha(ctx.IDENT().getText() + "(" + ", ".join(argumentos) + ");")
+
+    @contextlib.contextmanager
+    def descartando(self):
+        """O que for emitido dentro do bloco vai para um emissor à parte e é descartado."""
+        emissor = self.emissor
+        self.emissor = Emissor()
+        try:
+            yield
+        finally:
+            self.emissor = emissor
+
+    def visitMorto(self, comandos):
+        """Comandos que nunca executam: só são percorridos para a análise semântica."""
+        if self.verificando:
+            with self.descartando():
+                for cmd in comandos:
+                    self.visitCmd(cmd)
+
+    def visitCmdLeia(self, ctx:LAParser.CmdLeiaContext):
+        if self.verificando:
+            self.visitor.verificarLeia(ctx)
+        for identificador in ctx.identificador():
+            tipo = self.visitor.resolveReferencia(identificador)
+            if self.esRapida:
+                if tipo is LITERAL:
+                    self.emissor.linha("_la_leiaLinha(" + identificador.getText() + ", " + str(TAMANHO_LITERAL) + ");")
+                else:
+                    leitura = "_la_leiaReal" if tipo is REAL else "_la_leiaInteiro"
+                    self.emissor.linha(leitura + "(&" + identificador.getText() + ");")
+            elif tipo is not LITERAL:
+                self.emissor.linha("scanf(\"" + formato(tipo) + "\", &" + identificador.getText() + ");")
+            else:
+                self.emissor.linha("gets(" + identificador.getText() + ");")
+    
+    def visitCmdAtribuicao(self, ctx:LAParser.CmdAtribuicaoContext):
+        if self.verificando:
+            if not self.visitor.abrirAtribuicao(ctx):
+                return
+            valor = self.convertExpressao(ctx.expressao())
+            self.visitor.fecharAtribuicao()
+        else:
+            valor = self.convertExpressao(ctx.expressao())
+        alvo = self.rebaixador.referencia(ctx.identificador())
+        if self.otimizador:
+            alvo = self.otimizador.indices(alvo)
+        if ctx.POINTER():
+            self.emissor.linha("*" + self.paraC(alvo) + " = " + valor + ";")
+        elif alvo.tipo is LITERAL:
+            self.emissor.linha("strcpy(" + self.paraC(alvo) + ", " + valor + ");")
+        else:
+            self.emissor.linha(self.paraC(alvo) + " = " + valor + ";")
+
+    def visitBloco(self, comandos):
+        """Emite uma lista de comandos um nível de recuo abaixo do atual."""
+        self.emissor.indentar()
+        for cmd in comandos:
+            self.visitCmd(cmd)
+        self.emissor.desindentar()
+    
+    def visitCmdSe(self, ctx:LAParser.CmdSeContext):
+        condicao = self.rebaixar(ctx.expressao())
+        valor = valorDe(condicao) if self.otimizador else None
+        if valor is not None:
+            # Só o ramo escolhido é emitido, sem o if
+            for comandos, escolhido in ((ctx.cmd1, bool(valor)), (ctx.cmd2, not valor)):
+                if escolhido:
+                    for cmd in comandos:
+                        self.visitCmd(cmd)
+                else:
+                    self.visitMorto(comandos)
+            return
+        self.emissor.linha("if(" + self.paraC(condicao) + ") {")
+        self.visitBloco(ctx.cmd1)
+        self.emissor.linha("}")
+        if ctx.getToken(SENAO, 0) is not None:
+            self.emissor.linha("else {")
+            self.visitBloco(ctx.cmd2)
+            self.emissor.linha("}")
+    
+    def visitCmdCaso(self, ctx:LAParser.CmdCasoContext):
+        selecoes = [(intervalosDe(selecao.constantes()), selecao.cmd()) for selecao in ctx.selecao().item_selecao()]
+        if self.otimizador:
+            seletor = valorDe(self.rebaixar(ctx.exp_aritmetica()))
+            if isinstance(seletor, int):
+                return self.casoConstante(ctx, selecoes, seletor)
+        if sobrepostos([intervalo for intervalos, _ in selecoes for intervalo in intervalos]):
+            # Valores repetidos não cabem num switch: vale a primeira seleção que contém o valor
+            return self.casoEncadeado(ctx, selecoes)
+        self.emissor.linha("switch(" + self.convertExpressao(ctx.exp_aritmetica()) + ") {")
+        for intervalos, comandos in selecoes:
+            for comeco, fim in intervalos:
+                if fim - comeco < LIMITE_CASOS_DENSOS:
+                    for i in range(comeco, fim + 1):
+                        self.emissor.linha(f"case {i}:")
+                else:
+                    self.emissor.linha(f"case {comeco} ... {fim}:")
+            self.emissor.indentar()
+            for cmd in comandos:
+                self.visitCmd(cmd)
+            self.emissor.linha("break;")
+            self.emissor.desindentar()
+        if ctx.cmd():
+            self.emissor.linha("default:")
+            self.visitBloco(ctx.cmd())
+        self.emissor.linha("}")
+
+    def casoConstante(self, ctx:LAParser.CmdCasoContext, selecoes, seletor):
+        """Caso com seletor constante: só os comandos da primeira seleção que o contém (ou os do senao) são emitidos."""
+        escolhido = False
+        for intervalos, comandos in selecoes:
+            if not escolhido and any(comeco <= seletor <= fim for comeco, fim in intervalos):
+                escolhido = True
+                for cmd in comandos:
+                    self.visitCmd(cmd)
+            else:
+                self.visitMorto(comandos)
+        if escolhido:
+            self.visitMorto(ctx.cmd())
+        else:
+            for cmd in ctx.cmd():
+                self.visitCmd(cmd)
+
+    def casoEncadeado(self, ctx:LAParser.CmdCasoContext, selecoes):
+        """Caso como uma cadeia if/else em ordem, avaliando o seletor uma única vez."""
+        self.casos += 1
+        seletor = "_caso" + str(self.casos)
+        self.emissor.linha("{")
+        self.emissor.indentar()
+        self.emissor.linha("int " + seletor + " = " + self.convertExpressao(ctx.exp_aritmetica()) + ";")
+        senao = ""
+        for intervalos, comandos in selecoes:
+            if not intervalos:
+                continue
+            condicoes = []
+            for comeco, fim in intervalos:
+                if comeco == fim:
+                    condicoes.append(f"{seletor} == {comeco}")
+                else:
+                    condicoes.append(f"{seletor} >= {comeco} && {seletor} <= {fim}")
+            if len(condicoes) > 1:
+                condicoes = ["(" + condicao + ")" if "&&" in condicao else condicao for condicao in condicoes]
+            self.emissor.linha(senao + "if(" + " || ".join(condicoes) + ") {")
+            self.visitBloco(comandos)
+            self.emissor.linha("}")
+            senao = "else "
+        if ctx.cmd():
+            self.emissor.linha(senao + "{")
+            self.visitBloco(ctx.cmd())
+            self.emissor.linha("}")
+        self.emissor.desindentar()
+        self.emissor.linha("}")
+
+    def rebaixar(self, ctx):
+        """Representação intermediária de um contexto expressao ou exp_aritmetica, já otimizada com -O1."""
+        no = self.rebaixador.rebaixar(ctx)
+        if self.otimizador:
+            return self.otimizador.simplificar(no)
+        return no
+
+    def paraC(self, no):
+        """Código C de um nó da representação intermediária; vazio quando o código não é gerado."""
+        return no.paraC() if self.gerarCodigo else ""
+
+    def convertExpressao(self, ctx):
+        """Código C de um contexto expressao ou exp_aritmetica, via a representação intermediária."""
+        return self.paraC(self.rebaixar(ctx))
+
+    def visitCmdPara(self, ctx:LAParser.CmdParaContext):
+        ident = ctx.IDENT().getText()
+        inicio = self.rebaixar(ctx.exp_aritmetica1)
+        limite = self.rebaixar(ctx.exp_aritmetica2)
+        if self.otimizador:
+            comeco, fim = valorDe(inicio), valorDe(limite)
+            if comeco is not None and fim is not None and comeco > fim:
+                # O laço nunca executa: resta a atribuição inicial da variável
+                self.emissor.linha(ident + " = " + self.paraC(inicio) + ";")
+                return self.visitMorto(ctx.cmd())
+            if (fim is None and limite.tipo in (INTEIRO, REAL) and not (isinstance(limite, Referencia) and not limite.indices)
+                    and invariante(limite, ctx.cmd(), ident)):
+                # Limite calculado uma vez, depois do valor inicial, como na ordem de avaliação do for
+                self.limites += 1
+                variavel = "_limite" + str(self.limites)
+                self.emissor.linha("{")
+                self.emissor.indentar()
+                self.emissor.linha(self.converteTipo(limite.tipo) + " " + variavel + ";")
+                self.emissor.linha("for(" + ident + "=" + self.paraC(inicio) + ", " + variavel + "=" + self.paraC(limite) + "; " + ident + "<=" + variavel + "; " + ident + "++) {")
+                self.visitBloco(ctx.cmd())
+                self.emissor.linha("}")
+                self.emissor.desindentar()
+                self.emissor.linha("}")
+                return
+        self.emissor.linha("for(" + ident + "=" + self.paraC(inicio) + "; " + ident + "<=" + self.paraC(limite) + "; " + ident + "++) {")
+        self.visitBloco(ctx.cmd())
+        self.emissor.linha("}")
+
+    def visitCmdEnquanto(self, ctx:LAParser.CmdEnquantoContext):
+        condicao = self.rebaixar(ctx.expressao())
+        if self.otimizador and valorDe(condicao) == 0:
+            return self.visitMorto(ctx.cmd())
+        self.emissor.linha("while(" + self.paraC(condicao) + ") {")
+        self.visitBloco(ctx.cmd())
+        self.emissor.linha("}")
+
+    def visitCmdFaca(self, ctx:LAParser.CmdFacaContext):
+        if not self.otimizador:
+            self.emissor.linha("do {")
+            self.visitBloco(ctx.cmd())
+            self.emissor.linha("} while (" + self.convertExpressao(ctx.expressao()) + ");")
+            return
+        # A condição só é conhecida depois do corpo; se for falsa, o corpo executa uma vez, fora de laço
+        with self.descartando():
+            for cmd in ctx.cmd():
+                self.visitCmd(cmd)
+            corpo = self.emissor.valor()
+        condicao = self.rebaixar(ctx.expressao())
+        if valorDe(condicao) == 0:
+            for linha in corpo.splitlines():
+                self.emissor.linha(linha)
+            return
+        self.emissor.linha("do {")
+        self.emissor.indentar()
+        for linha in corpo.splitlines():
+            self.emissor.linha(linha)
+        self.emissor.desindentar()
+        self.emissor.linha("} while (" + self.paraC(condicao) + ");")
+    
+    def visitCmdEscreva(self, ctx:LAParser.CmdEscrevaContext):
+        # Cadeias entram direto no formato; os demais valores pelo especificador do seu tipo
+        especificacao = ""
+        argumentos = []
+        for expressao in ctx.expressao():
+            no = self.rebaixar(expressao)
+            if isinstance(no, Constante) and no.tipo is LITERAL:
+                especificacao += no.texto[1:-1].replace("%", "%%")
+            elif self.otimizador and no.tipo in (INTEIRO, LOGICO) and valorDe(no) is not None:
+                # Inteiros conhecidos entram no formato já escritos, como o %d os imprimiria
+                especificacao += str(valorDe(no))
+            else:
+                especificacao += formato(no.tipo)
+                argumentos.append(self.paraC(no))
+        if self.esRapida and not argumentos:
+            # Só texto: sem conversões, todo % do formato veio do escape dos literais
+            self.emissor.linha("fputs(\"" + especificacao.replace("%%", "%") + "\", stdout);")
+            return
+        self.emissor.linha("printf(" + ", ".join(["\"" + especificacao + "\""] + argumentos) + ");")
+
+    def converteTipo(self, tipoLA):
+        if tipoLA is INTEIRO:
+            tipoC = "int"
+        elif tipoLA is REAL:
+            tipoC = "float"
+        elif tipoLA is LITERAL:
+            tipoC = "char"
+        elif tipoLA is ponteiro(INTEIRO):
+            tipoC = "int*"
+        elif isinstance(tipoLA, Registro) and tipoLA.nome:
+            tipoC = tipoLA.nome
+        return tipoC
+
+
+def analisar(parser, modo="auto", regra="programa", gramatica="fatorada"):
+    """
+    Executa uma regra do LAParser (por padrão a inicial) no modo de predição escolhido.
+
+    Parâmetros:
+        - parser: O LAParser já ligado ao fluxo de tokens.
+        - modo: "sll" ou "ll" forçam o respectivo modo; "auto" tenta primeiro
+          SLL com BailErrorStrategy (sem ouvintes de erro) e, se falhar,
+          reanalisa com LL completo e os ouvintes originais, de modo que as
+          mensagens de erro são as mesmas do LL puro.
+        - regra: Nome do método da regra no LAParser.
+        - gramatica: "fatorada" analisa antes com o LAFatorada, no mesmo fluxo,
+          com BailErrorStrategy e sem ouvintes (em SLL, ou LL no modo "ll"); só
+          se ele encontrar um erro o `parser` analisa como acima, então os
+          diagnósticos são sempre os do LA.g4. "referencia" usa só o `parser`.
+          Sem o LAFatorada gerado, as duas são a de referência.
+
+    Retorna a árvore (do LAFatorada ou do LAParser; arvore.compactar converte
+    as duas na mesma árvore compacta) e o caminho usado ("fatorada", "sll" ou "ll").
+    """
+    if gramatica == "fatorada" and LAFatorada is not None:
+        fatorado = LAFatorada(parser.getTokenStream())
+        fatorado._listeners = []
+        fatorado._errHandler = BailErrorStrategy()
+        fatorado._interp.predictionMode = PredictionMode.LL if modo == "ll" else PredictionMode.SLL
+        try:
+            arvore = getattr(fatorado, regra)()
+        except ParseCancellationException:
+            parser.reset()
+        else:
+            # O `parser` fica como se tivesse analisado sozinho sem erros (modo, ouvintes e estratégia),
+            # porque quem chama pode continuar a usá-lo (o lsp.py, depois de uma regra que não vai até o EOF)
+            parser._interp.predictionMode = PredictionMode.LL if modo == "ll" else PredictionMode.SLL
+            if modo == "auto":
+                parser._listeners = []
+                parser._errHandler = BailErrorStrategy()
+            return arvore, "fatorada"
+    inicial = getattr(parser, regra)
+    if modo == "ll":
+        parser._interp.predictionMode = PredictionMode.LL
+        return inicial(), "ll"
+    parser._interp.predictionMode = PredictionMode.SLL
+    if modo == "sll":
+        return inicial(), "sll"
+
+    ouvintes = parser._listeners
+    parser._listeners = []
+    parser._errHandler = BailErrorStrategy()
+    try:
+        return inicial(), "sll"
+    except ParseCancellationException:
+        parser._listeners = ouvintes
+        parser._errHandler = DefaultErrorStrategy()
+        parser.reset()
+        parser._interp.predictionMode = PredictionMode.LL
+        return inicial(), "ll"
+
+
+@contextlib.contextmanager
+def recursaoAmpliada(limite=LIMITE_RECURSAO):
+    """Eleva o limite de recursão do interpretador dentro do bloco."""
+    anterior = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(anterior, limite))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(anterior)
+
+
+def listarTokens(lexer, saida):
+    """
+    Etapa "lexico": escreve em `saida` os tokens no formato <'texto',nome>,
+    lidos direto do lexer, sem fluxo de tokens nem parser, até o EOF ou o
+    primeiro erro léxico, cuja mensagem encerra a lista.
+
+    Retorna o número de tokens listados.
+    """
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(LexerErrorListener(saida, fim=False))
+    nomes = NOMES_TOKENS
+    quantidade = 0
+    try:
+        token = lexer.nextToken()
+        while token.type != Token.EOF:
+            saida.write("<'" + token.text + "'," + nomes[token.type] + ">\n")
+            quantidade += 1
+            token = lexer.nextToken()
+    except AnaliseInterrompida:
+        pass
+    return quantidade
+
+
+def verificar(lexer, tokens, parser, saida, predicao, medidas, gramatica, etapa):
+    """
+    Etapas "sintatico" e "semantico": escreve em `saida` só os diagnósticos,
+    seguidos de "Fim da compilacao". Os ouvintes de erro são instalados antes
+    da análise e o fluxo não é preenchido de antemão: os tokens são lidos
+    conforme o parser avança, então o primeiro erro do programa, léxico ou
+    sintático, é o relatado, e a análise para nele. Na etapa "semantico" a
+    árvore passa pelo Generator sem gerar código (ver Generator).
+
+    Retorna o caminho de predição usado pelo parser.
+    """
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(LexerErrorListener(saida))
+    parser.removeErrorListeners()
+    parser.addErrorListener(ParserErrorListener(saida))
+    try:
+        with medidas.fase("parser"), recursaoAmpliada():
+            arvore, caminho = analisar(parser, predicao, gramatica=gramatica)
+    except AnaliseInterrompida:
+        # Os erros são relatados pelo LL completo, exceto quando o modo SLL foi forçado
+        return "sll" if predicao == "sll" else "ll"
+    if medidas.ativa:
+        medidas.tokens = len(tokens.tokens)
+    if etapa == "semantico":
+        with medidas.fase("arvore"):
+            arvore = compactar(arvore)
+            tokens.tokens = []
+        visitor = Visitor(Emissor())
+        generator = Generator(visitor, Emissor(), gerarCodigo=False)
+        if medidas.ativa:
+            medidas.contarArvore(arvore, LAParser.ruleNames)
+            medidas.observarVisitas(visitor)
+            medidas.observarVisitas(generator)
+        with medidas.fase("semantico"), recursaoAmpliada():
+            generator.visit(arvore)
+        saida.write(visitor.outfile.valor())
+    saida.write("Fim da compilacao\n")
+    return caminho
+
+
+def executar(input, saida, predicao="auto", medidas=SEM_MEDIDAS, lexer="rapido", otimizacao=0, esRapida=False,
+             gramatica="fatorada", etapa="codigo"):
+    """
+    Executa o pipeline completo (lexer -> LAParser -> Generator, que faz a
+    análise semântica com o Visitor no mesmo percurso) sobre um fluxo de
+    entrada do ANTLR, emitindo o resultado em `saida` (um Emissor). Os
+    diagnósticos semânticos ficam num emissor à parte e o código C só é
+    emitido se não houver nenhum.
+
+    `medidas` (uma instrumentacao.Instrumentacao) recebe as medidas de cada
+    fase, `lexer` escolhe o motor léxico em LEXERS, `otimizacao` (0 ou 1) o
+    nível de otimização do código C, `esRapida` inclui nele o prelúdio de E/S
+    e `gramatica` (em GRAMATICAS) escolhe a gramática do parser (ver analisar).
+
+    `etapa` (em ETAPAS) para o pipeline antes do código C: "lexico" só lista
+    os tokens (listarTokens), "sintatico" e "semantico" só escrevem os
+    diagnósticos até a respectiva análise (verificar).
+
+    Retorna o caminho de predição usado pelo parser ("nenhum" na etapa léxica).
+    """
+    lexer = LEXERS[lexer](input, saida)
+    if etapa == "lexico":
+        with medidas.fase("lexer"):
+            quantidade = listarTokens(lexer, saida)
+        if medidas.ativa:
+            medidas.tokens = quantidade
+        return "nenhum"
+    tokens = FluxoSobDemanda(lexer)
+    # DFA de predição já aquecido pelos casos de teste, se houver (ver aquecimento.py)
+    aquecimento.instalar()
+    parser = LAParser(tokens, saida)
+    aquecimento.observar(parser)
+    if etapa != "codigo":
+        return verificar(lexer, tokens, parser, saida, predicao, medidas, gramatica, etapa)
+    with medidas.fase("lexer"):
+        tokens.fill()
+    with medidas.fase("parser"), recursaoAmpliada():
+        val, caminho = analisar(parser, predicao, gramatica=gramatica)
+    lexer.addErrorListener(LexerErrorListener(saida))
+    parser.addErrorListener(ParserErrorListener(saida))
+    if medidas.ativa:
+        medidas.tokens = len(tokens.tokens)
+    with medidas.fase("arvore"):
+        # A árvore do ANTLR é consumida na conversão. Os tokens também não são mais usados, mas o
+        # parser (que aponta para o fluxo) só seria liberado pelo coletor de ciclos: o fluxo é esvaziado
+        val = compactar(val)
+        tokens.tokens = []
+    visitor = Visitor(Emissor())
+    generator = Generator(visitor, saida, otimizacao, esRapida)
+    if medidas.ativa:
+        medidas.contarArvore(val, LAParser.ruleNames)
+        medidas.observarVisitas(visitor)
+        medidas.observarVisitas(generator)
+    with recursaoAmpliada():
+        generator.handle(val, medidas)
+    return caminho
+
+
+def compilar(input_file, output_file, predicao="auto", medidas=SEM_MEDIDAS, lexer="rapido", otimizacao=0,
+             esRapida=False, gramatica="fatorada", etapa="codigo"):
+    """
+    Compila um arquivo de entrada, escrevendo o resultado no arquivo de saída.
+
+    Parâmetros:
+        - input_file: Caminho do programa LA.
+        - output_file: Caminho do arquivo gerado ("-" para a saída padrão).
+        - predicao: Modo de predição do parser ("auto", "sll" ou "ll").
+        - medidas: Instrumentacao que recebe as medidas de cada fase, se houver.
+        - lexer: Motor léxico ("rapido" ou "antlr").
+        - otimizacao: Nível de otimização do código C (0 ou 1).
+        - esRapida: Inclui no código C o prelúdio de E/S (preludio.py).
+        - gramatica: Gramática do parser ("fatorada" ou "referencia"); a saída é a mesma.
+        - etapa: Até onde a compilação vai ("lexico", "sintatico", "semantico" ou "codigo"; ver executar).
+
+    Retorna o caminho de predição usado pelo parser.
+    """
+    input = FileStream(input_file, encoding='utf-8')
+    saida = emissorPadrao(output_file)
+    try:
+        return executar(input, saida, predicao, medidas, lexer, otimizacao, esRapida, gramatica, etapa)
+    finally:
+        saida.fechar()
+
+
+def compilarTexto(codigo, predicao="auto", lexer="rapido", otimizacao=0, esRapida=False, gramatica="fatorada",
+                  etapa="codigo"):
+    """Compila um programa LA dado como texto e devolve a saída (código C, diagnósticos ou tokens) em memória."""
+    saida = Emissor()
+    executar(InputStream(codigo), saida, predicao, lexer=lexer, otimizacao=otimizacao, esRapida=esRapida,
+             gramatica=gramatica, etapa=etapa)
+    return saida.valor()
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Compilador da linguagem LA")
+    argumentos.add_argument("entrada", nargs="?", help="programa LA de entrada")
+    argumentos.add_argument("saida", nargs="?", help="arquivo de saida (\"-\" para a saida padrao)")
+    argumentos.add_argument("--servidor", action="store_true",
+                            help="mantem o compilador carregado e atende pedidos (entrada, saida) continuamente")
+    argumentos.add_argument("--socket", nargs="?", const="", default=None,
+                            help="atende pelo socket Unix informado (sem caminho: $LA_SOCKET ou la-compilador.sock no diretorio privado "
+                                 "$XDG_RUNTIME_DIR ou <tmp>/la-compilador-<uid>) "
+                                 "em vez da entrada padrao")
+    argumentos.add_argument("--predicao", choices=["auto", "sll", "ll"], default="auto",
+                            help="modo de predicao do parser: SLL com recaida para LL (auto) ou um modo fixo")
+    argumentos.add_argument("--gramatica", choices=GRAMATICAS, default="fatorada",
+                            help="gramatica do parser: fatorada a esquerda (LAFatorada.g4), com recaida para a de "
+                                 "referencia (LA.g4) nos programas com erro sintatico, ou so a de referencia; a saida e "
+                                 "a mesma")
+    argumentos.add_argument("--etapa", choices=ETAPAS, default="codigo",
+                            help="para a compilacao numa etapa: lista dos tokens (lexico), so os erros lexicos e "
+                                 "sintaticos (sintatico), tambem os semanticos (semantico) ou o codigo C (codigo)")
+    argumentos.add_argument("--lexer", choices=sorted(LEXERS), default="rapido",
+                            help="motor da analise lexica: expressao regular compilada (rapido) ou o LALexer gerado (antlr)")
+    argumentos.add_argument("-O", dest="otimizacao", type=int, choices=[0, 1], default=0,
+                            help="-O1 dobra constantes, propaga as declaradas com constante, calcula uma vez os limites "
+                                 "invariantes dos para e elimina comandos que nunca executam")
+    argumentos.add_argument("--es-rapida", action="store_true",
+                            help="inclui no codigo C um preludio de E/S: saida com buffer grande e leitura de numeros e "
+                                 "linhas sem scanf e gets (linhas limitadas ao tamanho do literal); a saida do programa "
+                                 "e a mesma (ver preludio.py)")
+    argumentos.add_argument("--mostrar-predicao", action="store_true",
+                            help="informa na saida de erro qual modo de predicao analisou o programa (\"fatorada\" se "
+                                 "foi a gramatica fatorada, ou \"cache\")")
+    argumentos.add_argument("--sem-cache", action="store_true",
+                            help="ignora o cache de compilacao (diretorio em $LA_CACHE_DIR; ver cache.py)")
+    argumentos.add_argument("--instrumentar", action="store_true",
+                            help="grava tempo, CPU e memoria de cada fase, tokens, nos e visitas em <saida>.medidas.json "
+                                 "(tambem ligado por LA_INSTRUMENTAR=1); implica --sem-cache")
+    args = argumentos.parse_args()
+
+    if args.servidor:
+        import servidor
+        servidor.servir(compilar, servidor.SOCKET_PADRAO if args.socket == "" else args.socket)
+        return
+    if args.entrada is None or args.saida is None:
+        argumentos.error("informe os arquivos de entrada e de saida")
+
+    # Obtém o nome do arquivo de entrada e de saída a partir dos argumentos da linha de comando
+    if args.instrumentar or instrumentacao.ATIVA:
+        medidas = instrumentacao.Instrumentacao()
+        caminho = compilar(args.entrada, args.saida, args.predicao, medidas, args.lexer, args.otimizacao,
+                           args.es_rapida, args.gramatica, args.etapa)
+        medidas.gravar(args.saida)
+    elif args.sem_cache or args.saida == "-":
+        caminho = compilar(args.entrada, args.saida, args.predicao, lexer=args.lexer, otimizacao=args.otimizacao,
+                           esRapida=args.es_rapida, gramatica=args.gramatica, etapa=args.etapa)
+    else:
+        import cache
+        opcoes = ["O%d" % args.otimizacao] if args.otimizacao else []
+        if args.es_rapida:
+            opcoes.append("es-rapida")
+        if args.etapa != "codigo":
+            opcoes.append("etapa-" + args.etapa)
+        cacheCompilacao = cache.Cache()
+        try:
+            caminho = cache.compilarComCache(compilar, cacheCompilacao, args.entrada, args.saida, args.predicao,
+                                             SEM_MEDIDAS, args.lexer, args.otimizacao, args.es_rapida, args.gramatica,
+                                             args.etapa, opcoes=" ".join(opcoes))
+        finally:
+            cacheCompilacao.registrarEstatisticas()
+    if args.mostrar_predicao:
+        sys.stderr.write("predicao: " + caminho + "\n")
+
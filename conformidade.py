@@ -0,0 +1,219 @@
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from compilador import compilarTexto
+from cache import DIRETORIO_PADRAO
+
+# Etapas T1 a T4 comparam só a saída do compilador (diagnósticos); a T5 compila e executa o código C
+ETAPAS = {
+    "t1": "1.casos_teste_t1",
+    "t2": "2.casos_teste_t2",
+    "t3": "3.casos_teste_t3",
+    "t4": "4.casos_teste_t4",
+    "t5": "5.casos_teste_t5",
+}
+# Etapa do compilador (main.py --etapa) que produz a saída esperada de cada etapa dos casos, com --por-etapa
+ETAPA_COMPILADOR = {"t1": "lexico", "t2": "sintatico", "t3": "semantico", "t4": "semantico", "t5": "codigo"}
+GCC_PADRAO = os.environ.get("CC", "gcc")
+BINARIOS_PADRAO = os.path.join(DIRETORIO_PADRAO, "binarios")
+
+
+def coletarCasos(raiz, etapas):
+    """
+    Lista os casos de teste das etapas pedidas, em ordem. Cada caso é um dict
+    com a etapa, o programa LA, a saída esperada e, na T5, a entrada da
+    execução do programa gerado.
+    """
+    casos = []
+    for etapa in etapas:
+        diretorio = os.path.join(raiz, ETAPAS[etapa])
+        if etapa == "t5":
+            for entrada in sorted(glob.glob(os.path.join(diretorio, "1.entrada", "*"))):
+                nome = os.path.basename(entrada)
+                casos.append({"etapa": etapa, "entrada": entrada,
+                              "esperado": os.path.join(diretorio, "4.saida", nome),
+                              "execucao": os.path.join(diretorio, "3.entrada_execucao", nome)})
+        else:
+            for entrada in sorted(glob.glob(os.path.join(diretorio, "entrada", "*"))):
+                casos.append({"etapa": etapa, "entrada": entrada,
+                              "esperado": os.path.join(diretorio, "saida", os.path.basename(entrada))})
+    return casos
+
+
+def construir(codigo, gcc, binarios):
+    """
+    Compila o código C com o gcc, reaproveitando o executável de uma
+    compilação anterior do mesmo código (chave: hash do código e do comando).
+    Retorna (caminho do executável, se veio do cache); lança RuntimeError se
+    o gcc falhar.
+    """
+    comando = [gcc, "-x", "c", "-", "-w"]
+    resumo = hashlib.sha256("\0".join(comando).encode("utf-8") + b"\0")
+    resumo.update(codigo.encode("utf-8"))
+    binario = os.path.join(binarios, resumo.hexdigest())
+    if os.path.exists(binario):
+        return binario, True
+    os.makedirs(binarios, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=binarios, suffix=".tmp")
+    os.close(descritor)
+    try:
+        resultado = subprocess.run(comando + ["-o", temporario], input=codigo.encode("utf-8"), capture_output=True)
+        if resultado.returncode != 0:
+            mensagens = resultado.stderr.decode("utf-8", "replace").strip().splitlines()
+            raise RuntimeError("gcc: " + (mensagens[0] if mensagens else "codigo %d" % resultado.returncode))
+        # Dois processos podem construir o mesmo executável; a renomeação é atômica
+        os.replace(temporario, binario)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return binario, False
+
+
+def executarNaMaquina(texto, execucao, limite, otimizacao, tempos):
+    """Traduz o programa para a máquina de pilha (maquina.py) e o executa com a entrada do caso; devolve a saída em bytes."""
+    import io
+    from maquina import traduzir, Maquina, ErroCompilacao
+    inicio = time.perf_counter()
+    try:
+        programa = traduzir(texto, otimizacao)
+    except ErroCompilacao as erro:
+        # Programa com diagnósticos: a saída é a do compilador, como no caminho com gcc
+        tempos["compilador"] = time.perf_counter() - inicio
+        return str(erro).encode("utf-8")
+    tempos["compilador"] = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    saida = io.StringIO()
+    with open(execucao, encoding="utf-8") as entrada:
+        Maquina(programa, entrada, saida).rodar(limite)
+    tempos["execucao"] = time.perf_counter() - inicio
+    return saida.getvalue().encode("utf-8")
+
+
+def executarCaso(tarefa):
+    """
+    Executa um caso dentro de um processo do pool. Retorna um dict com o
+    status ("ok", "falha" quando a saída difere da esperada ou "erro" quando
+    o compilador, o gcc ou a execução falham), o motivo, se o executável veio
+    do cache e o tempo de cada passo. Com `naMaquina`, os programas da T5
+    rodam na máquina de pilha em vez de passar pelo gcc; com `esRapida`, o
+    código C traz o prelúdio de E/S (main.py --es-rapida); com `porEtapa`, o
+    compilador para na etapa de ETAPA_COMPILADOR (main.py --etapa).
+    """
+    caso, gcc, binarios, limite, otimizacao, naMaquina, esRapida, porEtapa = tarefa
+    resultado = dict(caso, status="ok", motivo=None, cache=False, tempos={})
+    tempos = resultado["tempos"]
+    try:
+        with open(caso["entrada"], encoding="utf-8") as fonte:
+            texto = fonte.read()
+        with open(caso["esperado"], "rb") as arquivo:
+            esperado = arquivo.read()
+        if caso["etapa"] == "t5" and naMaquina:
+            obtido = executarNaMaquina(texto, caso["execucao"], limite, otimizacao, tempos)
+        else:
+            inicio = time.perf_counter()
+            etapa = ETAPA_COMPILADOR[caso["etapa"]] if porEtapa else "codigo"
+            saida = compilarTexto(texto, otimizacao=otimizacao, esRapida=esRapida, etapa=etapa)
+            tempos["compilador"] = time.perf_counter() - inicio
+            if caso["etapa"] == "t5":
+                inicio = time.perf_counter()
+                binario, resultado["cache"] = construir(saida, gcc, binarios)
+                tempos["gcc"] = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                with open(caso["execucao"], "rb") as entrada:
+                    execucao = subprocess.run([binario], stdin=entrada, capture_output=True, timeout=limite)
+                tempos["execucao"] = time.perf_counter() - inicio
+                obtido = execucao.stdout
+            else:
+                obtido = saida.encode("utf-8")
+        if obtido != esperado:
+            resultado["status"] = "falha"
+            resultado["motivo"] = "saida diferente da esperada"
+    except subprocess.TimeoutExpired:
+        resultado["status"] = "erro"
+        resultado["motivo"] = "execucao passou de %gs" % limite
+    except Exception as error:
+        logging.error(error)
+        resultado["status"] = "erro"
+        resultado["motivo"] = str(error).replace("\n", " ") or type(error).__name__
+    resultado["tempo"] = sum(tempos.values())
+    return resultado
+
+
+def executarSuite(raiz, etapas, processos=None, gcc=GCC_PADRAO, binarios=BINARIOS_PADRAO, limite=10.0, otimizacao=0,
+                  naMaquina=False, esRapida=False, porEtapa=False):
+    """
+    Executa os casos das etapas pedidas num pool de processos. Os resultados
+    voltam na ordem dos casos, portanto o relatório não depende do número de
+    processos. Com `binarios` None, cada execução usa um diretório temporário
+    (nenhum executável é reaproveitado).
+    """
+    if binarios is None:
+        with tempfile.TemporaryDirectory() as temporario:
+            return executarSuite(raiz, etapas, processos, gcc, temporario, limite, otimizacao, naMaquina, esRapida,
+                                 porEtapa)
+    tarefas = [(caso, gcc, binarios, limite, otimizacao, naMaquina, esRapida, porEtapa)
+               for caso in coletarCasos(raiz, etapas)]
+    processos = processos or os.cpu_count() or 1
+    if processos == 1 or len(tarefas) <= 1:
+        return [executarCaso(tarefa) for tarefa in tarefas]
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        return list(pool.map(executarCaso, tarefas))
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Executa os casos de teste (T1 a T5) em paralelo, como o Corretor.jar")
+    argumentos.add_argument("raiz", nargs="?", default="casos-de-teste", help="diretorio dos casos (padrao: casos-de-teste)")
+    argumentos.add_argument("--etapas", nargs="+", choices=sorted(ETAPAS), default=sorted(ETAPAS))
+    argumentos.add_argument("-j", "--processos", type=int, default=None,
+                            help="numero de processos (padrao: numero de nucleos)")
+    argumentos.add_argument("--gcc", default=GCC_PADRAO, help="compilador C (padrao: $CC ou gcc)")
+    argumentos.add_argument("--binarios", default=BINARIOS_PADRAO, help="diretorio do cache de executaveis")
+    argumentos.add_argument("--sem-cache", action="store_true", help="recompila todos os executaveis")
+    argumentos.add_argument("--limite", type=float, default=10.0, help="tempo maximo de cada execucao, em segundos")
+    argumentos.add_argument("-O", dest="otimizacao", type=int, choices=[0, 1], default=0,
+                            help="nivel de otimizacao do codigo C (ver main.py -O1)")
+    argumentos.add_argument("--maquina", action="store_true",
+                            help="executa os programas da T5 na maquina de pilha (maquina.py) em vez de compilar com o gcc")
+    argumentos.add_argument("--es-rapida", action="store_true",
+                            help="gera o codigo C com o preludio de E/S (ver main.py --es-rapida)")
+    argumentos.add_argument("--por-etapa", action="store_true",
+                            help="compila cada caso so ate a etapa que ele testa (main.py --etapa): tokens na T1, erros "
+                                 "sintaticos na T2 e semanticos na T3 e T4")
+    argumentos.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = argumentos.parse_args()
+
+    inicio = time.perf_counter()
+    resultados = executarSuite(args.raiz, args.etapas, args.processos, args.gcc,
+                               None if args.sem_cache else args.binarios, args.limite, args.otimizacao, args.maquina,
+                               args.es_rapida, args.por_etapa)
+    total = time.perf_counter() - inicio
+    resumo = {}
+    for resultado in resultados:
+        contagem = resumo.setdefault(resultado["etapa"], {"ok": 0, "falha": 0, "erro": 0})
+        contagem[resultado["status"]] += 1
+
+    if args.json:
+        json.dump({"casos": resultados, "etapas": resumo, "tempo": total}, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for resultado in resultados:
+            sys.stdout.write("%-5s %-5s %-5s %8.3fs  %s%s\n" % (
+                resultado["status"], resultado["etapa"], "cache" if resultado["cache"] else "", resultado["tempo"],
+                resultado["entrada"], "  (" + resultado["motivo"] + ")" if resultado["motivo"] else ""))
+        for etapa, contagem in resumo.items():
+            sys.stdout.write("%s: %d/%d ok, %d falhas, %d erros\n" % (
+                etapa, contagem["ok"], sum(contagem.values()), contagem["falha"], contagem["erro"]))
+        sys.stdout.write("%d casos, %.3fs\n" % (len(resultados), total))
+    return 0 if all(resultado["status"] == "ok" for resultado in resultados) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import sys
+import math
+import contextlib
+
+LIMITE_PADRAO = 64 * 1024
+RECUO_PADRAO = "    "
+
+
+class Emissor:
+    """
+    Acumula a saída do compilador em memória e a descarrega de uma vez no
+    destino: um caminho de arquivo, um objeto com `write` (ex.: sys.stdout)
+    ou nenhum, quando o resultado fica em memória e é lido com `valor()`.
+
+    O recuo é controlado por `indentar`/`desindentar` e inserido
+    automaticamente no começo de cada linha; um fragmento só pode conter
+    quebra de linha no final.
+    """
+    def __init__(self, destino=None, limite=LIMITE_PADRAO, recuo=RECUO_PADRAO):
+        self.arquivo = None
+        self.proprio = False
+        if isinstance(destino, str):
+            self.arquivo = open(destino, "w")
+            self.proprio = True
+        elif destino is not None:
+            self.arquivo = destino
+        self.limite = limite
+        self.recuo = recuo
+        self.nivel = 0
+        self.partes = []
+        self.pendente = 0
+        self.escrito = 0
+        self.inicioDeLinha = True
+
+    def write(self, texto):
+        """Acrescenta um fragmento; mesmo nome de `file.write` para servir aos ouvintes de erro do ANTLR."""
+        if self.inicioDeLinha and self.nivel and texto[:1] not in ("", "\n"):
+            texto = self.recuo * self.nivel + texto
+        self.partes.append(texto)
+        self.pendente += len(texto)
+        self.escrito += len(texto)
+        self.inicioDeLinha = texto.endswith("\n")
+        if self.arquivo is not None and self.pendente >= self.limite:
+            self.descarregar()
+
+    def linha(self, texto=""):
+        self.write(texto + "\n")
+
+    def indentar(self):
+        self.nivel += 1
+
+    def desindentar(self):
+        self.nivel -= 1
+
+    def vazio(self):
+        return self.escrito == 0
+
+    def valor(self):
+        """Texto acumulado por um emissor em memória."""
+        return "".join(self.partes)
+
+    def descartar(self):
+        """Esquece o que ainda não foi descarregado no destino."""
+        self.escrito -= self.pendente
+        self.partes = []
+        self.pendente = 0
+        self.inicioDeLinha = True
+
+    @contextlib.contextmanager
+    def retido(self):
+        """Nada é descarregado no destino dentro do bloco, para que tudo ainda possa ser descartado."""
+        limite = self.limite
+        self.limite = math.inf
+        try:
+            yield self
+        finally:
+            self.limite = limite
+
+    def descarregar(self):
+        if self.arquivo is None or not self.partes:
+            return
+        self.arquivo.write("".join(self.partes))
+        self.partes = []
+        self.pendente = 0
+
+    def fechar(self):
+        """Descarrega o que resta e fecha o arquivo, se foi aberto pelo emissor."""
+        self.descarregar()
+        if self.proprio:
+            self.arquivo.close()
+        elif self.arquivo is not None:
+            self.arquivo.flush()
+
+
+def emissorPadrao(destino):
+    """Emissor para o argumento de saída da linha de comando ("-" é a saída padrão)."""
+    return Emissor(sys.stdout if destino == "-" else destino)
@@ -0,0 +1,351 @@
+from Parser.LAParser import LAParser
+from simbolos import INTEIRO, REAL, LITERAL, LOGICO, Ponteiro, ponteiro
+
+# Precedência dos operadores em C: quanto maior, mais forte a ligação
+PRIMARIO = 16
+UNARIO = 14
+PRECEDENCIA = {
+    "*": 13, "/": 13, "%": 13,
+    "+": 12, "-": 12,
+    "<": 10, "<=": 10, ">": 10, ">=": 10,
+    "==": 9, "!=": 9,
+    "&&": 5,
+    "||": 4,
+}
+# Operadores do LA que mudam de grafia em C
+OPERADORES = {"=": "==", "<>": "!="}
+RELACIONAIS = ("==", "!=", "<", "<=", ">", ">=")
+
+FORMATOS = {INTEIRO: "%d", REAL: "%f", LITERAL: "%s", LOGICO: "%d"}
+
+
+def formato(tipo):
+    """Especificador de printf/scanf para um tipo; inteiro quando o tipo não é conhecido."""
+    return FORMATOS.get(tipo, "%d")
+
+
+def operando(no, precedencia):
+    """Partes de `no` como operando, entre parênteses se ele ligar mais fraco que `precedencia`."""
+    if no.precedencia < precedencia:
+        return "(", no, ")"
+    return no,
+
+
+class Expressao:
+    """
+    Nó da representação intermediária das expressões. Cada nó guarda o tipo
+    inferido (um tipo de simbolos.py ou None, se desconhecido) e descreve o
+    seu texto em C com `partes`: textos e nós filhos, na ordem. `paraC`
+    expande as partes com uma pilha explícita, então a profundidade da
+    expressão não esbarra no limite de recursão.
+    """
+    __slots__ = ("tipo",)
+    precedencia = PRIMARIO
+
+    def __init_subclass__(cls, **kwargs):
+        # Cada nó concreto define `partes`; sem ela, o erro aparece ao definir a classe, não no meio da tradução
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, "partes", None)):
+            raise TypeError(cls.__name__ + " nao define partes()")
+
+    def paraC(self):
+        texto = []
+        pendentes = [self]
+        while pendentes:
+            item = pendentes.pop()
+            if type(item) is str:
+                texto.append(item)
+            else:
+                pendentes.extend(reversed(item.partes()))
+        return "".join(texto)
+
+
+class Constante(Expressao):
+    __slots__ = ("texto",)
+
+    def __init__(self, texto, tipo):
+        self.texto = texto
+        self.tipo = tipo
+
+    def partes(self):
+        return self.texto,
+
+    def paraC(self):
+        return self.texto
+
+
+class Referencia(Expressao):
+    """Variável, parâmetro ou constante, com os campos de registro e os índices de vetor."""
+    __slots__ = ("nomes", "indices")
+
+    def __init__(self, nomes, indices, tipo):
+        self.nomes = nomes
+        self.indices = indices
+        self.tipo = tipo
+
+    def partes(self):
+        partes = [".".join(self.nomes)]
+        for indice in self.indices:
+            partes += "[", indice, "]"
+        return partes
+
+
+class Chamada(Expressao):
+    __slots__ = ("nome", "argumentos")
+
+    def __init__(self, nome, argumentos, tipo):
+        self.nome = nome
+        self.argumentos = argumentos
+        self.tipo = tipo
+
+    def partes(self):
+        partes = [self.nome + "("]
+        for i, argumento in enumerate(self.argumentos):
+            if i:
+                partes.append(", ")
+            partes.append(argumento)
+        partes.append(")")
+        return partes
+
+
+class Parenteses(Expressao):
+    __slots__ = ("interna",)
+
+    def __init__(self, interna):
+        self.interna = interna
+        self.tipo = interna.tipo
+
+    def partes(self):
+        return "(", self.interna, ")"
+
+
+class Unario(Expressao):
+    """Operador prefixo de C: "-", "!", "*" (conteúdo de ponteiro) ou "&" (endereço)."""
+    __slots__ = ("operador", "operando")
+    precedencia = UNARIO
+
+    def __init__(self, operador, operando, tipo):
+        self.operador = operador
+        self.operando = operando
+        self.tipo = tipo
+
+    def partes(self):
+        return (self.operador,) + operando(self.operando, UNARIO)
+
+
+class Binario(Expressao):
+    __slots__ = ("operador", "esquerda", "direita")
+
+    def __init__(self, operador, esquerda, direita, tipo):
+        self.operador = operador
+        self.esquerda = esquerda
+        self.direita = direita
+        self.tipo = tipo
+
+    @property
+    def precedencia(self):
+        return PRECEDENCIA[self.operador]
+
+    def partes(self):
+        precedencia = PRECEDENCIA[self.operador]
+        # Operadores de C associam à esquerda: o operando direito de mesma precedência vai entre parênteses
+        return (operando(self.esquerda, precedencia) + (" " + self.operador + " ",)
+                + operando(self.direita, precedencia + 1))
+
+
+def tipoBinario(operador, esquerda, direita):
+    """Tipo do resultado de um operador binário já em grafia C."""
+    if operador in RELACIONAIS or operador in ("&&", "||"):
+        return LOGICO
+    if esquerda is INTEIRO and direita is INTEIRO:
+        return INTEIRO
+    if esquerda in (INTEIRO, REAL) and direita in (INTEIRO, REAL):
+        return REAL
+    if operador == "+" and esquerda is LITERAL and direita is LITERAL:
+        return LITERAL
+    return None
+
+
+class Rebaixador:
+    """
+    Converte as regras de expressão do LAParser (expressao, termo_logico, ...,
+    parcela) na representação intermediária, percorrendo cada subárvore uma
+    única vez.
+
+    O percurso não é recursivo: cada regra é um passo `passo(ctx, pendentes,
+    valores)` que empilha em `pendentes` os passos das subexpressões e o de
+    montagem do nó, que consome os valores delas do topo de `valores`. As
+    cadeias de regras com um só filho (a parcela isolada que desce de
+    expressao até parcela) não empilham nada nem geram nós: o passo devolve
+    o próximo (passo, ctx) e o laço segue nele. A profundidade das expressões
+    fica limitada só pela memória. As subclasses podem estender os passos
+    (chamando o da classe base), que continuam sendo executados na ordem de
+    um percurso em profundidade, da esquerda para a direita.
+
+    `resolveReferencia(identificadorCtx)` dá o tipo de um identificador e
+    `buscar(nome)` o símbolo de uma função.
+    """
+    def __init__(self, resolveReferencia, buscar):
+        self.resolveReferencia = resolveReferencia
+        self.buscar = buscar
+
+    def rebaixar(self, ctx):
+        """Nó de um contexto expressao ou exp_aritmetica (do ANTLR ou da árvore compacta)."""
+        if ctx is None:
+            # Expressão ausente numa árvore recuperada de erro sintático
+            return Constante("", None)
+        if ctx.getRuleIndex() == LAParser.RULE_expressao:
+            return self.percorrer(self.expressao, ctx)
+        return self.percorrer(self.expAritmetica, ctx)
+
+    def referencia(self, ctx:LAParser.IdentificadorContext):
+        """Referencia de um identificador (alvo de atribuição ou de leitura)."""
+        return self.percorrer(self.identificador, ctx)
+
+    def percorrer(self, passo, ctx):
+        pendentes = [(passo, ctx)]
+        valores = []
+        while pendentes:
+            passo, ctx = pendentes.pop()
+            proximo = passo(ctx, pendentes, valores)
+            while proximo is not None:
+                passo, ctx = proximo
+                proximo = passo(ctx, pendentes, valores)
+        return valores.pop()
+
+    def encadear(self, operandos, operadores, passo, pendentes):
+        """Empilha os operandos (só os que têm operador, como num zip) e a montagem do encadeamento à esquerda."""
+        if len(operandos) <= 1 or not operadores:
+            return passo, operandos[0]
+        operadores = operadores[:len(operandos) - 1]
+        pendentes.append((self.montarBinarios, operadores))
+        for operando in reversed(operandos[:len(operadores) + 1]):
+            pendentes.append((passo, operando))
+
+    def montarBinarios(self, operadores, pendentes, valores):
+        inicio = len(valores) - len(operadores) - 1
+        no = valores[inicio]
+        for operador, direita in zip(operadores, valores[inicio + 1:]):
+            no = Binario(operador, no, direita, tipoBinario(operador, no.tipo, direita.tipo))
+        del valores[inicio:]
+        valores.append(no)
+
+    def expressao(self, ctx:LAParser.ExpressaoContext, pendentes, valores):
+        termos = ctx.termo_logico()
+        return self.encadear(termos, ["||"] * (len(termos) - 1), self.termoLogico, pendentes)
+
+    def termoLogico(self, ctx:LAParser.Termo_logicoContext, pendentes, valores):
+        fatores = ctx.fator_logico()
+        return self.encadear(fatores, ["&&"] * (len(fatores) - 1), self.fatorLogico, pendentes)
+
+    def fatorLogico(self, ctx:LAParser.Fator_logicoContext, pendentes, valores):
+        parcela = ctx.parcela_logica()
+        if ctx.getChildCount() > 1:
+            pendentes.append((self.montarNao, None))
+        return self.parcelaLogica, parcela
+
+    def parcelaLogica(self, ctx:LAParser.Parcela_logicaContext, pendentes, valores):
+        if ctx.exp_relacional() is None:
+            valores.append(Constante("1" if ctx.start.text == "verdadeiro" else "0", LOGICO))
+            return None
+        return self.expRelacional, ctx.exp_relacional()
+
+    def expRelacional(self, ctx:LAParser.Exp_relacionalContext, pendentes, valores):
+        operador = ctx.op_relacional()
+        if operador is None:
+            return self.encadear(ctx.exp_aritmetica(), (), self.expAritmetica, pendentes)
+        operadores = [OPERADORES.get(operador.start.text, operador.start.text)]
+        return self.encadear(ctx.exp_aritmetica(), operadores, self.expAritmetica, pendentes)
+
+    def expAritmetica(self, ctx:LAParser.Exp_aritmeticaContext, pendentes, valores):
+        termos = ctx.termo()
+        if len(termos) == 1:
+            return self.termo, termos[0]
+        return self.encadear(termos, [op.start.text for op in ctx.op1()], self.termo, pendentes)
+
+    def termo(self, ctx:LAParser.TermoContext, pendentes, valores):
+        fatores = ctx.fator()
+        if len(fatores) == 1:
+            return self.fator, fatores[0]
+        return self.encadear(fatores, [op.start.text for op in ctx.op2()], self.fator, pendentes)
+
+    def fator(self, ctx:LAParser.FatorContext, pendentes, valores):
+        parcelas = ctx.parcela()
+        if len(parcelas) == 1:
+            return self.parcela, parcelas[0]
+        return self.encadear(parcelas, [op.start.text for op in ctx.op3()], self.parcela, pendentes)
+
+    def parcela(self, ctx:LAParser.ParcelaContext, pendentes, valores):
+        if ctx.parcela_nao_unario():
+            return self.parcelaNaoUnario, ctx.parcela_nao_unario()
+        if ctx.op_unario():
+            pendentes.append((self.montarNegativo, None))
+        return self.parcelaUnario, ctx.parcela_unario()
+
+    def parcelaUnario(self, ctx:LAParser.Parcela_unarioContext, pendentes, valores):
+        if ctx.identificador():
+            if ctx.POINTER():
+                pendentes.append((self.montarConteudo, None))
+            return self.identificador, ctx.identificador()
+        if ctx.IDENT():
+            simbolo = self.buscar(ctx.IDENT().getText())
+            argumentos = ctx.expressao()
+            pendentes.append((self.montarChamada, (ctx.IDENT().getText(), len(argumentos),
+                                                   simbolo.tipo if simbolo is not None else None)))
+            for argumento in reversed(argumentos):
+                pendentes.append((self.expressao, argumento))
+            return None
+        if ctx.NUM_INT():
+            valores.append(Constante(ctx.NUM_INT().getText(), INTEIRO))
+            return None
+        if ctx.NUM_REAL():
+            valores.append(Constante(ctx.NUM_REAL().getText(), REAL))
+            return None
+        pendentes.append((self.montarParenteses, None))
+        return self.expressao, ctx.expressao(0)
+
+    def parcelaNaoUnario(self, ctx:LAParser.Parcela_nao_unarioContext, pendentes, valores):
+        if ctx.CADEIA():
+            valores.append(Constante(ctx.CADEIA().getText(), LITERAL))
+            return None
+        pendentes.append((self.montarEndereco, None))
+        return self.identificador, ctx.identificador()
+
+    def identificador(self, ctx:LAParser.IdentificadorContext, pendentes, valores):
+        nomes = tuple(ident.getText() for ident in ctx.IDENT())
+        indices = ctx.dimensao().exp_aritmetica()
+        if not indices:
+            valores.append(Referencia(nomes, (), self.resolveReferencia(ctx)))
+            return None
+        pendentes.append((self.montarReferencia, (ctx, nomes, len(indices))))
+        for indice in reversed(indices):
+            pendentes.append((self.expAritmetica, indice))
+
+    def montarReferencia(self, dados, pendentes, valores):
+        ctx, nomes, quantidade = dados
+        indices = tuple(valores[len(valores) - quantidade:])
+        del valores[len(valores) - quantidade:]
+        valores.append(Referencia(nomes, indices, self.resolveReferencia(ctx)))
+
+    def montarChamada(self, dados, pendentes, valores):
+        nome, quantidade, tipo = dados
+        argumentos = valores[len(valores) - quantidade:]
+        del valores[len(valores) - quantidade:]
+        valores.append(Chamada(nome, argumentos, tipo))
+
+    def montarNao(self, _, pendentes, valores):
+        valores[-1] = Unario("!", valores[-1], LOGICO)
+
+    def montarNegativo(self, _, pendentes, valores):
+        valores[-1] = Unario("-", valores[-1], valores[-1].tipo)
+
+    def montarConteudo(self, _, pendentes, valores):
+        no = valores[-1]
+        valores[-1] = Unario("*", no, no.tipo.alvo if isinstance(no.tipo, Ponteiro) else None)
+
+    def montarEndereco(self, _, pendentes, valores):
+        no = valores[-1]
+        valores[-1] = Unario("&", no, ponteiro(no.tipo) if no.tipo is not None else None)
+
+    def montarParenteses(self, _, pendentes, valores):
+        valores[-1] = Parenteses(valores[-1])
@@ -0,0 +1,166 @@
+import sys
+import random
+import argparse
+
+
+class GeradorLA:
+    """
+    Gera programas LA sintática e semanticamente válidos, com tamanho
+    controlado pelos parâmetros. A mesma semente gera sempre o mesmo programa.
+    """
+    def __init__(self, comandos=100, funcoes=2, procedimentos=2, profundidade=3,
+                 tamanhoExpressao=4, tamanhoVetor=100, campos=4, semente=0):
+        self.comandos = comandos
+        self.funcoes = funcoes
+        self.procedimentos = procedimentos
+        self.profundidade = profundidade
+        self.tamanhoExpressao = tamanhoExpressao
+        self.tamanhoVetor = tamanhoVetor
+        self.campos = max(1, campos)
+        self.aleatorio = random.Random(semente)
+        self.linhas = []
+
+    def emitir(self, nivel, texto):
+        self.linhas.append("  " * nivel + texto)
+
+    def operando(self):
+        escolha = self.aleatorio.randrange(7)
+        if escolha == 0:
+            return str(self.aleatorio.randrange(1, 100))
+        if escolha == 1:
+            return "v[%d]" % self.aleatorio.randrange(self.tamanhoVetor)
+        if escolha == 2:
+            return "reg.campo%d" % self.aleatorio.randrange(self.campos)
+        if escolha == 3 and self.funcoes:
+            return "f%d(i, j)" % self.aleatorio.randrange(self.funcoes)
+        if escolha == 4:
+            return "(" + self.aritmetica(2) + ")"
+        return self.aleatorio.choice(("i", "j", "k"))
+
+    def aritmetica(self, tamanho=None):
+        tamanho = tamanho or self.tamanhoExpressao
+        partes = [self.operando()]
+        for _ in range(tamanho - 1):
+            partes.append(self.aleatorio.choice(("+", "-", "*")))
+            partes.append(self.operando())
+        return " ".join(partes)
+
+    def condicao(self):
+        relacional = "%s %s %s" % (self.aleatorio.choice(("i", "j", "k")),
+                                   self.aleatorio.choice((">", "<", ">=", "<=", "=", "<>")),
+                                   self.aritmetica(2))
+        escolha = self.aleatorio.randrange(4)
+        if escolha == 0:
+            return relacional + " e j <> " + str(self.aleatorio.randrange(10))
+        if escolha == 1:
+            return "nao (" + relacional + ")"
+        return relacional
+
+    def comando(self, nivel, profundidade):
+        """Emite um comando; comandos compostos consomem parte do orçamento de comandos."""
+        escolha = self.aleatorio.randrange(10)
+        if profundidade < self.profundidade and escolha < 3:
+            return self.composto(nivel, profundidade, escolha)
+        if escolha == 3:
+            self.emitir(nivel, "escreva(\"valor: \", %s)" % self.aleatorio.choice(("i", "j", "k", "x")))
+        elif escolha == 4:
+            self.emitir(nivel, "v[%d] <- %s" % (self.aleatorio.randrange(self.tamanhoVetor), self.aritmetica()))
+        elif escolha == 5:
+            self.emitir(nivel, "reg.campo%d <- %s" % (self.aleatorio.randrange(self.campos), self.aritmetica()))
+        elif escolha == 6 and self.procedimentos:
+            self.emitir(nivel, "p%d(%s)" % (self.aleatorio.randrange(self.procedimentos), self.aleatorio.choice(("i", "j", "k"))))
+        elif escolha == 7:
+            self.emitir(nivel, "x <- x * 2.5 + %s" % self.aritmetica())
+        else:
+            self.emitir(nivel, "%s <- %s" % (self.aleatorio.choice(("i", "j", "k")), self.aritmetica()))
+        return 1
+
+    def composto(self, nivel, profundidade, escolha):
+        internos = self.aleatorio.randrange(1, 4)
+        usados = 1
+        if escolha == 0:
+            self.emitir(nivel, "se " + self.condicao() + " entao")
+            usados += self.bloco(nivel + 1, profundidade + 1, internos)
+            self.emitir(nivel, "senao")
+            usados += self.bloco(nivel + 1, profundidade + 1, internos)
+            self.emitir(nivel, "fim_se")
+        elif escolha == 1:
+            self.emitir(nivel, "enquanto " + self.condicao() + " faca")
+            usados += self.bloco(nivel + 1, profundidade + 1, internos)
+            self.emitir(nivel, "fim_enquanto")
+        else:
+            self.emitir(nivel, "para i <- 1 ate %d faca" % self.aleatorio.randrange(2, 50))
+            usados += self.bloco(nivel + 1, profundidade + 1, internos)
+            self.emitir(nivel, "fim_para")
+        return usados
+
+    def bloco(self, nivel, profundidade, quantidade):
+        usados = 0
+        while usados < quantidade:
+            usados += self.comando(nivel, profundidade)
+        return usados
+
+    def gerar(self):
+        self.linhas = []
+        self.emitir(0, "tipo tRegistro: registro")
+        for campo in range(self.campos):
+            self.emitir(1, "campo%d: inteiro" % campo)
+        self.emitir(0, "fim_registro")
+        self.emitir(0, "declare v[%d]: inteiro" % self.tamanhoVetor)
+        self.emitir(0, "declare reg: tRegistro")
+        for funcao in range(self.funcoes):
+            self.emitir(0, "funcao f%d(a: inteiro, b: inteiro): inteiro" % funcao)
+            self.emitir(1, "declare t: inteiro")
+            self.emitir(1, "t <- a + b * %d" % (funcao + 1))
+            self.emitir(1, "retorne t")
+            self.emitir(0, "fim_funcao")
+        for procedimento in range(self.procedimentos):
+            self.emitir(0, "procedimento p%d(n: inteiro)" % procedimento)
+            self.emitir(1, "escreva(\"p%d: \", n)" % procedimento)
+            self.emitir(0, "fim_procedimento")
+        self.emitir(0, "algoritmo")
+        self.emitir(1, "declare i, j, k: inteiro")
+        self.emitir(1, "declare x: real")
+        self.emitir(1, "leia(i, j, k)")
+        self.emitir(1, "x <- 0.5")
+        self.bloco(1, 0, self.comandos)
+        self.emitir(1, "caso k seja")
+        self.emitir(2, "1: escreva(\"um\")")
+        self.emitir(2, "2..%d: escreva(\"varios\")" % max(3, self.tamanhoVetor))
+        self.emitir(1, "senao")
+        self.emitir(2, "escreva(\"outro\")")
+        self.emitir(1, "fim_caso")
+        self.emitir(0, "fim_algoritmo")
+        return "\n".join(self.linhas) + "\n"
+
+
+def gerarPrograma(**parametros):
+    """Atalho para GeradorLA(**parametros).gerar()."""
+    return GeradorLA(**parametros).gerar()
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Gera programas LA sinteticos para benchmarks")
+    argumentos.add_argument("-o", "--saida", default="-", help="arquivo gerado (padrao: saida padrao)")
+    argumentos.add_argument("--comandos", type=int, default=100, help="numero aproximado de comandos do corpo")
+    argumentos.add_argument("--funcoes", type=int, default=2)
+    argumentos.add_argument("--procedimentos", type=int, default=2)
+    argumentos.add_argument("--profundidade", type=int, default=3, help="aninhamento maximo de se/enquanto/para")
+    argumentos.add_argument("--tamanho-expressao", type=int, default=4, help="operandos por expressao aritmetica")
+    argumentos.add_argument("--tamanho-vetor", type=int, default=100)
+    argumentos.add_argument("--campos", type=int, default=4, help="campos do registro")
+    argumentos.add_argument("--semente", type=int, default=0)
+    args = argumentos.parse_args()
+
+    programa = gerarPrograma(comandos=args.comandos, funcoes=args.funcoes, procedimentos=args.procedimentos,
+                             profundidade=args.profundidade, tamanhoExpressao=args.tamanho_expressao,
+                             tamanhoVetor=args.tamanho_vetor, campos=args.campos, semente=args.semente)
+    if args.saida == "-":
+        sys.stdout.write(programa)
+    else:
+        with open(args.saida, "w") as arquivo:
+            arquivo.write(programa)
+
+
+if __name__ == "__main__":
+    main()
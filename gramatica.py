@@ -0,0 +1,406 @@
+import io
+import sys
+import time
+import argparse
+import contextlib
+from antlr4 import InputStream, CommonTokenStream, PredictionMode, BailErrorStrategy
+from antlr4.Token import Token
+from antlr4.error.Errors import ParseCancellationException
+from antlr4.atn.ParserATNSimulator import ParserATNSimulator
+from lexico import LexerRapido
+from Parser.LAParser import LAParser
+from arvore import compactar, LAFatorada, Folha, No
+from compilador import compilarTexto, recursaoAmpliada
+
+# Perfil das decisões de predição do parser e validação da gramática fatorada (LAFatorada.g4)
+# contra a de referência (LA.g4). O runtime Python do ANTLR não tem o ProfilingATNSimulator do
+# Java; o SimuladorPerfilado abaixo mede o mesmo. Só as decisões que o ANTLR não resolve com um
+# token (as LL(1) viram um `if` no parser gerado) passam pelo adaptivePredict e aparecem no perfil.
+
+PARSERS = {"referencia": LAParser, "fatorada": LAFatorada}
+
+
+class PerfilDecisao:
+    """Contadores de uma decisão, como os DecisionInfo do ANTLR em Java."""
+    def __init__(self, decisao, regra):
+        self.decisao = decisao
+        self.regra = regra
+        self.invocacoes = 0
+        self.tempo = 0.0
+        # Lookahead (tokens examinados) na predição SLL e, quando houve conflito, na LL completa
+        self.sllTotal = 0
+        self.sllMaximo = 0
+        self.recaidasLl = 0
+        self.llTotal = 0
+        self.llMaximo = 0
+        # Passos pelo DFA já construído e passos que precisaram simular o ATN
+        self.transicoesDfa = 0
+        self.transicoesAtn = 0
+        self.ambiguidades = 0
+        self.sensiveisContexto = 0
+
+    def comoDicionario(self):
+        return {
+            "decisao": self.decisao,
+            "regra": self.regra,
+            "invocacoes": self.invocacoes,
+            "tempo": self.tempo,
+            "lookaheadSllMedio": self.sllTotal / self.invocacoes if self.invocacoes else 0,
+            "lookaheadSllMaximo": self.sllMaximo,
+            "recaidasLl": self.recaidasLl,
+            "lookaheadLlMedio": self.llTotal / self.recaidasLl if self.recaidasLl else 0,
+            "lookaheadLlMaximo": self.llMaximo,
+            "transicoesDfa": self.transicoesDfa,
+            "transicoesAtn": self.transicoesAtn,
+            "ambiguidades": self.ambiguidades,
+            "sensiveisContexto": self.sensiveisContexto,
+        }
+
+
+class SimuladorPerfilado(ParserATNSimulator):
+    """
+    ParserATNSimulator que acumula um PerfilDecisao por decisão (a lista
+    `perfis`, compartilhada entre os parsers de um mesmo corpus). As posições
+    de parada das predições SLL e LL são anotadas nos pontos em que o
+    simulador avança na entrada, como no ProfilingATNSimulator do Java.
+    """
+    def __init__(self, parser, perfis):
+        super().__init__(parser, parser.atn, parser.decisionsToDFA, parser.sharedContextCache)
+        self.perfis = perfis
+        self.atual = None
+        self.paradaSll = -1
+        self.paradaLl = -1
+        self.resolvidaPorSll = None
+
+    def adaptivePredict(self, input, decision, outerContext):
+        self.atual = perfil = self.perfis[decision]
+        self.paradaSll = -1
+        self.paradaLl = -1
+        inicio = time.perf_counter()
+        alternativa = super().adaptivePredict(input, decision, outerContext)
+        perfil.tempo += time.perf_counter() - inicio
+        perfil.invocacoes += 1
+        sll = self.paradaSll - self._startIndex + 1
+        perfil.sllTotal += sll
+        perfil.sllMaximo = max(perfil.sllMaximo, sll)
+        if self.paradaLl >= 0:
+            ll = self.paradaLl - self._startIndex + 1
+            perfil.llTotal += ll
+            perfil.llMaximo = max(perfil.llMaximo, ll)
+        return alternativa
+
+    def getExistingTargetState(self, previousD, t):
+        # Chamado a cada avanço da entrada na predição SLL
+        self.paradaSll = self._input.index
+        existente = super().getExistingTargetState(previousD, t)
+        if existente is not None:
+            self.atual.transicoesDfa += 1
+        return existente
+
+    def computeReachSet(self, closure, t, fullCtx):
+        if fullCtx:
+            self.paradaLl = self._input.index
+        else:
+            self.atual.transicoesAtn += 1
+        return super().computeReachSet(closure, t, fullCtx)
+
+    def reportAttemptingFullContext(self, dfa, conflictingAlts, configs, startIndex, stopIndex):
+        self.resolvidaPorSll = min(conflictingAlts) if conflictingAlts else min(configs.getAlts())
+        self.atual.recaidasLl += 1
+        super().reportAttemptingFullContext(dfa, conflictingAlts, configs, startIndex, stopIndex)
+
+    def reportContextSensitivity(self, dfa, prediction, configs, startIndex, stopIndex):
+        if prediction != self.resolvidaPorSll:
+            self.atual.sensiveisContexto += 1
+        super().reportContextSensitivity(dfa, prediction, configs, startIndex, stopIndex)
+
+    def reportAmbiguity(self, dfa, D, startIndex, stopIndex, exact, ambigAlts, configs):
+        self.atual.ambiguidades += 1
+        super().reportAmbiguity(dfa, D, startIndex, stopIndex, exact, ambigAlts, configs)
+
+
+def tokensDe(texto):
+    """Fluxo de tokens já preenchido, sem ouvintes de erro léxico."""
+    lexer = LexerRapido(InputStream(texto))
+    lexer.removeErrorListeners()
+    tokens = CommonTokenStream(lexer)
+    tokens.fill()
+    return tokens
+
+
+def contarRegras(arvore, contagem):
+    """Soma em `contagem` os contextos de cada regra da árvore do ANTLR (as invocações de regra da análise)."""
+    pendentes = [arvore]
+    while pendentes:
+        ctx = pendentes.pop()
+        if hasattr(ctx, "getRuleIndex"):
+            contagem[ctx.getRuleIndex()] += 1
+            pendentes.extend(ctx.children or ())
+
+
+def perfilar(classe, textos, modo="ll"):
+    """
+    Analisa os `textos` com o parser `classe` (sem ouvintes de erro, no modo
+    de predição `modo`) sob o SimuladorPerfilado. Retorna um dicionário com
+    os totais, as regras invocadas e os perfis das decisões usadas.
+    """
+    perfis = [PerfilDecisao(decisao, classe.ruleNames[estado.ruleIndex])
+              for decisao, estado in enumerate(classe.atn.decisionToState)]
+    regras = [0] * len(classe.ruleNames)
+    tokens = comErros = 0
+    inicio = time.perf_counter()
+    for texto in textos:
+        fluxo = tokensDe(texto)
+        tokens += len(fluxo.tokens)
+        parser = classe(fluxo)
+        parser.removeErrorListeners()
+        parser._interp = SimuladorPerfilado(parser, perfis)
+        parser._interp.predictionMode = PredictionMode.LL if modo == "ll" else PredictionMode.SLL
+        with recursaoAmpliada():
+            arvore = parser.programa()
+        if parser.getNumberOfSyntaxErrors():
+            comErros += 1
+        contarRegras(arvore, regras)
+    return {
+        "programas": len(textos),
+        "comErros": comErros,
+        "tokens": tokens,
+        "tempo": time.perf_counter() - inicio,
+        "decisoes": len(perfis),
+        "regras": {nome: quantidade for nome, quantidade in zip(classe.ruleNames, regras) if quantidade},
+        "perfis": [perfil.comoDicionario() for perfil in perfis if perfil.invocacoes],
+    }
+
+
+def medirAnalise(classe, textos, repeticoes):
+    """Menor tempo, sem o perfil, de analisar todos os `textos` com `classe` (SLL, como no compilador)."""
+    fluxos = [tokensDe(texto) for texto in textos]
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for fluxo in fluxos:
+            fluxo.seek(0)
+            parser = classe(fluxo)
+            parser.removeErrorListeners()
+            parser._interp.predictionMode = PredictionMode.SLL
+            with recursaoAmpliada():
+                parser.programa()
+        tempo = time.perf_counter() - inicio
+        melhor = tempo if melhor is None else min(melhor, tempo)
+    return melhor
+
+
+def relatorio(nome, perfil, saida=sys.stdout):
+    regras = sum(perfil["regras"].values())
+    saida.write("gramatica %s: %d programas (%d com erros), %d tokens, %d regras invocadas (%.2f por token), "
+                "%d decisoes no ATN\n" % (nome, perfil["programas"], perfil["comErros"], perfil["tokens"], regras,
+                                          regras / max(perfil["tokens"], 1), perfil["decisoes"]))
+    saida.write("%7s %-20s %10s %9s %11s %9s %11s %9s %9s %6s %6s\n" % (
+        "decisao", "regra", "invocacoes", "tempo", "k SLL med", "max", "recaidasLL", "k LL med", "DFA/ATN", "ambig",
+        "sensiv"))
+    for decisao in sorted(perfil["perfis"], key=lambda decisao: -decisao["tempo"]):
+        saida.write("%7d %-20s %10d %7.1fms %11.2f %9d %11d %9.2f %4d/%-4d %6d %6d\n" % (
+            decisao["decisao"], decisao["regra"], decisao["invocacoes"], decisao["tempo"] * 1000,
+            decisao["lookaheadSllMedio"], decisao["lookaheadSllMaximo"], decisao["recaidasLl"],
+            decisao["lookaheadLlMedio"], decisao["transicoesDfa"], decisao["transicoesAtn"],
+            decisao["ambiguidades"], decisao["sensiveisContexto"]))
+    maisInvocadas = sorted(perfil["regras"].items(), key=lambda item: -item[1])[:8]
+    saida.write("regras mais invocadas: " + ", ".join("%s %d" % item for item in maisInvocadas) + "\n")
+
+
+def assinatura(raiz):
+    """
+    Descrição da árvore compacta para comparação: cada nó e cada folha em
+    pré-ordem, com os tokens de início e fim e os rótulos dados pela posição
+    do nó ou da folha a que apontam.
+    """
+    posicoes = {}
+    ordem = []
+    pendentes = [raiz]
+    while pendentes:
+        item = pendentes.pop()
+        posicoes[id(item)] = len(ordem)
+        ordem.append(item)
+        if isinstance(item, No):
+            pendentes.extend(reversed(item.children))
+
+    def posicao(alvo):
+        if isinstance(alvo, list):
+            return [posicoes[id(elemento)] for elemento in alvo]
+        if alvo is None:
+            return None
+        # O token de fim de um nó vazio pode estar fora dele (o anterior ao início)
+        return posicoes[id(alvo)] if id(alvo) in posicoes else (alvo.type, alvo.text, alvo.line)
+
+    descricao = []
+    for item in ordem:
+        if isinstance(item, Folha):
+            descricao.append((type(item).__name__, item.type, item.text, item.line))
+        else:
+            descricao.append((type(item).__name__, len(item.children), posicao(item.start), posicao(item.stop),
+                              tuple(posicao(getattr(item, rotulo)) for rotulo in item.rotulos)))
+    return descricao
+
+
+def aceita(classe, texto):
+    """Árvore compacta do `texto` pelo parser `classe` em LL completo, ou None se ele tiver erro sintático."""
+    parser = classe(tokensDe(texto))
+    parser.removeErrorListeners()
+    parser._errHandler = BailErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.LL
+    try:
+        with recursaoAmpliada():
+            return compactar(parser.programa())
+    except ParseCancellationException:
+        return None
+
+
+def compilarCapturando(texto, gramatica):
+    """Saída do compilador com a `gramatica`, mais o que ele escreve na saída de erro e a exceção, se houver."""
+    erros = io.StringIO()
+    with contextlib.redirect_stderr(erros):
+        try:
+            saida = compilarTexto(texto, gramatica=gramatica)
+            excecao = None
+        except Exception as erro:
+            saida = None
+            excecao = repr(erro)
+    return saida, erros.getvalue(), excecao
+
+
+def comparar(texto):
+    """
+    Compara as duas gramáticas sobre `texto`: a mesma decisão (aceito ou não),
+    a mesma árvore compacta e a mesma saída do compilador (código C ou
+    diagnósticos, saída de erro e exceções). Devolve None se concordam ou a
+    primeira diferença.
+    """
+    referencia = aceita(LAParser, texto)
+    fatorada = aceita(LAFatorada, texto)
+    if (referencia is None) != (fatorada is None):
+        return "aceito so pela gramatica %s" % ("de referencia" if fatorada is None else "fatorada")
+    if referencia is not None:
+        for i, (antes, depois) in enumerate(zip(assinatura(referencia), assinatura(fatorada))):
+            if antes != depois:
+                return "arvore, item %d: %r != %r" % (i, antes, depois)
+        if len(assinatura(referencia)) != len(assinatura(fatorada)):
+            return "arvore: tamanhos diferentes"
+    # A recuperação de erros do ANTLR depende dos estados que o DFA compartilhado já tem: a mesma
+    # entrada pode ter mensagens diferentes na primeira análise e nas seguintes, com qualquer
+    # gramática. Uma análise antes das comparadas deixa o DFA no mesmo ponto para as duas.
+    compilarCapturando(texto, "referencia")
+    for parte, antes, depois in zip(("saida", "saida de erro", "excecao"), compilarCapturando(texto, "referencia"),
+                                    compilarCapturando(texto, "fatorada")):
+        if antes != depois:
+            return "%s: %r != %r" % (parte, antes, depois)
+    return None
+
+
+def mutacoes(texto, quantidade, aleatorio):
+    """
+    Variações de `texto` com um token removido, duplicado, trocado com o
+    seguinte ou trocado por outro do próprio programa; quase todas têm erro
+    sintático e exercitam a igualdade das linguagens e dos diagnósticos.
+    """
+    tokens = [token for token in tokensDe(texto).tokens if token.type != Token.EOF]
+    if len(tokens) < 2:
+        return []
+    variacoes = []
+    for _ in range(quantidade):
+        i = aleatorio.randrange(len(tokens) - 1)
+        token, seguinte = tokens[i], tokens[i + 1]
+        antes, depois = texto[:token.start], texto[token.stop + 1:]
+        operacao = aleatorio.randrange(4)
+        if operacao == 0:
+            variacoes.append(antes + depois)
+        elif operacao == 1:
+            variacoes.append(antes + token.text + " " + token.text + depois)
+        elif operacao == 2:
+            variacoes.append(antes + seguinte.text + texto[token.stop + 1:seguinte.start] + token.text
+                             + texto[seguinte.stop + 1:])
+        else:
+            variacoes.append(antes + aleatorio.choice(tokens).text + depois)
+    return variacoes
+
+
+def validar(textos, quantidadeMutacoes, semente, saida=sys.stdout):
+    """Compara as gramáticas nos `textos` e em mutações deles. Retorna o número de diferenças."""
+    import random
+    aleatorio = random.Random(semente)
+    casos = []
+    for texto in textos:
+        casos.append(texto)
+        casos.extend(mutacoes(texto, quantidadeMutacoes, aleatorio))
+    diferencas = aceitos = 0
+    for caso in casos:
+        diferenca = comparar(caso)
+        if diferenca is not None:
+            diferencas += 1
+            if diferencas <= 10:
+                saida.write("DIFERENCA %s\n%s\n" % (diferenca, caso))
+        elif aceita(LAParser, caso) is not None:
+            aceitos += 1
+    saida.write("%d programas (%d originais, %d mutacoes; %d sem erro sintatico), %d diferencas\n" % (
+        len(casos), len(textos), len(casos) - len(textos), aceitos, diferencas))
+    return diferencas
+
+
+def main():
+    import os
+    import json
+    import glob
+    from aquecimento import corpus, RAIZ
+    from gerador import gerarPrograma
+    argumentos = argparse.ArgumentParser(
+        description="Perfil das decisoes de predicao do parser (gramatica de referencia e fatorada) e validacao da "
+                    "gramatica fatorada")
+    argumentos.add_argument("arquivos", nargs="*", help="programas LA (padrao: casos de teste T3 a T5 e programas do "
+                                                       "gerador.py; na validacao, todos os casos de teste)")
+    argumentos.add_argument("--gramatica", choices=sorted(PARSERS) + ["ambas"], default="ambas")
+    argumentos.add_argument("--predicao", choices=["sll", "ll"], default="ll",
+                            help="modo de predicao no perfil (ll: SLL com recaida para LL completo em cada decisao)")
+    argumentos.add_argument("--json", action="store_true", help="escreve o perfil em JSON")
+    argumentos.add_argument("-n", "--repeticoes", type=int, default=3, help="repeticoes da medida sem o perfil")
+    argumentos.add_argument("--validar", action="store_true",
+                            help="compara as duas gramaticas (linguagem, arvore e saida do compilador) nos programas "
+                                 "e em mutacoes deles")
+    argumentos.add_argument("--mutacoes", type=int, default=20, help="mutacoes por programa na validacao")
+    argumentos.add_argument("--semente", type=int, default=0)
+    args = argumentos.parse_args()
+
+    if LAFatorada is None:
+        argumentos.error("gere o parser da gramatica fatorada: antlr4 -Dlanguage=Python3 LAFatorada.g4 -visitor "
+                         "-o Parser -lib Parser")
+    if args.arquivos:
+        arquivos = args.arquivos
+    elif args.validar:
+        arquivos = corpus() + sorted(glob.glob(os.path.join(RAIZ, "casos-de-teste", "[12].*", "entrada", "*")))
+    else:
+        arquivos = corpus()
+    textos = []
+    for arquivo in arquivos:
+        with open(arquivo, encoding="utf-8") as fonte:
+            textos.append(fonte.read())
+    if not args.arquivos:
+        textos.extend(gerarPrograma(comandos=300, semente=semente) for semente in range(3))
+
+    if args.validar:
+        return 1 if validar(textos, args.mutacoes, args.semente) else 0
+    nomes = sorted(PARSERS, reverse=True) if args.gramatica == "ambas" else [args.gramatica]
+    resultado = {}
+    for nome in nomes:
+        resultado[nome] = perfilar(PARSERS[nome], textos, args.predicao)
+        resultado[nome]["tempoSemPerfil"] = medirAnalise(PARSERS[nome], textos, args.repeticoes)
+    if args.json:
+        json.dump(resultado, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+    for nome in nomes:
+        relatorio(nome, resultado[nome])
+        sys.stdout.write("analise sem o perfil (SLL, menor de %d): %.1fms\n\n" % (
+            args.repeticoes, resultado[nome]["tempoSemPerfil"] * 1000))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import contextlib
+from collections import Counter
+
+# LA_INSTRUMENTAR=1 liga a instrumentação sem precisar da opção --instrumentar
+ATIVA = os.environ.get("LA_INSTRUMENTAR", "") not in ("", "0")
+SUFIXO = ".medidas.json"
+
+
+class SemMedidas:
+    """Instrumentação desligada: as fases não medem nada e nenhum método é embrulhado."""
+    ativa = False
+    _nulo = contextlib.nullcontext()
+
+    def fase(self, nome):
+        return self._nulo
+
+
+SEM_MEDIDAS = SemMedidas()
+
+
+class Instrumentacao:
+    """
+    Medidas de uma compilação: tempo de parede e de CPU e pico de memória de
+    cada fase, número de tokens, nós da árvore por regra e quantas vezes cada
+    método visit* do Visitor e do Generator foi chamado.
+
+    O pico de memória vem do tracemalloc, ligado enquanto o objeto existe; por
+    isso os tempos medidos com a instrumentação são maiores que sem ela. O
+    tracemalloc e o json só são importados aqui, fora da partida sem medidas.
+    """
+    ativa = True
+
+    def __init__(self):
+        import tracemalloc
+        self.fases = {}
+        self.tokens = 0
+        self.nos = Counter()
+        self.visitas = Counter()
+        self.iniciouTracemalloc = not tracemalloc.is_tracing()
+        if self.iniciouTracemalloc:
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def fase(self, nome):
+        import tracemalloc
+        tracemalloc.reset_peak()
+        memoriaInicial = tracemalloc.get_traced_memory()[0]
+        parede = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.fases[nome] = {
+                "parede": time.perf_counter() - parede,
+                "cpu": time.process_time() - cpu,
+                "memoria_pico": tracemalloc.get_traced_memory()[1] - memoriaInicial,
+            }
+
+    def observarVisitas(self, visitante):
+        """Embrulha os métodos visit* de `visitante` (só nesta instância) para contar as chamadas."""
+        classe = type(visitante).__name__
+        for nome in dir(type(visitante)):
+            if nome.startswith("visit"):
+                setattr(visitante, nome, self._contador(classe + "." + nome, getattr(visitante, nome)))
+
+    def _contador(self, chave, metodo):
+        visitas = self.visitas
+
+        def contado(*args, **kwargs):
+            visitas[chave] += 1
+            return metodo(*args, **kwargs)
+        return contado
+
+    def contarArvore(self, arvore, nomesRegras):
+        """Conta os nós da árvore sintática por regra (folhas contam como "<token>")."""
+        pendentes = [arvore]
+        while pendentes:
+            no = pendentes.pop()
+            filhos = getattr(no, "children", None)
+            if hasattr(no, "getRuleIndex"):
+                self.nos[nomesRegras[no.getRuleIndex()]] += 1
+            else:
+                self.nos["<token>"] += 1
+            if filhos:
+                pendentes.extend(filhos)
+
+    def finalizar(self):
+        import tracemalloc
+        if self.iniciouTracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.iniciouTracemalloc = False
+
+    def resumo(self):
+        self.finalizar()
+        return {
+            "fases": self.fases,
+            "total": {
+                "parede": sum(fase["parede"] for fase in self.fases.values()),
+                "cpu": sum(fase["cpu"] for fase in self.fases.values()),
+                "memoria_pico": max((fase["memoria_pico"] for fase in self.fases.values()), default=0),
+            },
+            "tokens": self.tokens,
+            "nos": sum(self.nos.values()),
+            "nos_por_regra": dict(self.nos.most_common()),
+            "visitas": dict(self.visitas.most_common()),
+        }
+
+    def gravar(self, saida):
+        """Grava o resumo ao lado do arquivo de saída (<saida>.medidas.json); "-" vai para a saída de erro."""
+        import json
+        if saida == "-":
+            json.dump(self.resumo(), sys.stderr, indent=2)
+            sys.stderr.write("\n")
+            return
+        with open(saida + SUFIXO, "w") as arquivo:
+            json.dump(self.resumo(), arquivo, indent=2)
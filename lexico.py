@@ -0,0 +1,234 @@
+import re
+import sys
+import time
+import argparse
+from antlr4 import InputStream, FileStream, CommonTokenStream
+from antlr4.Lexer import Lexer
+from antlr4.Token import Token, CommonToken
+from antlr4.error.Errors import LexerNoViableAltException
+from Parser.LAParser import LAParser
+
+# Palavras-chave e símbolos com tipo próprio: o tipo de cada um é o índice do literal no vocabulário do LAParser
+LITERAIS = {nome[1:-1]: tipo for tipo, nome in enumerate(LAParser.literalNames) if nome.startswith("'")}
+
+# Regras do LA.g4 numa só expressão regular. As alternativas não competem
+# entre si pelo primeiro caractere, exceto NUM_REAL/NUM_INT e os símbolos,
+# que estão ordenados do mais longo para o mais curto: a primeira alternativa
+# que casa é também a mais longa, como no lexer do ANTLR. Os espaços antes do
+# token são consumidos no mesmo casamento; os que contêm quebra de linha
+# formam um casamento à parte para a contagem de linhas.
+PADRAO = re.compile(r"""
+    [ \t\r]*
+    (?:
+    (?P<espaco>\n[ \t\r\n]*)
+  | (?P<comentario>\{[^{}\r\n]*\})
+  | (?P<cadeia>"[^"\r\n]*")
+  | (?P<real>[0-9]+\.[0-9]+)
+  | (?P<inteiro>[0-9]+)
+  | (?P<palavra>[a-zA-Z][a-zA-Z0-9]*_?[a-zA-Z0-9]*)
+  | (?P<simbolo><-|<=|>=|<>|\.\.|[-+*/%=<>()\[\].:,&^])
+  | (?P<fim>\Z)
+    )
+""", re.VERBOSE)
+ESPACOS = re.compile(r"[ \t\r]*")
+
+TIPOS = {"cadeia": LAParser.CADEIA, "real": LAParser.NUM_REAL, "inteiro": LAParser.NUM_INT}
+# Caracteres que encerram um comentário ou uma cadeia ainda não fechados
+FIM_INVALIDO = {"{": re.compile(r"[{}\r\n]"), '"': re.compile(r'["\r\n]')}
+
+
+class LexerRapido(Lexer):
+    """
+    Alternativa ao LALexer gerado pelo ANTLR: reconhece os mesmos tokens com
+    uma expressão regular compilada, em vez de simular o ATN caractere a
+    caractere em Python.
+
+    Produz os mesmos tipos, textos, linhas e colunas, e reporta os erros
+    léxicos aos ouvintes com a mesma mensagem e o mesmo estado (início do
+    token e posição do caractere inválido) que o LALexer, recuperando-se do
+    mesmo jeito: descarta o trecho inválido e continua no caractere seguinte.
+    """
+    def __init__(self, input=None, output=sys.stdout, linha=1):
+        super().__init__(input, output)
+        self.texto = input.strdata
+        self.posicao = 0
+        # Um trecho de um documento maior pode começar numa linha diferente da primeira
+        self._linha = linha
+        self.inicioLinha = 0
+
+    @property
+    def line(self):
+        return self._linha
+
+    @property
+    def column(self):
+        return self.posicao - self.inicioLinha
+
+    def avancar(self, fim):
+        """Move a posição até `fim`, contando as quebras de linha no caminho."""
+        quebras = self.texto.count("\n", self.posicao, fim)
+        if quebras:
+            self._linha += quebras
+            self.inicioLinha = self.texto.rindex("\n", self.posicao, fim) + 1
+        self.posicao = fim
+
+    def nextToken(self):
+        texto = self.texto
+        novo = CommonToken.__new__
+        while True:
+            casamento = PADRAO.match(texto, self.posicao)
+            if casamento is None:
+                self.erroLexico(ESPACOS.match(texto, self.posicao).end())
+                continue
+            grupo = casamento.lastgroup
+            posicao = casamento.start(grupo)
+            fim = casamento.end()
+            if grupo == "espaco":
+                self.posicao = posicao
+                self.avancar(fim)
+                continue
+            if grupo == "comentario":
+                self.posicao = fim
+                continue
+            if grupo == "fim":
+                self.posicao = fim
+                self._input.seek(fim)
+                return self.emitEOF()
+            valor = casamento.group(grupo)
+            if grupo == "palavra":
+                tipo = LITERAIS.get(valor, LAParser.IDENT)
+            elif grupo == "simbolo":
+                tipo = LITERAIS[valor]
+            else:
+                tipo = TIPOS[grupo]
+            # Mesmos atributos que CommonToken.__init__ preencheria, sem consultar line/column do lexer
+            token = novo(CommonToken)
+            token.source = self._tokenFactorySourcePair
+            token.type = tipo
+            token.channel = Token.DEFAULT_CHANNEL
+            token.start = posicao
+            token.stop = fim - 1
+            token.tokenIndex = -1
+            token.line = self._linha
+            token.column = posicao - self.inicioLinha
+            token._text = valor
+            self.posicao = fim
+            return token
+
+    def erroLexico(self, posicao):
+        """
+        Nenhuma regra casa em `posicao`. Um comentário ou uma cadeia abertos
+        falham no primeiro caractere que não podem conter; qualquer outro
+        caractere falha sozinho. O trecho até o caractere que falhou
+        (inclusive) é reportado e descartado.
+        """
+        texto = self.texto
+        falha = posicao
+        fim = FIM_INVALIDO.get(texto[posicao])
+        if fim is not None:
+            encontrado = fim.search(texto, posicao + 1)
+            falha = encontrado.start() if encontrado else len(texto)
+        self._tokenStartCharIndex = posicao
+        self._tokenStartLine = self._linha
+        self._tokenStartColumn = posicao - self.inicioLinha
+        self._input.seek(falha)
+        self.notifyListeners(LexerNoViableAltException(self, self._input, posicao, None))
+        self.avancar(min(falha + 1, len(texto)))
+
+
+def tokensDe(lexer):
+    """Lista (tipo, texto, linha, coluna, início, fim) de todos os tokens, inclusive o EOF."""
+    fluxo = CommonTokenStream(lexer)
+    fluxo.fill()
+    return [(t.type, t.text, t.line, t.column, t.start, t.stop) for t in fluxo.tokens]
+
+
+class _Erros:
+    """Ouvinte que só registra os erros léxicos (linha, coluna e mensagem)."""
+    def __init__(self):
+        self.erros = []
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.erros.append((line, column, msg))
+
+
+def comparar(texto):
+    """Executa os dois lexers sobre `texto`; devolve None se concordam ou a primeira diferença."""
+    from Parser.LALexer import LALexer
+    resultados = []
+    for classe in (LALexer, LexerRapido):
+        lexer = classe(InputStream(texto))
+        ouvinte = _Erros()
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(ouvinte)
+        resultados.append((tokensDe(lexer), ouvinte.erros))
+    (tokensAntlr, errosAntlr), (tokensRapido, errosRapido) = resultados
+    if errosAntlr != errosRapido:
+        return "erros: %r != %r" % (errosAntlr, errosRapido)
+    for antlr, rapido in zip(tokensAntlr, tokensRapido):
+        if antlr != rapido:
+            return "token: %r != %r" % (antlr, rapido)
+    if len(tokensAntlr) != len(tokensRapido):
+        return "quantidade de tokens: %d != %d" % (len(tokensAntlr), len(tokensRapido))
+    return None
+
+
+def textoAleatorio(aleatorio, tamanho):
+    """Sequência aleatória de pedaços de LA, inclusive inválidos, para a comparação diferencial."""
+    pedacos = ["algoritmo", "fim_se", "e", "ou", "nao", "x", "a_b", "a_b_c", "fim_", "1", "12", "3.5", "1.", "..",
+               ".", "<-", "<", "<=", "<>", ">=", "-", "+", "*", "/", "%", "=", "(", ")", "[", "]", ":", ",", "&", "^",
+               "{c}", "{", "}", '"s"', '"', "$", "@", "_", "ç", " ", "\t", "\n", "\r\n"]
+    return "".join(aleatorio.choice(pedacos) for _ in range(tamanho))
+
+
+def main():
+    import glob
+    import random
+    from Parser.LALexer import LALexer
+    argumentos = argparse.ArgumentParser(description="Verifica e mede o lexer rapido contra o LALexer do ANTLR")
+    argumentos.add_argument("arquivos", nargs="*", help="programas LA (padrao: todo o casos-de-teste)")
+    argumentos.add_argument("--aleatorios", type=int, default=2000, help="textos aleatorios comparados alem dos arquivos")
+    argumentos.add_argument("--benchmark", action="store_true", help="mede o tempo de tokenizacao dos dois lexers")
+    argumentos.add_argument("-n", "--repeticoes", type=int, default=3)
+    args = argumentos.parse_args()
+
+    arquivos = args.arquivos or sorted(arquivo for arquivo in glob.glob("casos-de-teste/**/*", recursive=True)
+                                       if arquivo.endswith((".alg", ".txt")) and "entrada" in arquivo)
+    diferencas = 0
+    for arquivo in arquivos:
+        with open(arquivo, encoding="utf-8") as fonte:
+            diferenca = comparar(fonte.read())
+        if diferenca:
+            diferencas += 1
+            sys.stdout.write("DIFERENCA %s: %s\n" % (arquivo, diferenca))
+    aleatorio = random.Random(0)
+    for _ in range(args.aleatorios):
+        texto = textoAleatorio(aleatorio, aleatorio.randrange(1, 40))
+        diferenca = comparar(texto)
+        if diferenca:
+            diferencas += 1
+            sys.stdout.write("DIFERENCA %r: %s\n" % (texto, diferenca))
+    sys.stdout.write("%d arquivos e %d textos aleatorios comparados, %d diferencas\n"
+                     % (len(arquivos), args.aleatorios, diferencas))
+
+    if args.benchmark:
+        from gerador import gerarPrograma
+        programas = [("casos-de-teste", "".join(open(arquivo, encoding="utf-8").read() for arquivo in arquivos)),
+                     ("sintetico", gerarPrograma(comandos=5000, funcoes=50, procedimentos=50))]
+        for nome, texto in programas:
+            tempos = {}
+            for classe in (LALexer, LexerRapido):
+                medidas = []
+                for _ in range(args.repeticoes):
+                    inicio = time.perf_counter()
+                    tokensDe(classe(InputStream(texto)))
+                    medidas.append(time.perf_counter() - inicio)
+                tempos[classe.__name__] = min(medidas)
+            sys.stdout.write("%-15s %8d bytes  LALexer %8.1fms  LexerRapido %8.1fms  %.1fx\n"
+                             % (nome, len(texto), tempos["LALexer"] * 1000, tempos["LexerRapido"] * 1000,
+                                tempos["LALexer"] / tempos["LexerRapido"]))
+    return 1 if diferencas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import os
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from compilador import compilar
+from cache import Cache, compilarComCache
+import instrumentacao
+import aquecimento
+
+EXTENSOES = (".alg", ".txt")
+
+
+def coletarArquivos(alvo, extensoes=EXTENSOES):
+    """
+    Expande um diretório (recursivamente) ou um padrão glob na lista ordenada
+    de programas a compilar, junto com o diretório base usado para espelhar a
+    árvore de saída.
+    """
+    if os.path.isdir(alvo):
+        base = alvo
+        arquivos = []
+        for raiz, _, nomes in os.walk(alvo):
+            for nome in nomes:
+                if nome.endswith(extensoes):
+                    arquivos.append(os.path.join(raiz, nome))
+    else:
+        arquivos = [arquivo for arquivo in glob.glob(alvo, recursive=True) if os.path.isfile(arquivo)]
+        if not arquivos:
+            return None, []
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(arquivo)) for arquivo in arquivos])
+    return base, sorted(arquivos)
+
+
+def compilarArquivo(tarefa):
+    """
+    Compila um arquivo dentro de um processo do pool. Retorna um dict com o
+    status ("ok" ou "erro"), se a saída veio do cache, o tempo gasto, a
+    mensagem de erro, se houver, e as medidas da instrumentação, se ligada.
+    """
+    entrada, saida, usarCache, instrumentar = tarefa
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    inicio = time.perf_counter()
+    resultado = {"entrada": entrada, "saida": saida, "status": "ok", "cache": False, "erro": None}
+    try:
+        # Os arquivos anteriores do mesmo processo não mudam as mensagens deste (ver aquecimento.preservar)
+        with aquecimento.preservar():
+            if instrumentar:
+                medidas = instrumentacao.Instrumentacao()
+                compilar(entrada, saida, medidas=medidas)
+                medidas.gravar(saida)
+                resultado["medidas"] = medidas.resumo()
+            elif usarCache:
+                resultado["cache"] = compilarComCache(compilar, Cache(), entrada, saida) == "cache"
+            else:
+                compilar(entrada, saida)
+    except Exception as error:
+        logging.error(error)
+        resultado["status"] = "erro"
+        resultado["erro"] = str(error)
+    resultado["tempo"] = time.perf_counter() - inicio
+    return resultado
+
+
+def compilarLote(alvos, destino, processos=None, extensoes=EXTENSOES, usarCache=True, instrumentar=False):
+    """
+    Compila todos os programas encontrados em `alvos`, escrevendo cada saída
+    em `destino` com a mesma estrutura de diretórios da entrada. Com
+    `instrumentar`, o cache não é usado e cada saída ganha o seu .medidas.json.
+
+    A lista de tarefas é ordenada e os resultados são devolvidos na ordem das
+    tarefas, portanto o resumo não depende do número de processos.
+    """
+    encontrados = [coletarArquivos(alvo, extensoes) for alvo in alvos]
+    bases = [os.path.abspath(base) for base, arquivos in encontrados if arquivos]
+    if not bases:
+        return []
+    # Com vários alvos, espelha a partir do diretório comum para evitar colisões de nomes
+    base = os.path.commonpath(bases)
+    tarefas = []
+    for _, arquivos in encontrados:
+        for arquivo in arquivos:
+            relativo = os.path.relpath(os.path.abspath(arquivo), base)
+            tarefas.append((arquivo, os.path.join(destino, relativo), usarCache, instrumentar))
+    tarefas = list(dict.fromkeys(tarefas))
+
+    processos = processos or os.cpu_count() or 1
+    if processos == 1 or len(tarefas) <= 1:
+        return [compilarArquivo(tarefa) for tarefa in tarefas]
+    blocos = max(1, len(tarefas) // (processos * 4))
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        return list(pool.map(compilarArquivo, tarefas, chunksize=blocos))
+
+
+def somarFases(resultados):
+    """Soma, por fase, os tempos de parede e de CPU medidos em cada arquivo; a memória fica com o maior pico."""
+    fases = {}
+    for resultado in resultados:
+        for nome, medida in resultado.get("medidas", {}).get("fases", {}).items():
+            soma = fases.setdefault(nome, {"parede": 0.0, "cpu": 0.0, "memoria_pico": 0})
+            soma["parede"] += medida["parede"]
+            soma["cpu"] += medida["cpu"]
+            soma["memoria_pico"] = max(soma["memoria_pico"], medida["memoria_pico"])
+    return fases
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Compila em paralelo todos os programas LA de diretorios ou globs")
+    argumentos.add_argument("alvos", nargs="+", help="diretorios ou padroes glob (ex.: 'casos-de-teste/*/entrada')")
+    argumentos.add_argument("-o", "--saida", required=True, help="diretorio raiz das saidas (espelha a arvore de entrada)")
+    argumentos.add_argument("-j", "--processos", type=int, default=None,
+                            help="numero de processos (padrao: numero de nucleos)")
+    argumentos.add_argument("--json", action="store_true", help="imprime o resumo em JSON")
+    argumentos.add_argument("--sem-cache", action="store_true", help="ignora o cache de compilacao")
+    argumentos.add_argument("--instrumentar", action="store_true",
+                            help="mede cada fase de cada arquivo (tambem ligado por LA_INSTRUMENTAR=1); implica --sem-cache")
+    args = argumentos.parse_args()
+
+    # Um glob que casa com diretórios (ex.: casos-de-teste/*/entrada) vira um alvo por diretório
+    alvos = []
+    for alvo in args.alvos:
+        diretorios = sorted(d for d in glob.glob(alvo) if os.path.isdir(d))
+        if glob.has_magic(alvo) and diretorios:
+            alvos.extend(diretorios)
+        else:
+            alvos.append(alvo)
+
+    instrumentar = args.instrumentar or instrumentacao.ATIVA
+    usarCache = not (args.sem_cache or instrumentar)
+    inicio = time.perf_counter()
+    resultados = compilarLote(alvos, args.saida, args.processos, usarCache=usarCache, instrumentar=instrumentar)
+    total = time.perf_counter() - inicio
+    erros = sum(1 for resultado in resultados if resultado["status"] != "ok")
+    acertos = sum(1 for resultado in resultados if resultado["cache"])
+    fases = somarFases(resultados) if instrumentar else None
+    if usarCache:
+        # Os processos do pool só contam; o total acumulado é gravado uma vez aqui
+        Cache().registrarEstatisticas(acertos, len(resultados) - acertos)
+
+    if args.json:
+        resumo = {"arquivos": resultados, "total": len(resultados), "erros": erros, "cache": acertos, "tempo": total}
+        if fases is not None:
+            resumo["fases"] = fases
+        json.dump(resumo, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        for resultado in resultados:
+            sys.stdout.write("%-4s %-5s %8.3fs  %s\n" % (resultado["status"], "cache" if resultado["cache"] else "",
+                                                        resultado["tempo"], resultado["entrada"]))
+        sys.stdout.write("%d arquivos, %d com erro, %d do cache, %.3fs\n" % (len(resultados), erros, acertos, total))
+        if fases is not None:
+            sys.stdout.write("fases: " + ", ".join("%s %.3fs (cpu %.3fs)" % (nome, fase["parede"], fase["cpu"])
+                                                   for nome, fase in fases.items()) + "\n")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
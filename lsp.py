@@ -0,0 +1,474 @@
+import re
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from bisect import bisect_right
+from antlr4 import InputStream
+from antlr4.Token import Token
+from Parser.LAParser import LAParser
+from lexico import LexerRapido, LITERAIS
+from emissor import Emissor
+from arvore import compactar
+from compilador import (Visitor, Generator, LexerErrorListener, ParserErrorListener, FluxoSobDemanda, analisar,
+                        recursaoAmpliada)
+
+# Tokens que delimitam as unidades do documento no nível mais externo
+INICIO_SUBROTINA = {LITERAIS["procedimento"], LITERAIS["funcao"]}
+FIM_SUBROTINA = {LITERAIS["fim_procedimento"], LITERAIS["fim_funcao"]}
+ALGORITMO = LITERAIS["algoritmo"]
+INICIOS = INICIO_SUBROTINA | {ALGORITMO, LITERAIS["declare"], LITERAIS["constante"], LITERAIS["tipo"]}
+# Uma subrotina sem o fim_ correspondente termina antes destes, que não podem aparecer no seu corpo
+INTERROMPEM_SUBROTINA = INICIO_SUBROTINA | {ALGORITMO}
+
+# Espera após uma alteração antes de reanalisar, para juntar as teclas digitadas em sequência
+ATRASO = 0.05
+ERRO = 1
+
+
+def assinatura(simbolo):
+    """O que as unidades seguintes enxergam de um símbolo global."""
+    parametros = None if simbolo.parametros is None else tuple(p.tipo for p in simbolo.parametros)
+    return (simbolo.nome, simbolo.categoria, simbolo.tipo, simbolo.valor, parametros)
+
+
+class Unidade:
+    """
+    Trecho do documento analisado separadamente: uma declaração global
+    (`tipo` "declaracao", que também recebe o que não é reconhecido no nível
+    externo), um procedimento ou função ("subrotina") ou o corpo do algoritmo
+    ("corpo"), que vai até o fim do documento.
+
+    `inicio` e `fim` são posições no texto; as unidades cobrem o documento
+    inteiro, cada uma começando no seu primeiro token (a primeira, no início
+    do texto). O restante é o cache da análise: a linha em que a unidade
+    começava quando foi analisada (None antes disso; as linhas da árvore e
+    dos diagnósticos são relativas a ela), a árvore ou o erro léxico ou sintático, os
+    diagnósticos semânticos, os símbolos globais declarados
+    (`exportados`, com o hash das assinaturas em `resumo`) e o hash dos
+    símbolos exportados pelas unidades anteriores quando foi verificada
+    (`entrada`).
+    """
+    __slots__ = ("tipo", "cabeca", "inicio", "fim", "aberta", "linha", "arvore", "sintatico",
+                 "diagnosticos", "exportados", "resumo", "entrada")
+
+    def __init__(self, tipo, cabeca, inicio, fim, aberta=False):
+        self.tipo = tipo
+        self.cabeca = cabeca
+        self.inicio = inicio
+        self.fim = fim
+        self.aberta = aberta
+        self.linha = None
+        self.arvore = None
+        self.sintatico = None
+        self.diagnosticos = []
+        self.exportados = []
+        self.resumo = hash(())
+        self.entrada = None
+
+
+def deslocar(diagnostico, linhas):
+    """Soma `linhas` ao número da linha de um diagnóstico "Linha N: ..."."""
+    if not linhas:
+        return diagnostico
+    numero, resto = diagnostico[len("Linha "):].split(":", 1)
+    return "Linha " + str(int(numero) + linhas) + ":" + resto
+
+
+def segmentar(texto, inicio, fim, linha):
+    """
+    Divide texto[inicio:fim], que começa na linha `linha` (contada a partir
+    de 1), em unidades. O trecho deve começar no início do documento ou de
+    uma unidade.
+    """
+    lexer = LexerRapido(InputStream(texto[inicio:fim]), linha=linha)
+    lexer.removeErrorListeners()
+    tipos = []
+    posicoes = []
+    token = lexer.nextToken()
+    while token.type != Token.EOF:
+        tipos.append(token.type)
+        posicoes.append(inicio + token.start)
+        token = lexer.nextToken()
+
+    unidades = []
+    quantidade = len(tipos)
+    i = 0
+    while i < quantidade:
+        tipo = tipos[i]
+        j = i + 1
+        aberta = False
+        if tipo == ALGORITMO:
+            unidades.append(Unidade("corpo", tipo, posicoes[i], fim))
+            break
+        if tipo in INICIO_SUBROTINA:
+            while j < quantidade and tipos[j] not in FIM_SUBROTINA and tipos[j] not in INTERROMPEM_SUBROTINA:
+                j += 1
+            if j < quantidade and tipos[j] in FIM_SUBROTINA:
+                j += 1
+            else:
+                aberta = j == quantidade
+            categoria = "subrotina"
+        else:
+            while j < quantidade and tipos[j] not in INICIOS:
+                j += 1
+            categoria = "declaracao"
+        unidades.append(Unidade(categoria, tipo, posicoes[i], posicoes[j] if j < quantidade else fim, aberta))
+        i = j
+    if not unidades:
+        return [Unidade("vazia", None, inicio, fim)]
+    unidades[0].inicio = inicio
+    return unidades
+
+
+class Documento:
+    """
+    Documento aberto no editor, dividido em unidades. Uma alteração só
+    redivide e reanalisa sintaticamente as unidades que ela toca; a análise
+    semântica reverifica essas unidades e as seguintes cujos símbolos
+    visíveis mudaram, reaproveitando os diagnósticos e os símbolos das demais.
+    """
+    def __init__(self, texto):
+        self.substituir(texto)
+
+    def substituir(self, texto):
+        self.texto = texto
+        self.inicios = [0] + [casamento.end() for casamento in re.finditer("\n", texto)]
+        self.unidades = segmentar(texto, 0, len(texto), 1)
+
+    def linhaDe(self, posicao):
+        """Linha (contada a partir de 1) da posição `posicao` do texto."""
+        return bisect_right(self.inicios, posicao)
+
+    def posicao(self, linha, caractere):
+        """Posição no texto de uma linha e coluna do LSP (contada em unidades UTF-16)."""
+        if linha >= len(self.inicios):
+            return len(self.texto)
+        inicio = self.inicios[linha]
+        fim = self.texto.find("\n", inicio)
+        trecho = self.texto[inicio:fim if fim >= 0 else len(self.texto)]
+        if trecho.isascii():
+            return inicio + min(caractere, len(trecho))
+        return inicio + len(trecho.encode("utf-16-le")[:2 * caractere].decode("utf-16-le", "ignore"))
+
+    def alterar(self, inicio, fim, novo):
+        """Troca texto[inicio:fim] por `novo` e redivide só as unidades afetadas."""
+        delta = len(novo) - (fim - inicio)
+        self.texto = self.texto[:inicio] + novo + self.texto[fim:]
+        primeiraLinha = bisect_right(self.inicios, inicio)
+        ultimaLinha = bisect_right(self.inicios, fim)
+        self.inicios[primeiraLinha:] = ([inicio + casamento.end() for casamento in re.finditer("\n", novo)]
+                                        + [posicao + delta for posicao in self.inicios[ultimaLinha:]])
+
+        unidades = self.unidades
+        fins = [unidade.fim for unidade in unidades]
+        # A unidade anterior entra na redivisão porque a alteração pode ter apagado o início da primeira tocada
+        primeira = max(0, bisect_right(fins, inicio - 1) - 1)
+        ultima = primeira
+        while ultima + 1 < len(unidades) and unidades[ultima + 1].inicio <= fim:
+            ultima += 1
+        for unidade in unidades[ultima + 1:]:
+            unidade.inicio += delta
+            unidade.fim += delta
+        comeco = unidades[primeira].inicio
+        final = unidades[ultima].fim + delta
+        while True:
+            novas = segmentar(self.texto, comeco, final, self.linhaDe(comeco))
+            seguinte = unidades[ultima + 1] if ultima + 1 < len(unidades) else None
+            # A divisão do trecho só vale se a unidade seguinte continuar começando onde começava. Um
+            # comentário ou uma cadeia não fechados engolem o resto da linha, inclusive o início dela; um
+            # trecho sem tokens no início do documento passa a fazer parte da unidade seguinte.
+            if seguinte is None or not (novas[-1].aberta or novas[-1].tipo in ("corpo", "vazia")
+                                        or seguinte.cabeca not in INICIOS or self.texto[final - 1] != "\n"):
+                break
+            ultima += 1
+            final = seguinte.fim
+        unidades[primeira:ultima + 1] = novas
+
+    def analisarSintaxe(self, unidade):
+        """Analisa a unidade com a regra correspondente, guardando a árvore ou o primeiro erro."""
+        unidade.arvore = None
+        unidade.sintatico = None
+        unidade.linha = self.linhaDe(unidade.inicio)
+        if unidade.tipo == "vazia":
+            return
+        saida = Emissor()
+        lexer = LexerRapido(InputStream(self.texto[unidade.inicio:unidade.fim]), linha=unidade.linha)
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(LexerErrorListener(saida))
+        tokens = FluxoSobDemanda(lexer)
+        parser = LAParser(tokens)
+        parser.removeErrorListeners()
+        parser.addErrorListener(ParserErrorListener(saida))
+        try:
+            # Sem o fill, como no compilador.verificar: o primeiro erro, léxico ou sintático, é o relatado
+            with recursaoAmpliada():
+                arvore, _ = analisar(parser, regra="programa" if unidade.tipo == "corpo" else "decl_local_global")
+            if tokens.LA(1) != Token.EOF:
+                # Sobra depois da declaração. Depois de uma análise SLL sem erros o parser fica sem ouvintes,
+                # então a mensagem é escrita direto, e não pelo notifyErrorListeners
+                sobra = tokens.LT(1)
+                ParserErrorListener(saida).syntaxError(parser, sobra, sobra.line, sobra.column, "", None)
+        except Exception:
+            if saida.vazio():
+                raise
+            # Os ouvintes interrompem a análise no primeiro erro, como no compilador.py
+            unidade.sintatico = saida.valor().splitlines()[0]
+            return
+        # Só a árvore compacta fica guardada na unidade, sem o parser nem os tokens
+        unidade.arvore = compactar(arvore)
+
+    def verificar(self, unidade, visitor):
+        """Verifica a unidade com a tabela de `visitor`, que já tem os símbolos das unidades anteriores."""
+        tabela = visitor.tabela
+        visitor.outfile = Emissor()
+        declarados = len(tabela.sombreados[0])
+        try:
+            with recursaoAmpliada():
+                Generator(visitor, Emissor(), gerarCodigo=False).visit(unidade.arvore)
+        except Exception as error:
+            logging.error(error)
+            while len(tabela.sombreados) > 1:
+                tabela.fecharEscopo()
+        unidade.diagnosticos = visitor.outfile.valor().splitlines()
+        unidade.exportados = [tabela.visiveis[nome] for nome, _ in tabela.sombreados[0][declarados:]]
+        unidade.resumo = hash(tuple(assinatura(simbolo) for simbolo in unidade.exportados))
+
+    def analisar(self):
+        """
+        Atualiza as análises desatualizadas e devolve os diagnósticos de todo o
+        documento. Como o compilador, que para no primeiro erro léxico ou
+        sintático, um documento com um erro desses tem só ele como diagnóstico,
+        e nenhuma unidade é verificada.
+        """
+        for unidade in self.unidades:
+            if unidade.linha is None:
+                self.analisarSintaxe(unidade)
+        for i, unidade in enumerate(self.unidades):
+            if unidade.sintatico is None:
+                continue
+            diagnostico = unidade.sintatico
+            if diagnostico.endswith(" proximo a EOF") and i + 1 < len(self.unidades):
+                # O fim da unidade não é o do documento: o compilador encontraria ali o primeiro token da
+                # seguinte, que começa na mesma linha em que a unidade termina
+                seguinte = self.unidades[i + 1]
+                lexer = LexerRapido(InputStream(self.texto[seguinte.inicio:seguinte.fim]))
+                lexer.removeErrorListeners()
+                diagnostico = diagnostico[:-len("EOF")] + lexer.nextToken().text
+            return [deslocar(diagnostico, self.linhaDe(unidade.inicio) - unidade.linha)]
+        visitor = Visitor(Emissor())
+        # Hash encadeado das assinaturas exportadas pelas unidades já percorridas
+        visivel = hash(())
+        diagnosticos = []
+        for unidade in self.unidades:
+            if unidade.arvore is None:
+                unidade.diagnosticos = []
+                unidade.exportados = []
+                unidade.resumo = hash(())
+                unidade.entrada = visivel
+            elif unidade.entrada != visivel:
+                self.verificar(unidade, visitor)
+                unidade.entrada = visivel
+            else:
+                for simbolo in unidade.exportados:
+                    visitor.tabela.declarar(simbolo)
+            visivel = hash((visivel, unidade.resumo))
+            # A unidade pode ter mudado de linha por causa de alterações nas anteriores
+            linhas = self.linhaDe(unidade.inicio) - unidade.linha
+            diagnosticos.extend(deslocar(diagnostico, linhas) for diagnostico in unidade.diagnosticos)
+        if self.unidades[-1].tipo != "corpo":
+            # Sem o corpo, o programa termina antes do 'algoritmo' esperado
+            diagnosticos.append("Linha " + str(len(self.inicios)) + ": erro sintatico proximo a EOF")
+        return diagnosticos
+
+
+def paraLsp(diagnostico):
+    """Converte uma linha "Linha N: mensagem" num Diagnostic do LSP que cobre a linha N inteira."""
+    linha = int(diagnostico.split(":", 1)[0].split()[1]) - 1
+    return {
+        "range": {"start": {"line": linha, "character": 0}, "end": {"line": linha + 1, "character": 0}},
+        "severity": ERRO,
+        "source": "la",
+        "message": diagnostico,
+    }
+
+
+class ServidorLsp:
+    """
+    Servidor de linguagem (LSP) sobre a entrada e a saída padrão. Publica os
+    mesmos diagnósticos "Linha N: ..." do compilador para os documentos
+    abertos, reanalisando só as unidades alteradas (ver Documento).
+    """
+    def __init__(self, saida):
+        self.saida = saida
+        self.documentos = {}
+        self.pendentes = {}
+        self.encerrado = False
+
+    def enviar(self, mensagem):
+        corpo = json.dumps(mensagem).encode("utf-8")
+        self.saida.write(b"Content-Length: " + str(len(corpo)).encode("ascii") + b"\r\n\r\n" + corpo)
+        self.saida.flush()
+
+    def responder(self, identificador, resultado=None, erro=None):
+        mensagem = {"jsonrpc": "2.0", "id": identificador}
+        if erro is None:
+            mensagem["result"] = resultado
+        else:
+            mensagem["error"] = erro
+        self.enviar(mensagem)
+
+    def publicar(self, uri):
+        self.pendentes.pop(uri, None)
+        documento = self.documentos.get(uri)
+        diagnosticos = [] if documento is None else [paraLsp(diagnostico) for diagnostico in documento.analisar()]
+        self.enviar({"jsonrpc": "2.0", "method": "textDocument/publishDiagnostics",
+                     "params": {"uri": uri, "diagnostics": diagnosticos}})
+
+    def agendar(self, uri, atraso=ATRASO):
+        pendente = self.pendentes.pop(uri, None)
+        if pendente is not None:
+            pendente.cancel()
+        self.pendentes[uri] = asyncio.get_running_loop().call_later(atraso, self.publicar, uri)
+
+    def tratar(self, mensagem):
+        """Trata uma mensagem; devolve False quando o cliente pede para sair."""
+        metodo = mensagem.get("method")
+        parametros = mensagem.get("params") or {}
+        identificador = mensagem.get("id")
+        if metodo == "initialize":
+            self.responder(identificador, {
+                "capabilities": {"textDocumentSync": {"openClose": True, "change": 2}},
+                "serverInfo": {"name": "la-lsp"},
+            })
+        elif metodo == "shutdown":
+            self.encerrado = True
+            self.responder(identificador)
+        elif metodo == "exit":
+            return False
+        elif metodo == "textDocument/didOpen":
+            documento = parametros["textDocument"]
+            self.documentos[documento["uri"]] = Documento(documento["text"])
+            self.agendar(documento["uri"], 0)
+        elif metodo == "textDocument/didChange":
+            uri = parametros["textDocument"]["uri"]
+            documento = self.documentos[uri]
+            for mudanca in parametros["contentChanges"]:
+                if "range" not in mudanca:
+                    documento.substituir(mudanca["text"])
+                    continue
+                inicio = mudanca["range"]["start"]
+                fim = mudanca["range"]["end"]
+                documento.alterar(documento.posicao(inicio["line"], inicio["character"]),
+                                  documento.posicao(fim["line"], fim["character"]), mudanca["text"])
+            self.agendar(uri)
+        elif metodo == "textDocument/didClose":
+            uri = parametros["textDocument"]["uri"]
+            self.documentos.pop(uri, None)
+            self.agendar(uri, 0)
+        elif identificador is not None and metodo is not None:
+            self.responder(identificador, erro={"code": -32601, "message": "metodo nao suportado: " + metodo})
+        return True
+
+    async def executar(self, leitor):
+        while True:
+            cabecalhos = {}
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    return
+                linha = linha.decode("ascii").strip()
+                if not linha:
+                    break
+                nome, _, valor = linha.partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+            corpo = await leitor.readexactly(int(cabecalhos["content-length"]))
+            try:
+                continuar = self.tratar(json.loads(corpo))
+            except Exception as error:
+                logging.error(error)
+                continue
+            if not continuar:
+                return
+
+
+async def servirLsp():
+    """Atende um cliente LSP pela entrada e saída padrão até receber "exit"."""
+    leitor = asyncio.StreamReader()
+    await asyncio.get_running_loop().connect_read_pipe(lambda: asyncio.StreamReaderProtocol(leitor), sys.stdin)
+    servidor = ServidorLsp(sys.stdout.buffer)
+    await servidor.executar(leitor)
+    return 0 if servidor.encerrado else 1
+
+
+def medir(repeticoes):
+    """
+    Mede o tempo de reanalisar um programa depois de alterar uma linha no
+    meio de uma função, para programas com cada vez mais funções, e compara
+    com a análise do documento inteiro.
+    """
+    from gerador import gerarPrograma
+    sys.stdout.write("%8s %8s %12s %12s\n" % ("funcoes", "linhas", "completa", "alteracao"))
+    for funcoes in (10, 100, 1000):
+        texto = gerarPrograma(comandos=200, funcoes=funcoes)
+        inicio = time.perf_counter()
+        documento = Documento(texto)
+        documento.analisar()
+        completa = time.perf_counter() - inicio
+        alvo = texto.index("t <- a + b * %d" % (funcoes // 2 + 1))
+        tempos = []
+        for repeticao in range(repeticoes):
+            inicio = time.perf_counter()
+            # Troca entre "a + b" e "b + b", mantendo o programa válido
+            documento.alterar(alvo + 5, alvo + 6, "ab"[repeticao % 2 == 0])
+            documento.analisar()
+            tempos.append(time.perf_counter() - inicio)
+        sys.stdout.write("%8d %8d %10.1fms %10.1fms\n" % (funcoes, texto.count("\n"), completa * 1000, min(tempos) * 1000))
+
+
+def conferir(arquivos):
+    """
+    Compara os diagnósticos do Documento com os do compilador parando na
+    análise semântica (compilarTexto com etapa "semantico") para cada arquivo.
+    Devolve a lista de (arquivo, do compilador, do LSP) que diferem.
+    """
+    from compilador import compilarTexto
+    diferentes = []
+    for arquivo in arquivos:
+        with open(arquivo, encoding="utf-8") as fonte:
+            texto = fonte.read()
+        esperado = compilarTexto(texto, etapa="semantico")
+        obtido = "".join(diagnostico + "\n" for diagnostico in Documento(texto).analisar()) + "Fim da compilacao\n"
+        if obtido != esperado:
+            diferentes.append((arquivo, esperado, obtido))
+    return diferentes
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Servidor de linguagem (LSP) para LA, pela entrada e saida padrao")
+    argumentos.add_argument("--medir", action="store_true",
+                            help="mede a reanalise apos uma alteracao em programas de tamanhos crescentes")
+    argumentos.add_argument("-n", "--repeticoes", type=int, default=5)
+    argumentos.add_argument("--conferir", nargs="*", metavar="ARQUIVO",
+                            help="compara os diagnosticos com os do compilador (main.py --etapa semantico) nos arquivos "
+                                 "(padrao: entradas dos casos de teste T1 a T5)")
+    args = argumentos.parse_args()
+    if args.medir:
+        medir(args.repeticoes)
+        return 0
+    if args.conferir is not None:
+        import glob
+        arquivos = args.conferir or sorted(glob.glob("casos-de-teste/*/entrada/*")
+                                           + glob.glob("casos-de-teste/5.casos_teste_t5/1.entrada/*"))
+        diferentes = conferir(arquivos)
+        for arquivo, esperado, obtido in diferentes:
+            sys.stdout.write("DIFERENCA %s\n--- compilador\n%s--- lsp\n%s" % (arquivo, esperado, obtido))
+        sys.stdout.write("%d arquivos, %d diferencas\n" % (len(arquivos), len(diferentes)))
+        return 1 if diferentes else 0
+    return asyncio.run(servirLsp())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
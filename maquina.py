@@ -0,0 +1,1147 @@
+import io
+import re
+import sys
+import math
+import time
+import signal
+import struct
+import logging
+import argparse
+from antlr4 import InputStream, CommonTokenStream
+from Parser.LAParser import LAParser
+from Parser.LAVisitor import LAVisitor
+from lexico import LexerRapido
+from simbolos import *
+from emissor import Emissor
+from expressoes import Constante, Referencia, Chamada, Parenteses, Unario, Binario, Rebaixador, RELACIONAIS, formato
+from otimizador import Otimizador, inteiroC, dividir, valorDe, invariante
+from arvore import compactar
+from compilador import Visitor, Generator, LexerErrorListener, ParserErrorListener, analisar, intervalosDe, recursaoAmpliada
+
+# Instruções da máquina de pilha. O código de cada subrotina é uma lista de
+# inteiros em que cada instrução é seguida do seu argumento, se tiver um
+# (ver COM_ARGUMENTO). "pilha: antes -> depois" descreve o efeito de cada uma.
+NOMES = (
+    "CARREGA_L",            # n: -> locais[n]
+    "CONST",                # valor: -> valor
+    "CARREGA_G",            # n: -> globais[n]
+    "GUARDA_L",             # n: v -> ; locais[n] = v
+    "GUARDA_G",             # n: v -> ; globais[n] = v
+    "SALTA_SE_FALSO",       # destino: v ->
+    "SALTA",                # destino
+    "SOMA",                 # a b -> a + b
+    "SUBTRAI",              # a b -> a - b
+    "MULTIPLICA",           # a b -> a * b
+    "DIVIDE",               # a b -> a / b (truncada entre inteiros, como no C)
+    "RESTO",                # a b -> a % b (com o sinal do dividendo, como no C)
+    "MENOR",                # a b -> a < b
+    "MENOR_IGUAL",          # a b -> a <= b
+    "MAIOR",                # a b -> a > b
+    "MAIOR_IGUAL",          # a b -> a >= b
+    "IGUAL",                # a b -> a == b
+    "DIFERENTE",            # a b -> a != b
+    "INDICE",               # vetor i -> vetor[i]
+    "CAMPO",                # k: registro -> registro[k]
+    "GUARDA_ITEM",          # recipiente chave v -> ; recipiente[chave] = v
+    "INCREMENTA_L",         # n: locais[n] += 1
+    "INCREMENTA_G",         # n: globais[n] += 1
+    "SALTA_SE_VERDADEIRO",  # destino: v ->
+    "NEGA",                 # a -> -a
+    "NAO",                  # a -> !a
+    "REAL32",               # a -> a arredondado para float
+    "TRUNCA",               # a -> (int) a
+    "CHAMA",                # funcao: argumentos... -> retorno
+    "RETORNA",              # v -> (volta ao chamador com v)
+    "RETORNA_NADA",         # (volta ao chamador)
+    "DESCARTA",             # v ->
+    "ESCREVE",              # (formato, n): v1 ... vn -> ; printf
+    "ESCOLHE",              # Escolha: v -> (salta para a seleção que contém v)
+    "QUADRO_L",             # -> locais
+    "QUADRO_G",             # -> globais
+    "ENDERECO",             # recipiente chave -> (recipiente, chave)
+    "CONTEUDO",             # (recipiente, chave) -> recipiente[chave]
+    "GUARDA_CONTEUDO",      # (recipiente, chave) v -> ; recipiente[chave] = v
+    "COPIA",                # registro -> cópia do registro
+    "LE_INTEIRO",           # recipiente chave -> ; scanf("%d")
+    "LE_REAL",              # recipiente chave -> ; scanf("%f")
+    "LE_LINHA",             # recipiente chave -> ; gets
+)
+(CARREGA_L, CONST, CARREGA_G, GUARDA_L, GUARDA_G, SALTA_SE_FALSO, SALTA, SOMA, SUBTRAI, MULTIPLICA, DIVIDE, RESTO,
+ MENOR, MENOR_IGUAL, MAIOR, MAIOR_IGUAL, IGUAL, DIFERENTE, INDICE, CAMPO, GUARDA_ITEM, INCREMENTA_L, INCREMENTA_G,
+ SALTA_SE_VERDADEIRO, NEGA, NAO, REAL32, TRUNCA, CHAMA, RETORNA, RETORNA_NADA, DESCARTA, ESCREVE, ESCOLHE,
+ QUADRO_L, QUADRO_G, ENDERECO, CONTEUDO, GUARDA_CONTEUDO, COPIA, LE_INTEIRO, LE_REAL, LE_LINHA) = range(len(NOMES))
+COM_ARGUMENTO = frozenset((CARREGA_L, CONST, CARREGA_G, GUARDA_L, GUARDA_G, SALTA_SE_FALSO, SALTA, CAMPO,
+                           INCREMENTA_L, INCREMENTA_G, SALTA_SE_VERDADEIRO, CHAMA, ESCREVE, ESCOLHE))
+ARITMETICAS = {"+": SOMA, "-": SUBTRAI, "*": MULTIPLICA, "/": DIVIDE, "%": RESTO}
+COMPARACOES = {"<": MENOR, "<=": MENOR_IGUAL, ">": MAIOR, ">=": MAIOR_IGUAL, "==": IGUAL, "!=": DIFERENTE}
+
+# Sequências de escape das cadeias, que o compilador C interpreta no código gerado
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "a": "\a", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+ESCAPE = re.compile(r"\\(.)")
+ESPECIFICADOR = re.compile(r"(%%|%[dfs])")
+
+# O que o scanf do C aceita em %d e %f, depois de pular os espaços
+ESPACOS = re.compile(r"[ \t\n\r\v\f]*")
+NUMERO_INTEIRO = re.compile(r"[+-]?[0-9]+")
+NUMERO_REAL = re.compile(r"[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?")
+
+_FLOAT = struct.Struct("f")
+
+
+class ErroCompilacao(Exception):
+    """O programa tem diagnósticos (texto no formato do compilador) ou usa algo que a máquina não executa."""
+
+
+class ErroExecucao(Exception):
+    """Falha do programa durante a execução (índice fora do vetor, divisão inteira por zero, ...)."""
+
+
+def textoC(conteudo):
+    """Valor de uma cadeia do LA (sem as aspas) depois das sequências de escape do C."""
+    return ESCAPE.sub(lambda casamento: ESCAPES.get(casamento.group(1), casamento.group(1)), conteudo)
+
+
+def real32(valor):
+    """Valor arredondado para o float de 32 bits do C, onde ficam as variáveis reais."""
+    try:
+        return _FLOAT.unpack(_FLOAT.pack(valor))[0]
+    except OverflowError:
+        return math.copysign(math.inf, valor)
+
+
+def inteiro32(valor):
+    """Valor inteiro depois de dar a volta no int de 32 bits do C, como o código do gcc faz no estouro."""
+    return (valor + 2147483648) % 4294967296 - 2147483648
+
+
+def dividirReal(a, b):
+    """Divisão de reais do C: por zero dá infinito (ou NaN), em vez de erro."""
+    if b == 0:
+        if a == 0 or a != a:
+            # O NaN que o processador produz, com o mesmo sinal que o do C
+            return math.inf - math.inf
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def formatarC(especificacao, valores):
+    """
+    printf com os especificadores do código gerado. O % do Python só difere
+    do C nos NaN com sinal, que o printf da glibc escreve como "-nan".
+    """
+    texto = especificacao % valores
+    if "nan" not in texto:
+        return texto
+    valores = iter(valores)
+    partes = []
+    for parte in ESPECIFICADOR.split(especificacao):
+        if parte == "%%":
+            parte = "%"
+        elif parte in ("%d", "%f", "%s"):
+            valor = next(valores)
+            if parte == "%f" and valor != valor:
+                parte = "-nan" if math.copysign(1.0, valor) < 0 else "nan"
+            else:
+                parte = parte % (valor,)
+        partes.append(parte)
+    return "".join(partes)
+
+
+def copiar(valor):
+    """Cópia de um registro ou vetor (listas aninhadas); os demais valores são imutáveis."""
+    if type(valor) is list:
+        return [copiar(item) for item in valor]
+    return valor
+
+
+def inicial(tipo):
+    """Valor de uma variável recém-declarada do tipo dado: zero, cadeia vazia, ou registros e vetores disso."""
+    if isinstance(tipo, Vetor):
+        valor = inicial(tipo.elemento)
+        for dimensao in reversed(tipo.dimensoes):
+            if not isinstance(dimensao, int):
+                raise ErroCompilacao("dimensao nao constante: " + dimensao)
+            valor = [copiar(valor) for _ in range(dimensao)]
+        return valor
+    if isinstance(tipo, Registro):
+        return [inicial(campo) for campo in tipo.campos.values()]
+    if tipo is REAL:
+        return 0.0
+    if tipo is LITERAL:
+        return ""
+    if isinstance(tipo, Ponteiro):
+        return None
+    return 0
+
+
+class Quadro:
+    """
+    Leiaute das variáveis de uma subrotina (ou das globais): o valor inicial
+    de cada posição e, para registros e vetores, que são mutáveis, as
+    posições que recebem uma cópia nova a cada chamada.
+    """
+    __slots__ = ("modelo", "compostos")
+
+    def __init__(self):
+        self.modelo = []
+        self.compostos = []
+
+    def alocar(self, tipo=None):
+        posicao = len(self.modelo)
+        valor = inicial(tipo)
+        if type(valor) is list:
+            self.compostos.append((posicao, valor))
+            valor = None
+        self.modelo.append(valor)
+        return posicao
+
+    def novo(self):
+        valores = self.modelo[:]
+        for posicao, valor in self.compostos:
+            valores[posicao] = copiar(valor)
+        return valores
+
+
+class Funcao:
+    """Código de uma subrotina (ou do corpo do algoritmo), com o número de parâmetros e o leiaute do quadro."""
+    __slots__ = ("nome", "codigo", "aridade", "quadro")
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.codigo = []
+        self.aridade = 0
+        self.quadro = Quadro()
+
+    def __repr__(self):
+        return "<funcao " + self.nome + ">"
+
+
+class Escolha:
+    """Tabela de um `caso`: destino de cada valor isolado, das faixas largas (em ordem) e do senao."""
+    __slots__ = ("valores", "faixas", "padrao")
+
+    def __init__(self):
+        self.valores = {}
+        self.faixas = []
+        self.padrao = None
+
+    def __repr__(self):
+        return "<escolha %r %r senao %r>" % (self.valores, self.faixas, self.padrao)
+
+
+class Programa:
+    __slots__ = ("principal", "funcoes", "globais")
+
+    def __init__(self, principal, funcoes, globais):
+        self.principal = principal
+        self.funcoes = funcoes
+        self.globais = globais
+
+
+class CompiladorBytecode(LAVisitor):
+    """
+    Traduz a árvore de um programa já verificado para o código da máquina de
+    pilha. Os escopos e os tipos vêm de um Visitor próprio, que só declara os
+    símbolos à medida que a árvore é percorrida; cada símbolo de variável ou
+    parâmetro recebe uma posição no quadro da sua subrotina (ou no global).
+
+    Os valores seguem o C do código gerado: variáveis reais guardam floats
+    de 32 bits, as constantes reais são doubles, a divisão de inteiros trunca
+    e as comparações valem 0 ou 1. Com `otimizacao` 1, as expressões passam
+    pelo Otimizador, os limites invariantes dos `para` são calculados uma só
+    vez e os comandos que nunca executam não são traduzidos.
+    """
+    def __init__(self, otimizacao=0):
+        self.visitor = Visitor(Emissor())
+        self.tabela = self.visitor.tabela
+        self.rebaixador = Rebaixador(self.visitor.resolveReferencia, self.tabela.buscar)
+        self.otimizador = Otimizador(self.tabela.buscar) if otimizacao else None
+        self.globais = Quadro()
+        self.enderecos = {}
+        self.funcoes = {}
+        self.funcao = None
+        self.tipoRetorno = None
+
+    # Emissão
+
+    def emitir(self, *instrucao):
+        self.funcao.codigo.extend(instrucao)
+
+    def posicao(self):
+        return len(self.funcao.codigo)
+
+    def saltar(self, instrucao, destino=None):
+        """Emite um salto; sem destino, devolve a posição do argumento para `corrigir` depois."""
+        self.funcao.codigo += [instrucao, destino]
+        return len(self.funcao.codigo) - 1
+
+    def corrigir(self, saltos):
+        """Faz os saltos pendentes apontarem para a posição atual."""
+        for salto in saltos:
+            self.funcao.codigo[salto] = len(self.funcao.codigo)
+
+    # Declarações
+
+    def compilar(self, ctx:LAParser.ProgramaContext):
+        self.visitPrograma(ctx)
+        return Programa(self.funcao, list(self.funcoes.values()), self.globais)
+
+    def visitPrograma(self, ctx:LAParser.ProgramaContext):
+        if ctx.declaracoes():
+            self.visitDeclaracoes(ctx.declaracoes())
+        self.funcao = Funcao("algoritmo")
+        for declaracao in ctx.corpo().declaracao_local():
+            self.visitDeclaracao_local(declaracao)
+        self.comandos(ctx.corpo().cmd())
+        self.emitir(RETORNA_NADA)
+
+    def alocar(self, simbolo):
+        quadro = self.funcao.quadro if self.funcao else self.globais
+        self.enderecos[simbolo] = (quadro is self.globais, quadro.alocar(simbolo.tipo))
+
+    def visitDeclaracao_local(self, ctx:LAParser.Declaracao_localContext):
+        self.visitor.visitDeclaracao_local(ctx)
+        if ctx.variavel():
+            for identificador in ctx.variavel().identificador():
+                self.alocar(self.tabela.buscar(identificador.IDENT(0).getText()))
+
+    def visitDeclaracao_global(self, ctx:LAParser.Declaracao_globalContext):
+        simbolo = self.visitor.abrirSubrotina(ctx)
+        funcao = self.funcoes[simbolo] = self.funcao = Funcao(simbolo.nome)
+        self.tipoRetorno = simbolo.tipo
+        funcao.aridade = len(simbolo.parametros)
+        for parametro in simbolo.parametros:
+            self.enderecos[parametro] = (False, funcao.quadro.alocar())
+        for declaracao in ctx.declaracao_local():
+            self.visitDeclaracao_local(declaracao)
+        self.comandos(ctx.cmd())
+        self.emitir(RETORNA_NADA)
+        self.visitor.fecharSubrotina(simbolo)
+        self.funcao = None
+        self.tipoRetorno = None
+
+    # Comandos
+
+    def comandos(self, comandos):
+        for cmd in comandos:
+            self.visitChildren(cmd)
+
+    def visitCmdLeia(self, ctx:LAParser.CmdLeiaContext):
+        for identificador in ctx.identificador():
+            alvo = self.rebaixador.referencia(identificador)
+            self.endereco(alvo)
+            self.emitir(LE_LINHA if alvo.tipo is LITERAL else LE_REAL if alvo.tipo is REAL else LE_INTEIRO)
+
+    def visitCmdEscreva(self, ctx:LAParser.CmdEscrevaContext):
+        # Um só printf por comando, como no código C: cadeias no formato, os demais valores pelo tipo
+        especificacao = ""
+        argumentos = 0
+        for expressao in ctx.expressao():
+            no = self.rebaixar(expressao)
+            if isinstance(no, Constante) and no.tipo is LITERAL:
+                especificacao += textoC(no.texto[1:-1]).replace("%", "%%")
+            else:
+                especificacao += formato(no.tipo)
+                self.expressao(no)
+                argumentos += 1
+        self.emitir(ESCREVE, (especificacao, argumentos))
+
+    def visitCmdAtribuicao(self, ctx:LAParser.CmdAtribuicaoContext):
+        alvo = self.rebaixador.referencia(ctx.identificador())
+        if self.otimizador:
+            alvo = self.otimizador.indices(alvo)
+        valor = self.rebaixar(ctx.expressao())
+        if ctx.POINTER():
+            self.carregar(alvo)
+            self.converter(valor, alvo.tipo.alvo if isinstance(alvo.tipo, Ponteiro) else None)
+            self.emitir(GUARDA_CONTEUDO)
+        else:
+            self.guardar(alvo, valor)
+
+    def visitCmdSe(self, ctx:LAParser.CmdSeContext):
+        condicao = self.rebaixar(ctx.expressao())
+        valor = valorDe(condicao) if self.otimizador else None
+        if valor is not None:
+            return self.comandos(ctx.cmd1 if valor else ctx.cmd2)
+        falso = self.desviar(condicao)
+        self.comandos(ctx.cmd1)
+        if ctx.cmd2:
+            fim = self.saltar(SALTA)
+            self.corrigir(falso)
+            self.comandos(ctx.cmd2)
+            self.corrigir([fim])
+        else:
+            self.corrigir(falso)
+
+    def visitCmdCaso(self, ctx:LAParser.CmdCasoContext):
+        seletor = self.rebaixar(ctx.exp_aritmetica())
+        selecoes = [(intervalosDe(selecao.constantes()), selecao.cmd()) for selecao in ctx.selecao().item_selecao()]
+        self.expressao(seletor)
+        escolha = Escolha()
+        self.emitir(ESCOLHE, escolha)
+        fins = []
+        for intervalos, comandos in selecoes:
+            # Vale a primeira seleção que contém o valor: o que uma faixa anterior já cobre não entra na tabela
+            destino = self.posicao()
+            for comeco, fim in intervalos:
+                if fim - comeco < 256:
+                    for valor in range(comeco, fim + 1):
+                        if not any(a <= valor <= b for a, b, _ in escolha.faixas):
+                            escolha.valores.setdefault(valor, destino)
+                else:
+                    escolha.faixas.append((comeco, fim, destino))
+            self.comandos(comandos)
+            fins.append(self.saltar(SALTA))
+        escolha.padrao = self.posicao()
+        self.comandos(ctx.cmd())
+        self.corrigir(fins)
+
+    def visitCmdPara(self, ctx:LAParser.CmdParaContext):
+        simbolo = self.tabela.buscar(ctx.IDENT().getText())
+        variavel = Referencia((simbolo.nome,), (), simbolo.tipo)
+        global_, posicao = self.enderecos[simbolo]
+        inicio = self.rebaixar(ctx.exp_aritmetica1)
+        limite = self.rebaixar(ctx.exp_aritmetica2)
+        self.guardar(variavel, inicio)
+        fixo = None
+        if (self.otimizador and valorDe(limite) is None and limite.tipo in (INTEIRO, REAL)
+                and not (isinstance(limite, Referencia) and not limite.indices)
+                and invariante(limite, ctx.cmd(), simbolo.nome)):
+            # Limite calculado uma vez, numa posição do quadro sem nome
+            fixo = self.funcao.quadro.alocar()
+            self.converter(limite, limite.tipo)
+            self.emitir(GUARDA_L, fixo)
+        teste = self.posicao()
+        self.emitir(CARREGA_G if global_ else CARREGA_L, posicao)
+        if fixo is None:
+            self.expressao(limite)
+        else:
+            self.emitir(CARREGA_L, fixo)
+        self.emitir(MENOR_IGUAL)
+        fim = self.saltar(SALTA_SE_FALSO)
+        self.comandos(ctx.cmd())
+        self.emitir(INCREMENTA_G if global_ else INCREMENTA_L, posicao)
+        self.saltar(SALTA, teste)
+        self.corrigir([fim])
+
+    def visitCmdEnquanto(self, ctx:LAParser.CmdEnquantoContext):
+        condicao = self.rebaixar(ctx.expressao())
+        if self.otimizador and valorDe(condicao) == 0:
+            return
+        teste = self.posicao()
+        falso = self.desviar(condicao)
+        self.comandos(ctx.cmd())
+        self.saltar(SALTA, teste)
+        self.corrigir(falso)
+
+    def visitCmdFaca(self, ctx:LAParser.CmdFacaContext):
+        # Mesma semântica do do/while gerado em C: repete enquanto a condição valer
+        inicio = self.posicao()
+        self.comandos(ctx.cmd())
+        condicao = self.rebaixar(ctx.expressao())
+        if self.otimizador and valorDe(condicao) == 0:
+            return
+        self.expressao(condicao)
+        self.saltar(SALTA_SE_VERDADEIRO, inicio)
+
+    def visitCmdChamada(self, ctx:LAParser.CmdChamadaContext):
+        simbolo = self.tabela.buscar(ctx.IDENT().getText())
+        argumentos = [self.rebaixar(expressao) for expressao in ctx.expressao()]
+        self.chamar(simbolo, argumentos)
+        self.emitir(DESCARTA)
+
+    def visitCmdRetorne(self, ctx:LAParser.CmdRetorneContext):
+        self.converter(self.rebaixar(ctx.expressao()), self.tipoRetorno)
+        self.emitir(RETORNA)
+
+    # Expressões
+
+    def rebaixar(self, ctx):
+        no = self.rebaixador.rebaixar(ctx)
+        if self.otimizador:
+            return self.otimizador.simplificar(no)
+        return no
+
+    def precisao(self, no):
+        """
+        Precisão de um valor numérico no código C: "i" (int), "f" (float, o
+        tipo das variáveis reais), "d" (double, o das constantes reais) ou
+        None se não for numérico.
+        """
+        if isinstance(no, Parenteses):
+            return self.precisao(no.interna)
+        if isinstance(no, Binario):
+            if no.operador in RELACIONAIS or no.operador in ("&&", "||"):
+                return "i"
+            precisoes = (self.precisao(no.esquerda), self.precisao(no.direita))
+            if "d" in precisoes:
+                return "d"
+            if "f" in precisoes:
+                return "f"
+            return "i" if precisoes == ("i", "i") else None
+        if isinstance(no, Unario):
+            if no.operador == "-":
+                return self.precisao(no.operando)
+            if no.operador == "!":
+                return "i"
+        if isinstance(no, Constante) and no.tipo is REAL:
+            return "d"
+        if isinstance(no, Referencia) and no.tipo is REAL:
+            simbolo = self.tabela.buscar(no.nomes[0])
+            return "d" if simbolo.categoria == CONSTANTE else "f"
+        if no.tipo is REAL:
+            return "f"
+        if no.tipo in (INTEIRO, LOGICO):
+            return "i"
+        return None
+
+    def converter(self, no, tipo):
+        """Emite o valor de `no` convertido para uma variável do `tipo`, como numa atribuição em C."""
+        self.expressao(no)
+        precisao = self.precisao(no)
+        if tipo is REAL and precisao != "f":
+            self.emitir(REAL32)
+        elif tipo in (INTEIRO, LOGICO) and precisao in ("f", "d"):
+            self.emitir(TRUNCA)
+        elif isinstance(tipo, Registro):
+            self.emitir(COPIA)
+
+    def expressao(self, no):
+        """Emite o código que deixa o valor de `no` na pilha."""
+        if isinstance(no, Binario):
+            if no.operador in ("&&", "||"):
+                return self.logico(no)
+            self.expressao(no.esquerda)
+            self.expressao(no.direita)
+            if no.operador in COMPARACOES:
+                return self.emitir(COMPARACOES[no.operador])
+            self.emitir(ARITMETICAS[no.operador])
+            if self.precisao(no) == "f":
+                self.emitir(REAL32)
+        elif isinstance(no, Referencia):
+            self.carregar(no)
+        elif isinstance(no, Constante):
+            self.emitir(CONST, self.valorConstante(no.texto, no.tipo))
+        elif isinstance(no, Parenteses):
+            self.expressao(no.interna)
+        elif isinstance(no, Chamada):
+            self.chamar(self.tabela.buscar(no.nome), no.argumentos)
+        elif no.operador == "&":
+            self.endereco(no.operando)
+            self.emitir(ENDERECO)
+        else:
+            self.expressao(no.operando)
+            self.emitir({"-": NEGA, "!": NAO, "*": CONTEUDO}[no.operador])
+
+    def logico(self, no):
+        """`e`/`ou` com curto-circuito, valendo 0 ou 1."""
+        saida = SALTA_SE_FALSO if no.operador == "&&" else SALTA_SE_VERDADEIRO
+        self.expressao(no.esquerda)
+        curto = [self.saltar(saida)]
+        self.expressao(no.direita)
+        curto.append(self.saltar(saida))
+        self.emitir(CONST, 1 if no.operador == "&&" else 0)
+        fim = self.saltar(SALTA)
+        self.corrigir(curto)
+        self.emitir(CONST, 0 if no.operador == "&&" else 1)
+        self.corrigir([fim])
+
+    def desviar(self, condicao):
+        """Emite o teste de uma condição; devolve os saltos a corrigir para onde ela é falsa."""
+        while isinstance(condicao, Parenteses):
+            condicao = condicao.interna
+        if isinstance(condicao, Binario) and condicao.operador == "&&":
+            return self.desviar(condicao.esquerda) + self.desviar(condicao.direita)
+        self.expressao(condicao)
+        return [self.saltar(SALTA_SE_FALSO)]
+
+    def valorConstante(self, texto, tipo):
+        if tipo is LITERAL:
+            return textoC(texto[1:-1])
+        if tipo is REAL:
+            return float(texto)
+        if tipo is LOGICO:
+            return 1 if texto in ("1", "verdadeiro") else 0
+        return inteiroC(texto)
+
+    def chamar(self, simbolo, argumentos):
+        for argumento, parametro in zip(argumentos, simbolo.parametros):
+            self.converter(argumento, parametro.tipo)
+        self.emitir(CHAMA, self.funcoes[simbolo])
+
+    def passos(self, no:Referencia, simbolo):
+        """Campos (índice do campo no registro) e índices de vetor de uma referência, em ordem."""
+        tipo = simbolo.tipo
+        passos = []
+        for nome in no.nomes[1:]:
+            passos.append((CAMPO, list(tipo.campos).index(nome)))
+            tipo = tipo.campos[nome]
+        passos.extend((INDICE, indice) for indice in no.indices)
+        return passos
+
+    def emitirPasso(self, passo):
+        instrucao, argumento = passo
+        if instrucao == CAMPO:
+            self.emitir(CAMPO, argumento)
+        else:
+            self.expressao(argumento)
+            self.emitir(INDICE)
+
+    def carregar(self, no:Referencia):
+        simbolo = self.tabela.buscar(no.nomes[0])
+        if simbolo.categoria == CONSTANTE:
+            return self.emitir(CONST, self.valorConstante(simbolo.valor, simbolo.tipo))
+        global_, posicao = self.enderecos[simbolo]
+        self.emitir(CARREGA_G if global_ else CARREGA_L, posicao)
+        for passo in self.passos(no, simbolo):
+            self.emitirPasso(passo)
+
+    def endereco(self, no:Referencia):
+        """Emite o recipiente (quadro, registro ou vetor) e a chave onde fica o valor de `no`."""
+        simbolo = self.tabela.buscar(no.nomes[0])
+        global_, posicao = self.enderecos[simbolo]
+        passos = self.passos(no, simbolo)
+        if not passos:
+            self.emitir(QUADRO_G if global_ else QUADRO_L)
+            self.emitir(CONST, posicao)
+            return
+        self.emitir(CARREGA_G if global_ else CARREGA_L, posicao)
+        for passo in passos[:-1]:
+            self.emitirPasso(passo)
+        instrucao, argumento = passos[-1]
+        if instrucao == CAMPO:
+            self.emitir(CONST, argumento)
+        else:
+            self.expressao(argumento)
+
+    def guardar(self, alvo:Referencia, valor):
+        global_, posicao = self.enderecos[self.tabela.buscar(alvo.nomes[0])]
+        if len(alvo.nomes) == 1 and not alvo.indices:
+            self.converter(valor, alvo.tipo)
+            self.emitir(GUARDA_G if global_ else GUARDA_L, posicao)
+        else:
+            self.endereco(alvo)
+            self.converter(valor, alvo.tipo)
+            self.emitir(GUARDA_ITEM)
+
+
+class Entrada:
+    """
+    Entrada padrão do programa com a semântica do stdio: scanf pula espaços
+    e quebras de linha antes de um número e deixa o resto da linha, que o
+    próximo gets lê. As linhas são lidas da fonte só quando necessárias.
+    """
+    def __init__(self, fonte, antesDeLer=None):
+        self.fonte = fonte
+        self.antesDeLer = antesDeLer
+        self.texto = ""
+        self.posicao = 0
+
+    def carregar(self):
+        if self.antesDeLer:
+            self.antesDeLer()
+        linha = self.fonte.readline()
+        if not linha:
+            return False
+        self.texto = self.texto[self.posicao:] + linha
+        self.posicao = 0
+        return True
+
+    def numero(self, padrao):
+        """Texto do próximo número (scanf), ou None no fim da entrada ou se o texto não casar."""
+        while True:
+            inicio = ESPACOS.match(self.texto, self.posicao).end()
+            self.posicao = inicio
+            if inicio < len(self.texto):
+                break
+            if not self.carregar():
+                return None
+        casamento = padrao.match(self.texto, self.posicao)
+        if casamento is None:
+            return None
+        self.posicao = casamento.end()
+        return casamento.group()
+
+    def linha(self):
+        """Resto da linha atual, sem a quebra (gets), ou None no fim da entrada."""
+        while self.texto.find("\n", self.posicao) < 0:
+            if not self.carregar():
+                if self.posicao == len(self.texto):
+                    return None
+                resto = self.texto[self.posicao:]
+                self.posicao = len(self.texto)
+                return resto
+        fim = self.texto.index("\n", self.posicao)
+        resto = self.texto[self.posicao:fim]
+        self.posicao = fim + 1
+        return resto
+
+
+class Maquina:
+    """
+    Interpretador do código de um Programa. Cada chamada de subrotina é uma
+    chamada de `executar`, com o quadro das variáveis locais numa lista e
+    uma pilha de operandos própria. A saída é acumulada e escrita em
+    `saida` antes de cada leitura e no fim.
+    """
+    def __init__(self, programa, entrada=None, saida=None):
+        self.programa = programa
+        self.entrada = Entrada(entrada if entrada is not None else sys.stdin, self.descarregar)
+        self.saida = saida if saida is not None else sys.stdout
+        self.pendente = []
+        self.globais = None
+
+    def descarregar(self):
+        if self.pendente:
+            self.saida.write("".join(self.pendente))
+            self.pendente.clear()
+        self.saida.flush()
+
+    def rodar(self, limite=None):
+        """Executa o programa; `limite` (segundos) interrompe com ErroExecucao um programa que não termina."""
+        self.globais = self.programa.globais.novo()
+        principal = self.programa.principal
+        alarme = limite and hasattr(signal, "setitimer")
+        if alarme:
+            def estourar(sinal, quadro):
+                raise ErroExecucao("execucao passou de %gs" % limite)
+            anterior = signal.signal(signal.SIGALRM, estourar)
+            signal.setitimer(signal.ITIMER_REAL, limite)
+        recursao = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursao, 20000))
+        try:
+            self.executar(principal, principal.quadro.novo())
+        except RecursionError:
+            raise ErroExecucao("estouro da pilha de chamadas")
+        except ZeroDivisionError:
+            raise ErroExecucao("divisao inteira por zero")
+        except IndexError:
+            raise ErroExecucao("indice fora dos limites do vetor")
+        except (TypeError, ValueError, OverflowError) as erro:
+            raise ErroExecucao("operacao invalida: " + str(erro))
+        finally:
+            if alarme:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, anterior)
+            sys.setrecursionlimit(recursao)
+            self.descarregar()
+
+    def executar(self, funcao, locais):
+        # Laço de despacho: as instruções mais frequentes são testadas primeiro
+        codigo = funcao.codigo
+        globais = self.globais
+        pilha = []
+        empilha = pilha.append
+        desempilha = pilha.pop
+        pc = 0
+        while True:
+            instrucao = codigo[pc]
+            if instrucao == CARREGA_L:
+                empilha(locais[codigo[pc + 1]])
+                pc += 2
+            elif instrucao == CONST:
+                empilha(codigo[pc + 1])
+                pc += 2
+            elif instrucao == CARREGA_G:
+                empilha(globais[codigo[pc + 1]])
+                pc += 2
+            elif instrucao == GUARDA_L:
+                locais[codigo[pc + 1]] = desempilha()
+                pc += 2
+            elif instrucao == GUARDA_G:
+                globais[codigo[pc + 1]] = desempilha()
+                pc += 2
+            elif instrucao == SALTA_SE_FALSO:
+                pc = pc + 2 if desempilha() else codigo[pc + 1]
+            elif instrucao == SALTA:
+                pc = codigo[pc + 1]
+            elif instrucao == SOMA:
+                direita = desempilha()
+                resultado = pilha[-1] + direita
+                # Entre inteiros, o resultado dá a volta no int de 32 bits (só fora da faixa, para não pagar a chamada)
+                if type(resultado) is int and not -2147483648 <= resultado <= 2147483647:
+                    resultado = inteiro32(resultado)
+                pilha[-1] = resultado
+                pc += 1
+            elif instrucao == SUBTRAI:
+                direita = desempilha()
+                resultado = pilha[-1] - direita
+                if type(resultado) is int and not -2147483648 <= resultado <= 2147483647:
+                    resultado = inteiro32(resultado)
+                pilha[-1] = resultado
+                pc += 1
+            elif instrucao == MULTIPLICA:
+                direita = desempilha()
+                resultado = pilha[-1] * direita
+                if type(resultado) is int and not -2147483648 <= resultado <= 2147483647:
+                    resultado = inteiro32(resultado)
+                pilha[-1] = resultado
+                pc += 1
+            elif instrucao == DIVIDE:
+                direita = desempilha()
+                esquerda = pilha[-1]
+                if type(esquerda) is float or type(direita) is float:
+                    pilha[-1] = dividirReal(esquerda, direita)
+                else:
+                    pilha[-1] = dividir(esquerda, direita, "/")
+                pc += 1
+            elif instrucao == RESTO:
+                direita = desempilha()
+                pilha[-1] = dividir(pilha[-1], direita, "%")
+                pc += 1
+            elif instrucao == MENOR:
+                direita = desempilha()
+                pilha[-1] = pilha[-1] < direita
+                pc += 1
+            elif instrucao == MENOR_IGUAL:
+                direita = desempilha()
+                pilha[-1] = pilha[-1] <= direita
+                pc += 1
+            elif instrucao == MAIOR:
+                direita = desempilha()
+                pilha[-1] = pilha[-1] > direita
+                pc += 1
+            elif instrucao == MAIOR_IGUAL:
+                direita = desempilha()
+                pilha[-1] = pilha[-1] >= direita
+                pc += 1
+            elif instrucao == IGUAL:
+                direita = desempilha()
+                pilha[-1] = pilha[-1] == direita
+                pc += 1
+            elif instrucao == DIFERENTE:
+                direita = desempilha()
+                pilha[-1] = pilha[-1] != direita
+                pc += 1
+            elif instrucao == INDICE:
+                indice = desempilha()
+                if indice < 0:
+                    raise IndexError(indice)
+                pilha[-1] = pilha[-1][indice]
+                pc += 1
+            elif instrucao == CAMPO:
+                pilha[-1] = pilha[-1][codigo[pc + 1]]
+                pc += 2
+            elif instrucao == GUARDA_ITEM:
+                valor = desempilha()
+                chave = desempilha()
+                if chave < 0:
+                    raise IndexError(chave)
+                desempilha()[chave] = valor
+                pc += 1
+            elif instrucao == INCREMENTA_L:
+                locais[codigo[pc + 1]] += 1
+                pc += 2
+            elif instrucao == INCREMENTA_G:
+                globais[codigo[pc + 1]] += 1
+                pc += 2
+            elif instrucao == SALTA_SE_VERDADEIRO:
+                pc = codigo[pc + 1] if desempilha() else pc + 2
+            elif instrucao == NEGA:
+                resultado = -pilha[-1]
+                if type(resultado) is int and not -2147483648 <= resultado <= 2147483647:
+                    resultado = inteiro32(resultado)
+                pilha[-1] = resultado
+                pc += 1
+            elif instrucao == NAO:
+                pilha[-1] = not pilha[-1]
+                pc += 1
+            elif instrucao == REAL32:
+                pilha[-1] = real32(pilha[-1])
+                pc += 1
+            elif instrucao == TRUNCA:
+                pilha[-1] = int(pilha[-1])
+                pc += 1
+            elif instrucao == CHAMA:
+                chamada = codigo[pc + 1]
+                quadro = chamada.quadro.novo()
+                aridade = chamada.aridade
+                if aridade:
+                    quadro[:aridade] = pilha[-aridade:]
+                    del pilha[-aridade:]
+                empilha(self.executar(chamada, quadro))
+                pc += 2
+            elif instrucao == RETORNA:
+                return desempilha()
+            elif instrucao == RETORNA_NADA:
+                return 0
+            elif instrucao == DESCARTA:
+                desempilha()
+                pc += 1
+            elif instrucao == ESCREVE:
+                especificacao, quantidade = codigo[pc + 1]
+                if quantidade:
+                    valores = tuple(pilha[-quantidade:])
+                    del pilha[-quantidade:]
+                else:
+                    valores = ()
+                self.pendente.append(formatarC(especificacao, valores))
+                if len(self.pendente) > 4096:
+                    self.descarregar()
+                pc += 2
+            elif instrucao == ESCOLHE:
+                escolha = codigo[pc + 1]
+                valor = desempilha()
+                pc = escolha.valores.get(valor)
+                if pc is None:
+                    pc = escolha.padrao
+                    for comeco, fim, destino in escolha.faixas:
+                        if comeco <= valor <= fim:
+                            pc = destino
+                            break
+            elif instrucao == QUADRO_L:
+                empilha(locais)
+                pc += 1
+            elif instrucao == QUADRO_G:
+                empilha(globais)
+                pc += 1
+            elif instrucao == ENDERECO:
+                chave = desempilha()
+                pilha[-1] = (pilha[-1], chave)
+                pc += 1
+            elif instrucao == CONTEUDO:
+                recipiente, chave = pilha[-1]
+                pilha[-1] = recipiente[chave]
+                pc += 1
+            elif instrucao == GUARDA_CONTEUDO:
+                valor = desempilha()
+                recipiente, chave = desempilha()
+                recipiente[chave] = valor
+                pc += 1
+            elif instrucao == COPIA:
+                pilha[-1] = copiar(pilha[-1])
+                pc += 1
+            else:
+                # Leituras: o valor só muda se o scanf/gets converter alguma coisa
+                chave = desempilha()
+                recipiente = desempilha()
+                if instrucao == LE_INTEIRO:
+                    texto = self.entrada.numero(NUMERO_INTEIRO)
+                    valor = None if texto is None else int(texto)
+                elif instrucao == LE_REAL:
+                    texto = self.entrada.numero(NUMERO_REAL)
+                    valor = None if texto is None else real32(float(texto))
+                elif instrucao == LE_LINHA:
+                    valor = self.entrada.linha()
+                else:
+                    raise ValueError("instrucao desconhecida %r" % instrucao)
+                if valor is not None:
+                    recipiente[chave] = valor
+                pc += 1
+
+
+def traduzir(texto, otimizacao=0):
+    """
+    Analisa o programa LA como o compilador (mesmos diagnósticos) e, se ele
+    estiver correto, traduz para o código da máquina. Lança ErroCompilacao
+    com a saída do compilador quando houver diagnósticos.
+    """
+    saida = Emissor()
+    lexer = LexerRapido(InputStream(texto), saida)
+    parser = LAParser(CommonTokenStream(lexer), saida)
+    with recursaoAmpliada():
+        arvore, _ = analisar(parser)
+        lexer.addErrorListener(LexerErrorListener(saida))
+        parser.addErrorListener(ParserErrorListener(saida))
+        arvore = compactar(arvore)
+        # A análise semântica é a do Generator; o código C que ele produz é descartado
+        visitor = Visitor(Emissor())
+        Generator(visitor, Emissor(), otimizacao).visit(arvore)
+        if not visitor.outfile.vazio():
+            raise ErroCompilacao(visitor.outfile.valor() + "Fim da compilacao\n")
+        return CompiladorBytecode(otimizacao).compilar(arvore)
+
+
+def rodarTexto(texto, entrada="", otimizacao=0, limite=None):
+    """Traduz e executa um programa LA com a entrada dada como texto; devolve a saída do programa."""
+    saida = io.StringIO()
+    Maquina(traduzir(texto, otimizacao), io.StringIO(entrada), saida).rodar(limite)
+    return saida.getvalue()
+
+
+def desmontar(funcao):
+    """Listagem legível do código de uma subrotina."""
+    linhas = []
+    pc = 0
+    codigo = funcao.codigo
+    while pc < len(codigo):
+        instrucao = codigo[pc]
+        if instrucao in COM_ARGUMENTO:
+            linhas.append("%5d  %-20s %r" % (pc, NOMES[instrucao], codigo[pc + 1]))
+            pc += 2
+        else:
+            linhas.append("%5d  %s" % (pc, NOMES[instrucao]))
+            pc += 1
+    return "\n".join(linhas)
+
+
+# Estouro do int nas operações entre inteiros, comparado com o executável do gcc no benchmark
+PROGRAMA_ESTOURO = """
+algoritmo
+  declare x, y: inteiro
+  leia(x)
+  x <- x - 1
+  x <- -x
+  escreva(x, "\\n")
+  y <- 2147483647
+  y <- y + 1
+  escreva(y, " ", y - 1, "\\n")
+  y <- 46341
+  escreva(y * y, " ", -y * 46341 * 2, "\\n")
+fim_algoritmo
+"""
+
+# Programa da medição de desempenho: laços, vetores, registros, chamadas e reais
+PROGRAMA_BENCHMARK = """
+tipo ponto: registro
+  x, y: real
+fim_registro
+declare v[%(tamanho)d]: inteiro
+
+funcao fib(n: inteiro): inteiro
+  se n < 2 entao
+    retorne n
+  fim_se
+  retorne fib(n - 1) + fib(n - 2)
+fim_funcao
+
+algoritmo
+  declare i, j, t, soma, rodada: inteiro
+  declare p: ponto
+  declare acumulado: real
+  para rodada <- 1 ate %(rodadas)d faca
+    para i <- 0 ate %(tamanho)d - 1 faca
+      v[i] <- (i * 7919 + rodada) %% 1000
+    fim_para
+    para i <- 0 ate %(tamanho)d - 2 faca
+      para j <- 0 ate %(tamanho)d - 2 - i faca
+        se v[j] > v[j + 1] entao
+          t <- v[j]
+          v[j] <- v[j + 1]
+          v[j + 1] <- t
+        fim_se
+      fim_para
+    fim_para
+    soma <- 0
+    i <- 0
+    enquanto i < %(tamanho)d faca
+      caso v[i] %% 4 seja
+        0: soma <- soma + v[i]
+        1..2: soma <- soma - 1
+      senao
+        soma <- soma + 2
+      fim_caso
+      i <- i + 1
+    fim_enquanto
+    p.x <- soma / 3.0
+    p.y <- p.x * 0.5
+    acumulado <- acumulado + p.y
+    escreva(rodada, " ", soma, " ", fib(%(fib)d), "\\n")
+  fim_para
+  escreva(acumulado, "\\n")
+fim_algoritmo
+"""
+
+
+def benchmark(arquivos, repeticoes, gcc):
+    """Compara a execução pela máquina com o caminho gcc (tradução para C, gcc e executável), caso a caso."""
+    import tempfile
+    import subprocess
+    from compilador import compilarTexto
+    from conformidade import construir
+    import os
+    casos = [(os.path.basename(arquivo), open(arquivo, encoding="utf-8").read(), entrada) for arquivo, entrada in arquivos]
+    casos.append(("benchmark", PROGRAMA_BENCHMARK % {"tamanho": 300, "rodadas": 4, "fib": 20}, ""))
+    casos.append(("estouro_inteiro", PROGRAMA_ESTOURO, "-2147483647\n"))
+    sys.stdout.write("%-45s %10s %10s %10s | %10s %10s  %s\n" % (
+        "programa", "traducao", "gcc", "execucao", "bytecode", "maquina", "vazao"))
+    for nome, texto, entrada in casos:
+        tempos = {}
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            codigo = compilarTexto(texto)
+            traducao = time.perf_counter() - inicio
+            # Um diretório novo por repetição: o gcc nunca vem do cache
+            with tempfile.TemporaryDirectory() as binarios:
+                inicio = time.perf_counter()
+                binario, _ = construir(codigo, gcc, binarios)
+                compilacao = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                esperado = subprocess.run([binario], input=entrada.encode("utf-8"), capture_output=True).stdout
+                execucao = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            programa = traduzir(texto)
+            bytecode = time.perf_counter() - inicio
+            saida = io.StringIO()
+            inicio = time.perf_counter()
+            Maquina(programa, io.StringIO(entrada), saida).rodar()
+            maquina = time.perf_counter() - inicio
+            for chave, valor in (("traducao", traducao), ("gcc", compilacao), ("execucao", execucao),
+                                 ("bytecode", bytecode), ("maquina", maquina)):
+                tempos[chave] = min(tempos.get(chave, valor), valor)
+            if saida.getvalue().encode("utf-8") != esperado:
+                sys.stdout.write("DIFERENCA %s\n" % nome)
+        caminhoGcc = tempos["traducao"] + tempos["gcc"] + tempos["execucao"]
+        caminhoMaquina = tempos["bytecode"] + tempos["maquina"]
+        sys.stdout.write("%-45s %8.1fms %8.1fms %8.1fms | %8.1fms %8.1fms  %.1fx %s\n" % (
+            nome, tempos["traducao"] * 1000, tempos["gcc"] * 1000, tempos["execucao"] * 1000,
+            tempos["bytecode"] * 1000, tempos["maquina"] * 1000,
+            caminhoGcc / caminhoMaquina if caminhoGcc > caminhoMaquina else caminhoMaquina / caminhoGcc,
+            "mais rapida" if caminhoGcc > caminhoMaquina else "mais lenta"))
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Executa um programa LA direto numa maquina de pilha, sem gcc")
+    argumentos.add_argument("entrada", nargs="?", help="programa LA")
+    argumentos.add_argument("--dados", help="arquivo lido pelo programa (padrao: a entrada padrao)")
+    argumentos.add_argument("-O", dest="otimizacao", type=int, choices=[0, 1], default=0,
+                            help="aplica as otimizacoes de main.py -O1 antes de gerar o codigo da maquina")
+    argumentos.add_argument("--listar", action="store_true", help="mostra o codigo da maquina em vez de executar")
+    argumentos.add_argument("--benchmark", action="store_true",
+                            help="compara com o caminho gcc nos casos da T5 e num programa de laco intenso")
+    argumentos.add_argument("-n", "--repeticoes", type=int, default=3)
+    argumentos.add_argument("--gcc", default="gcc")
+    args = argumentos.parse_args()
+
+    if args.benchmark:
+        import glob
+        import os.path
+        diretorio = "casos-de-teste/5.casos_teste_t5"
+        arquivos = []
+        for programa in sorted(glob.glob(os.path.join(diretorio, "1.entrada", "*"))):
+            with open(os.path.join(diretorio, "3.entrada_execucao", os.path.basename(programa)), encoding="utf-8") as dados:
+                arquivos.append((programa, dados.read()))
+        benchmark(arquivos, args.repeticoes, args.gcc)
+        return 0
+    if args.entrada is None:
+        argumentos.error("informe o programa LA")
+
+    with open(args.entrada, encoding="utf-8") as fonte:
+        texto = fonte.read()
+    try:
+        programa = traduzir(texto, args.otimizacao)
+    except ErroCompilacao as erro:
+        sys.stdout.write(str(erro))
+        return 1
+    if args.listar:
+        for funcao in programa.funcoes + [programa.principal]:
+            sys.stdout.write(funcao.nome + ":\n" + desmontar(funcao) + "\n")
+        return 0
+    dados = open(args.dados, encoding="utf-8") if args.dados else sys.stdin
+    try:
+        Maquina(programa, dados).rodar()
+    except ErroExecucao as erro:
+        sys.stderr.write("erro de execucao: %s\n" % erro)
+        return 1
+    finally:
+        if args.dados:
+            dados.close()
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as error:
+        logging.error(error)
+        sys.exit(1)
@@ -0,0 +1,247 @@
+import math
+from Parser.LAParser import LAParser
+from simbolos import INTEIRO, REAL, LOGICO, CONSTANTE
+from expressoes import Constante, Referencia, Chamada, Parenteses, Unario, Binario, RELACIONAIS
+
+# Faixa do int de 32 bits do C: resultados fora dela não são dobrados, pois o estouro é indefinido
+MENOR_INTEIRO = -2 ** 31
+MAIOR_INTEIRO = 2 ** 31 - 1
+
+
+def inteiroC(texto):
+    """Valor de um literal inteiro como o C o lê (com zero à esquerda é octal); None se inválido."""
+    try:
+        if len(texto) > 1 and texto.startswith("0"):
+            return int(texto, 8)
+        return int(texto)
+    except ValueError:
+        return None
+
+
+def valorDe(no):
+    """Valor Python de uma constante inteira, real ou lógica (inclusive negada); None se não for uma."""
+    if isinstance(no, Unario) and no.operador == "-":
+        valor = valorDe(no.operando)
+        return None if valor is None else -valor
+    if not isinstance(no, Constante):
+        return None
+    if no.tipo is INTEIRO or no.tipo is LOGICO:
+        return inteiroC(no.texto)
+    if no.tipo is REAL:
+        return float(no.texto)
+    return None
+
+
+def constante(valor, tipo):
+    """Nó com o valor dado, ou None se ele não puder ser escrito em C com o mesmo significado."""
+    if tipo is LOGICO:
+        return Constante("1" if valor else "0", LOGICO)
+    if tipo is INTEIRO:
+        if not MENOR_INTEIRO <= valor <= MAIOR_INTEIRO:
+            return None
+        texto = str(abs(valor))
+    elif tipo is REAL:
+        if not math.isfinite(valor):
+            return None
+        # repr dá o menor texto que volta ao mesmo double, que é o tipo das constantes reais do C
+        texto = repr(abs(valor))
+    else:
+        return None
+    if valor < 0 or (tipo is REAL and math.copysign(1.0, valor) < 0):
+        return Unario("-", Constante(texto, tipo), tipo)
+    return Constante(texto, tipo)
+
+
+def dividir(esquerda, direita, operador):
+    """Divisão e resto inteiros do C, que truncam em direção a zero."""
+    quociente = abs(esquerda) // abs(direita)
+    if (esquerda < 0) != (direita < 0):
+        quociente = -quociente
+    return quociente if operador == "/" else esquerda - direita * quociente
+
+
+def puro(no):
+    """Se a expressão pode ser avaliada (ou deixar de ser) sem efeitos colaterais: não chama funções."""
+    if isinstance(no, Chamada):
+        return False
+    if isinstance(no, Binario):
+        return puro(no.esquerda) and puro(no.direita)
+    if isinstance(no, Unario):
+        return puro(no.operando)
+    if isinstance(no, Parenteses):
+        return puro(no.interna)
+    if isinstance(no, Referencia):
+        return all(puro(indice) for indice in no.indices)
+    return True
+
+
+def booleano(no):
+    """Se o valor da expressão em C é sempre 0 ou 1."""
+    if isinstance(no, Parenteses):
+        return booleano(no.interna)
+    if isinstance(no, Binario):
+        return no.operador in RELACIONAIS or no.operador in ("&&", "||")
+    if isinstance(no, Unario):
+        return no.operador == "!"
+    return isinstance(no, Constante) and no.tipo is LOGICO
+
+
+class Otimizador:
+    """
+    Simplifica a representação intermediária das expressões (-O1): dobra as
+    operações entre constantes com a aritmética do C, troca as referências a
+    constantes numéricas e lógicas declaradas com `constante` pelo seu valor
+    e corta os operandos de `e`/`ou` que não mudam o resultado.
+
+    `buscar(nome)` dá o símbolo visível com esse nome no ponto da tradução.
+    """
+    def __init__(self, buscar):
+        self.buscar = buscar
+
+    def simplificar(self, no):
+        if isinstance(no, Binario):
+            return self.binario(no)
+        if isinstance(no, Unario):
+            return self.unario(no)
+        if isinstance(no, Parenteses):
+            interna = self.simplificar(no.interna)
+            if valorDe(interna) is not None:
+                return interna
+            return Parenteses(interna)
+        if isinstance(no, Referencia):
+            return self.referencia(no)
+        if isinstance(no, Chamada):
+            return Chamada(no.nome, [self.simplificar(argumento) for argumento in no.argumentos], no.tipo)
+        return no
+
+    def indices(self, no:Referencia):
+        """A mesma referência com os índices simplificados (para alvos de atribuição)."""
+        if not no.indices:
+            return no
+        return Referencia(no.nomes, tuple(self.simplificar(indice) for indice in no.indices), no.tipo)
+
+    def referencia(self, no:Referencia):
+        if len(no.nomes) == 1 and not no.indices:
+            simbolo = self.buscar(no.nomes[0])
+            if simbolo is not None and simbolo.categoria == CONSTANTE and simbolo.tipo in (INTEIRO, REAL, LOGICO):
+                if simbolo.tipo is LOGICO:
+                    valor = simbolo.valor == "verdadeiro"
+                elif simbolo.tipo is INTEIRO:
+                    valor = inteiroC(simbolo.valor)
+                else:
+                    valor = float(simbolo.valor)
+                substituto = None if valor is None else constante(valor, simbolo.tipo)
+                if substituto is not None:
+                    return substituto
+        return self.indices(no)
+
+    def unario(self, no:Unario):
+        operando = self.simplificar(no.operando)
+        valor = valorDe(operando)
+        if valor is not None:
+            if no.operador == "!":
+                return constante(not valor, LOGICO)
+            if no.operador == "-" and operando.tipo in (INTEIRO, REAL):
+                dobrado = constante(-valor, operando.tipo)
+                if dobrado is not None:
+                    return dobrado
+        return Unario(no.operador, operando, no.tipo)
+
+    def binario(self, no:Binario):
+        esquerda = self.simplificar(no.esquerda)
+        direita = self.simplificar(no.direita)
+        operador = no.operador
+        a = valorDe(esquerda)
+        b = valorDe(direita)
+        if operador in ("&&", "||"):
+            return self.logico(no, esquerda, direita, a, b)
+        if a is not None and b is not None and no.tipo is not None:
+            dobrado = self.dobrar(operador, a, b, no.tipo, esquerda.tipo is INTEIRO and direita.tipo is INTEIRO)
+            if dobrado is not None:
+                return dobrado
+        return Binario(operador, esquerda, direita, no.tipo)
+
+    def dobrar(self, operador, a, b, tipo, inteiros):
+        if operador in RELACIONAIS:
+            resultado = {"==": a == b, "!=": a != b, "<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[operador]
+            return constante(resultado, LOGICO)
+        if operador in ("/", "%"):
+            # Divisão por zero e resto de reais ficam para o programa
+            if b == 0 or (operador == "%" and not inteiros):
+                return None
+            if not inteiros:
+                return constante(a / b, REAL)
+            return constante(dividir(a, b, operador), INTEIRO)
+        if operador == "+":
+            resultado = a + b
+        elif operador == "-":
+            resultado = a - b
+        elif operador == "*":
+            resultado = a * b
+        else:
+            return None
+        return constante(resultado if inteiros else float(resultado), INTEIRO if inteiros else REAL)
+
+    def logico(self, no, esquerda, direita, a, b):
+        curto = 0 if no.operador == "&&" else 1
+        if a is not None:
+            # 0 && x e 1 || x não avaliam x; 1 && x e 0 || x valem x normalizado para 0 ou 1
+            if bool(a) == bool(curto):
+                return constante(curto, LOGICO)
+            if b is not None:
+                return constante(b, LOGICO)
+            if booleano(direita):
+                return direita
+        elif b is not None and puro(esquerda):
+            if bool(b) == bool(curto):
+                return constante(curto, LOGICO)
+            if booleano(esquerda):
+                return esquerda
+        return Binario(no.operador, esquerda, direita, no.tipo)
+
+
+def nomesLidos(no, nomes):
+    """Acrescenta a `nomes` as variáveis lidas pela expressão; False se ela lê memória por ponteiro."""
+    if isinstance(no, Referencia):
+        nomes.add(no.nomes[0])
+        return all(nomesLidos(indice, nomes) for indice in no.indices)
+    if isinstance(no, Binario):
+        return nomesLidos(no.esquerda, nomes) and nomesLidos(no.direita, nomes)
+    if isinstance(no, Unario):
+        return no.operador != "*" and nomesLidos(no.operando, nomes)
+    if isinstance(no, Parenteses):
+        return nomesLidos(no.interna, nomes)
+    return not isinstance(no, Chamada)
+
+
+def invariante(limite, comandos, variavel):
+    """
+    Se o limite de um `para` tem o mesmo valor em todas as iterações: ele
+    não chama funções nem lê por ponteiro, e nenhum comando do laço chama
+    subrotinas, escreve por ponteiro ou altera (por atribuição, leitura ou
+    outro `para`) uma das variáveis que ele lê, nem a própria `variavel`.
+    """
+    nomes = set()
+    if not nomesLidos(limite, nomes) or variavel in nomes:
+        return False
+    pendentes = list(comandos)
+    while pendentes:
+        ctx = pendentes.pop()
+        # Pela regra, e não pela classe: vale para os contextos do ANTLR e para os nós da árvore compacta
+        regra = ctx.getRuleIndex()
+        if regra == LAParser.RULE_cmdChamada:
+            return False
+        if regra == LAParser.RULE_parcela_unario and ctx.IDENT():
+            return False
+        if regra == LAParser.RULE_cmdAtribuicao:
+            if ctx.POINTER() or ctx.identificador().IDENT(0).getText() in nomes:
+                return False
+        elif regra == LAParser.RULE_cmdLeia:
+            if any(identificador.IDENT(0).getText() in nomes for identificador in ctx.identificador()):
+                return False
+        elif regra == LAParser.RULE_cmdPara:
+            if ctx.IDENT().getText() in nomes:
+                return False
+        if ctx.children:
+            pendentes.extend(filho for filho in ctx.children if hasattr(filho, "children"))
+    return True
@@ -0,0 +1,221 @@
+import sys
+import time
+import argparse
+
+# Prelúdio de E/S do código C gerado com --es-rapida (Generator com esRapida=True). A saída vai
+# para um buffer grande (só quando não é um terminal) e a leitura não passa pelo scanf nem pelo
+# gets: as linhas da entrada são carregadas com fgets num buffer próprio e os números e linhas são
+# tirados dele com as mesmas regras da máquina de pilha (maquina.Entrada): espaços pulados antes
+# de um número, destino inalterado se o texto não for um número ou a entrada tiver acabado, e o
+# resto da linha para a leitura de literal seguinte. As linhas são limitadas ao tamanho do destino.
+INCLUDES = ("string.h", "unistd.h")
+
+CODIGO = r"""
+static char _la_saida[1 << 16];
+static char *_la_texto;
+static size_t _la_tamanho, _la_posicao, _la_capacidade;
+static int _la_interativa;
+
+static void _la_iniciar(void) {
+    _la_capacidade = 4096;
+    _la_texto = malloc(_la_capacidade);
+    _la_texto[0] = '\0';
+    /* Com um terminal na entrada, a saida pendente e escrita antes de cada leitura */
+    _la_interativa = isatty(0);
+    if (!isatty(1))
+        setvbuf(stdout, _la_saida, _IOFBF, sizeof _la_saida);
+}
+
+/* Descarta o que ja foi lido e acrescenta a proxima linha da entrada; 0 no fim da entrada */
+static int _la_carregar(void) {
+    size_t inicio;
+    if (_la_interativa)
+        fflush(stdout);
+    _la_tamanho -= _la_posicao;
+    memmove(_la_texto, _la_texto + _la_posicao, _la_tamanho);
+    _la_posicao = 0;
+    inicio = _la_tamanho;
+    for (;;) {
+        if (_la_capacidade - _la_tamanho < 2) {
+            _la_capacidade *= 2;
+            _la_texto = realloc(_la_texto, _la_capacidade);
+        }
+        _la_texto[_la_tamanho] = '\0';
+        if (!fgets(_la_texto + _la_tamanho, (int) (_la_capacidade - _la_tamanho), stdin))
+            return _la_tamanho > inicio;
+        _la_tamanho += strlen(_la_texto + _la_tamanho);
+        if (_la_tamanho > 0 && _la_texto[_la_tamanho - 1] == '\n')
+            return 1;
+    }
+}
+
+static int _la_espaco(char c) {
+    return c == ' ' || c == '\t' || c == '\n' || c == '\r' || c == '\v' || c == '\f';
+}
+
+static int _la_digito(char c) {
+    return c >= '0' && c <= '9';
+}
+
+/* Pula espacos e quebras de linha antes de um numero; 0 no fim da entrada */
+static int _la_pularEspacos(void) {
+    for (;;) {
+        while (_la_posicao < _la_tamanho && _la_espaco(_la_texto[_la_posicao]))
+            _la_posicao++;
+        if (_la_posicao < _la_tamanho)
+            return 1;
+        if (!_la_carregar())
+            return 0;
+    }
+}
+
+/* scanf("%d") */
+static void _la_leiaInteiro(void *destino) {
+    char *inicio, *fim;
+    if (!_la_pularEspacos())
+        return;
+    inicio = fim = _la_texto + _la_posicao;
+    if (*fim == '+' || *fim == '-')
+        fim++;
+    if (!_la_digito(*fim))
+        return;
+    while (_la_digito(*fim))
+        fim++;
+    *(int *) destino = (int) strtol(inicio, NULL, 10);
+    _la_posicao = fim - _la_texto;
+}
+
+/* scanf("%f"): sinal, digitos com ponto e expoente opcionais, arredondados pelo strtof */
+static void _la_leiaReal(void *destino) {
+    char *inicio, *fim, *expoente, guardado;
+    if (!_la_pularEspacos())
+        return;
+    inicio = fim = _la_texto + _la_posicao;
+    if (*fim == '+' || *fim == '-')
+        fim++;
+    if (_la_digito(*fim)) {
+        while (_la_digito(*fim))
+            fim++;
+        if (*fim == '.')
+            fim++;
+    } else if (*fim == '.' && _la_digito(fim[1])) {
+        fim++;
+    } else {
+        return;
+    }
+    while (_la_digito(*fim))
+        fim++;
+    if (*fim == 'e' || *fim == 'E') {
+        expoente = fim + 1;
+        if (*expoente == '+' || *expoente == '-')
+            expoente++;
+        if (_la_digito(*expoente)) {
+            fim = expoente;
+            while (_la_digito(*fim))
+                fim++;
+        }
+    }
+    guardado = *fim;
+    *fim = '\0';
+    *(float *) destino = strtof(inicio, NULL);
+    *fim = guardado;
+    _la_posicao = fim - _la_texto;
+}
+
+/* gets limitado ao tamanho do destino: o resto da linha atual, sem a quebra; o que nao cabe e descartado */
+static void _la_leiaLinha(char *destino, size_t tamanho) {
+    char *quebra;
+    size_t comprimento;
+    while ((quebra = memchr(_la_texto + _la_posicao, '\n', _la_tamanho - _la_posicao)) == NULL) {
+        if (!_la_carregar()) {
+            if (_la_posicao == _la_tamanho)
+                return;
+            quebra = _la_texto + _la_tamanho;
+            break;
+        }
+    }
+    comprimento = quebra - (_la_texto + _la_posicao);
+    if (comprimento >= tamanho)
+        comprimento = tamanho - 1;
+    memcpy(destino, _la_texto + _la_posicao, comprimento);
+    destino[comprimento] = '\0';
+    _la_posicao = quebra - _la_texto;
+    if (_la_posicao < _la_tamanho)
+        _la_posicao++;
+}
+"""
+
+
+def emitir(emissor):
+    """Escreve as funções do prelúdio em `emissor` (um Emissor), linha a linha, no nível de recuo zero."""
+    for linha in CODIGO.strip("\n").split("\n"):
+        emissor.linha(linha)
+
+
+# Programa de E/S intensa: lê uma tabela com um código, um preço e um nome por linha e escreve cada registro
+PROGRAMA_BENCHMARK = """\
+algoritmo
+  declare quantidade, i, codigo, total: inteiro
+  declare preco, soma: real
+  declare nome: literal
+  leia(quantidade)
+  total <- 0
+  soma <- 0.0
+  para i <- 1 ate quantidade faca
+    leia(codigo, preco)
+    leia(nome)
+    total <- total + codigo
+    soma <- soma + preco
+    escreva(i, ": ", codigo, " ", preco, " ", nome, "\\n")
+    escreva("---\\n")
+  fim_para
+  escreva(total, " ", soma, "\\n")
+fim_algoritmo
+"""
+
+
+def dadosBenchmark(quantidade):
+    """Entrada do PROGRAMA_BENCHMARK com `quantidade` registros."""
+    linhas = [str(quantidade)]
+    for i in range(quantidade):
+        linhas.append("%d %d.%02d produto numero %d" % (i * 7 % 1000, i % 500, i % 100, i))
+    return "\n".join(linhas) + "\n"
+
+
+def benchmark(quantidade, repeticoes, gcc):
+    """Executa o PROGRAMA_BENCHMARK compilado com o stdio e com o prelúdio, conferindo que as saídas são iguais."""
+    import tempfile
+    import subprocess
+    from compilador import compilarTexto
+    from conformidade import construir
+    entrada = dadosBenchmark(quantidade).encode("utf-8")
+    sys.stdout.write("%d registros, %d bytes de entrada\n" % (quantidade, len(entrada)))
+    saidas = {}
+    with tempfile.TemporaryDirectory() as binarios:
+        for nome, esRapida in (("stdio", False), ("preludio", True)):
+            binario, _ = construir(compilarTexto(PROGRAMA_BENCHMARK, esRapida=esRapida), gcc, binarios)
+            melhor = None
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                saidas[nome] = subprocess.run([binario], input=entrada, capture_output=True).stdout
+                tempo = time.perf_counter() - inicio
+                melhor = tempo if melhor is None else min(melhor, tempo)
+            sys.stdout.write("%-10s %8.1fms  %d bytes de saida\n" % (nome, melhor * 1000, len(saidas[nome])))
+    if saidas["stdio"] != saidas["preludio"]:
+        sys.stdout.write("DIFERENCA entre as saidas\n")
+        return 1
+    return 0
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Mede o preludio de E/S (main.py --es-rapida) contra o stdio num programa de E/S intensa")
+    argumentos.add_argument("--quantidade", type=int, default=200000, help="registros lidos pelo programa")
+    argumentos.add_argument("-n", "--repeticoes", type=int, default=3)
+    argumentos.add_argument("--gcc", default="gcc")
+    args = argumentos.parse_args()
+    return benchmark(args.quantidade, args.repeticoes, args.gcc)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import os
+import sys
+import stat
+import logging
+import signal
+import tempfile
+import socketserver
+import aquecimento
+
+
+def diretorioSocket():
+    """
+    Diretório privado do usuário para o socket: $XDG_RUNTIME_DIR quando
+    definido, senão um diretório por usuário no temporário do sistema, que
+    servir() cria com permissão 0700.
+    """
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return os.environ["XDG_RUNTIME_DIR"]
+    usuario = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return os.path.join(tempfile.gettempdir(), "la-compilador-%s" % usuario)
+
+
+SOCKET_PADRAO = os.environ.get("LA_SOCKET") or os.path.join(diretorioSocket(), "la-compilador.sock")
+
+
+def atender(compilar, linha):
+    """
+    Processa um pedido do modo servidor.
+
+    Cada pedido é uma linha no formato "entrada<TAB>saida". A resposta é
+    "ok" quando a compilação termina ou "erro <mensagem>" quando o pipeline
+    lança uma exceção (o mesmo caso em que main.py registra o erro no log).
+    Cada pedido é isolado dos anteriores (aquecimento.preservar), então a
+    resposta e as mensagens são as mesmas de um main.py novo.
+    """
+    partes = linha.rstrip("\r\n").split("\t")
+    if len(partes) != 2:
+        return "erro pedido invalido, esperado: entrada<TAB>saida"
+    try:
+        with aquecimento.preservar():
+            compilar(partes[0], partes[1])
+    except Exception as error:
+        logging.error(error)
+        return "erro " + str(error).replace("\n", " ")
+    return "ok"
+
+
+class PedidoHandler(socketserver.StreamRequestHandler):
+    """
+    Atende uma conexão do socket Unix; uma conexão pode enviar vários pedidos.
+    """
+    def handle(self):
+        for linha in self.rfile:
+            linha = linha.decode("utf-8")
+            if not linha.strip():
+                break
+            resposta = atender(self.server.compilar, linha)
+            self.wfile.write((resposta + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def prepararSocket(caminho_socket):
+    """
+    Cria o diretório privado padrão quando necessário e remove um socket
+    antigo deixado no caminho. Lança OSError se o diretório padrão não for
+    exclusivo do usuário ou se o caminho existir e não for um socket do
+    próprio usuário, em vez de apagar o arquivo de outra pessoa.
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho_socket))
+    if diretorio == os.path.abspath(diretorioSocket()):
+        os.makedirs(diretorio, mode=0o700, exist_ok=True)
+        info = os.lstat(diretorio)
+        if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+                or stat.S_IMODE(info.st_mode) & 0o077):
+            raise OSError("diretorio do socket nao e privado do usuario: " + diretorio)
+    try:
+        info = os.lstat(caminho_socket)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise OSError("caminho ja existe e nao e um socket do usuario: " + caminho_socket)
+    os.unlink(caminho_socket)
+
+
+def servir(compilar, caminho_socket=None):
+    """
+    Mantém o interpretador, o runtime do ANTLR e os ATN/DFA do LALexer e do
+    LAParser carregados entre compilações.
+
+    Sem socket, lê pedidos da entrada padrão e responde na saída padrão.
+    Com socket, escuta no caminho informado até ser interrompido. Os pedidos
+    são atendidos um de cada vez, pois o cache de DFA do ANTLR é compartilhado.
+    """
+    if caminho_socket is None:
+        for linha in sys.stdin:
+            if not linha.strip():
+                continue
+            sys.stdout.write(atender(compilar, linha) + "\n")
+            sys.stdout.flush()
+        return
+
+    prepararSocket(caminho_socket)
+    # Só o dono conecta: o socket já nasce com 0600, sem janela entre bind e chmod
+    mascara = os.umask(0o177)
+    try:
+        servidor = socketserver.UnixStreamServer(caminho_socket, PedidoHandler)
+    finally:
+        os.umask(mascara)
+    with servidor:
+        os.chmod(caminho_socket, 0o600)
+        servidor.compilar = compilar
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(caminho_socket)
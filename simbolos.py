@@ -0,0 +1,190 @@
+import sys
+
+# Categorias de símbolos
+VARIAVEL = "variavel"
+PARAMETRO = "parametro"
+CONSTANTE = "constante"
+FUNCAO = "funcao"
+PROCEDIMENTO = "procedimento"
+TIPO = "tipo"
+
+
+class Tipo:
+    """
+    Tipo canônico da linguagem LA. As instâncias só são criadas pelas funções
+    fábrica deste módulo, que as internam: dois tipos iguais são sempre o
+    mesmo objeto e podem ser comparados por identidade (`is`, `in`).
+    """
+    __slots__ = ()
+
+    def semPonteiro(self):
+        """Tipo apontado, removendo todos os níveis de ponteiro."""
+        return self
+
+
+class Basico(Tipo):
+    """Tipo escalar identificado pelo nome (inteiro, real, literal, logico ou um nome desconhecido)."""
+    __slots__ = ("nome",)
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __repr__(self):
+        return self.nome
+
+
+class Ponteiro(Tipo):
+    __slots__ = ("alvo",)
+
+    def __init__(self, alvo):
+        self.alvo = alvo
+
+    def semPonteiro(self):
+        return self.alvo.semPonteiro()
+
+    def __repr__(self):
+        return "^" + repr(self.alvo)
+
+
+class Registro(Tipo):
+    """Registro com campos nomeados; `nome` é o nome do `tipo` que o declarou, se houver."""
+    __slots__ = ("nome", "campos")
+
+    def __init__(self, nome, campos):
+        self.nome = nome
+        self.campos = campos
+
+    def __repr__(self):
+        return self.nome or "registro"
+
+
+class Vetor(Tipo):
+    """
+    Variável vetor: tipo do elemento e limites de cada dimensão. Ocupa o
+    mesmo espaço qualquer que seja o tamanho declarado.
+    """
+    __slots__ = ("elemento", "dimensoes")
+
+    def __init__(self, elemento, dimensoes):
+        self.elemento = elemento
+        self.dimensoes = dimensoes
+
+    def __repr__(self):
+        return repr(self.elemento) + "".join("[%s]" % dimensao for dimensao in self.dimensoes)
+
+
+_internados = {}
+
+
+def _internar(chave, construtor):
+    tipo = _internados.get(chave)
+    if tipo is None:
+        tipo = _internados[chave] = construtor()
+    return tipo
+
+
+def basico(nome):
+    return _internar((Basico, nome), lambda: Basico(sys.intern(nome)))
+
+
+def ponteiro(alvo):
+    return _internar((Ponteiro, alvo), lambda: Ponteiro(alvo))
+
+
+def registro(campos, nome=None):
+    """
+    Registro com os campos informados (dict nome -> Tipo). Registros são
+    nominais: o mesmo conjunto de campos sob nomes de `tipo` diferentes gera
+    tipos diferentes.
+    """
+    return _internar((Registro, nome, tuple(campos.items())), lambda: Registro(nome, dict(campos)))
+
+
+def vetor(elemento, dimensoes):
+    return _internar((Vetor, elemento, tuple(dimensoes)), lambda: Vetor(elemento, tuple(dimensoes)))
+
+
+INTEIRO = basico("inteiro")
+REAL = basico("real")
+LITERAL = basico("literal")
+LOGICO = basico("logico")
+BASICOS = {"inteiro": INTEIRO, "real": REAL, "literal": LITERAL, "logico": LOGICO}
+
+
+class Simbolo:
+    """
+    Entrada da tabela de símbolos.
+
+    Para funções e procedimentos, `parametros` guarda os símbolos dos
+    parâmetros em ordem e `escopo` os símbolos locais (parâmetros e
+    declarações), para que passagens posteriores possam reabri-lo.
+    """
+    __slots__ = ("nome", "categoria", "tipo", "valor", "parametros", "escopo")
+
+    def __init__(self, nome, categoria, tipo=None, valor=None):
+        self.nome = sys.intern(nome)
+        self.categoria = categoria
+        self.tipo = tipo
+        self.valor = valor
+        self.parametros = None
+        self.escopo = None
+
+    def __repr__(self):
+        return "Simbolo(%s, %s, %r)" % (self.nome, self.categoria, self.tipo)
+
+
+class TabelaDeSimbolos:
+    """
+    Tabela com escopos aninhados e busca O(1): `visiveis` mapeia cada nome ao
+    símbolo que ele denota no ponto atual, e cada escopo guarda o que sombreou
+    para restaurar ao ser fechado.
+    """
+    def __init__(self):
+        self.visiveis = {}
+        self.sombreados = [[]]
+        self.locais = [{}]
+
+    def abrirEscopo(self, simbolos=None):
+        """Abre um escopo, opcionalmente já com os símbolos de um escopo fechado antes."""
+        self.sombreados.append([])
+        self.locais.append({})
+        if simbolos:
+            for simbolo in simbolos.values():
+                self.declarar(simbolo)
+
+    def fecharEscopo(self):
+        """Fecha o escopo atual e devolve seus símbolos (dict nome -> Simbolo)."""
+        for nome, anterior in reversed(self.sombreados.pop()):
+            if anterior is None:
+                del self.visiveis[nome]
+            else:
+                self.visiveis[nome] = anterior
+        return self.locais.pop()
+
+    def declarar(self, simbolo):
+        self.sombreados[-1].append((simbolo.nome, self.visiveis.get(simbolo.nome)))
+        self.visiveis[simbolo.nome] = simbolo
+        self.locais[-1][simbolo.nome] = simbolo
+        return simbolo
+
+    def buscar(self, nome):
+        return self.visiveis.get(nome)
+
+    def declaradoNoEscopo(self, nome):
+        return nome in self.locais[-1]
+
+    def variavel(self, nome):
+        """Símbolo de variável ou parâmetro visível com esse nome, ou None."""
+        simbolo = self.visiveis.get(nome)
+        if simbolo is not None and simbolo.categoria in (VARIAVEL, PARAMETRO):
+            return simbolo
+        return None
+
+    def tipoNomeado(self, nome):
+        """Resolve o nome de um tipo básico ou declarado com `tipo`; None se desconhecido."""
+        if nome in BASICOS:
+            return BASICOS[nome]
+        simbolo = self.visiveis.get(nome)
+        if simbolo is not None and simbolo.categoria == TIPO:
+            return simbolo.tipo
+        return None